@@ -0,0 +1,263 @@
+"""
+API HTTP local de leitura do volume diário previsto (data/warehouse.db).
+
+    GET /daily_volume?porto=Paranagua&mercadoria=SOJA&eta_inicio=2024-05-13
+    GET /health
+
+As respostas ficam em um cache LRU em memória, com tempo de validade, que é
+descartado assim que uma nova coleta é gravada no banco (PRAGMA data_version
+muda quando outra conexão confirma uma transação).
+"""
+
+import io
+import json
+import logging
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from core import logs, warehouse
+from core.config import (
+    API_CACHE_SIZE,
+    API_CACHE_TTL,
+    API_HOST,
+    API_PORT,
+    WAREHOUSE_PATH,
+)
+import query
+
+logger = logging.getLogger(__name__)
+
+# Filtros aceitos em /daily_volume e a conversão aplicada a cada valor
+FILTERS = {
+    "porto": str.capitalize,
+    "sentido": str,
+    "mercadoria": str,
+    "mercadoria_contem": str,
+    "eta_inicio": query.parse_date,
+    "eta_fim": query.parse_date,
+    "limite": int,
+}
+
+CONTENT_TYPES = {
+    "json": "application/json; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class ResponseCache:
+    """
+    Cache LRU das respostas, com tempo de validade por entrada.
+
+    A cada consulta o PRAGMA data_version de uma conexão dedicada é comparado
+    com o último valor lido; se outra conexão gravou no banco, o cache inteiro
+    é descartado. Respostas calculadas antes do descarte não são guardadas.
+    """
+
+    def __init__(
+        self, db_path=WAREHOUSE_PATH, max_entries=API_CACHE_SIZE, ttl=API_CACHE_TTL
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = warehouse.connect(db_path, check_same_thread=False)
+        self._data_version = self._read_data_version()
+        self.generation = 0
+
+    def get(self, key):
+        """
+        Retorna a resposta guardada para a chave, ou None.
+
+        Retorna:
+        Tupla (resposta ou None, geração do cache no momento da consulta).
+        """
+        with self._lock:
+            self._check_data_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, self.generation
+            expires, body = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None, self.generation
+            self._entries.move_to_end(key)
+            return body, self.generation
+
+    def put(self, key, body, generation):
+        """Guarda a resposta, se o cache não foi descartado desde a geração informada."""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _read_data_version(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_data_version(self):
+        data_version = self._read_data_version()
+        if data_version != self._data_version:
+            logger.info("Nova gravação no banco, cache de respostas descartado")
+            self._data_version = data_version
+            self._entries.clear()
+            self.generation += 1
+
+
+def parse_filters(query_string):
+    """
+    Converte a query string em filtros para query.build_query.
+
+    Retorna:
+    Tupla (filtros, formato da resposta).
+
+    Levanta:
+    ValueError se um parâmetro for desconhecido ou inválido.
+    """
+    filters, output_format = {}, "json"
+    for name, value in parse_qsl(query_string, keep_blank_values=True):
+        if name == "formato":
+            if value not in CONTENT_TYPES:
+                raise ValueError(f"Formato inválido: {value}")
+            output_format = value
+            continue
+        if name not in FILTERS:
+            raise ValueError(f"Parâmetro desconhecido: {name}")
+        try:
+            filters[name] = FILTERS[name](value)
+        except (ValueError, argparse.ArgumentTypeError):
+            raise ValueError(f"Valor inválido para {name}: {value}")
+    return filters, output_format
+
+
+def render(rows, output_format):
+    """Serializa as linhas da consulta como lista JSON ou CSV."""
+    if output_format == "csv":
+        output = io.StringIO(newline="")
+        query.write_rows(rows, query.COLUMNS, output, "csv")
+        return output.getvalue().encode("utf-8")
+    data = [dict(zip(query.COLUMNS, row)) for row in rows]
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Atende as consultas de volume diário, servindo do cache quando possível."""
+
+    cache = None
+    db_path = WAREHOUSE_PATH
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            body = json.dumps({"status": "ok", "cache": len(self.cache)})
+            self._send(HTTPStatus.OK, body.encode("utf-8"), "json")
+        elif url.path == "/daily_volume":
+            self._daily_volume(url.query)
+        else:
+            self._error(HTTPStatus.NOT_FOUND, f"Recurso desconhecido: {url.path}")
+
+    def _daily_volume(self, query_string):
+        try:
+            filters, output_format = parse_filters(query_string)
+        except ValueError as e:
+            self._error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        # Parâmetros em ordem canônica, para que a mesma consulta use a mesma entrada
+        key = (output_format, tuple(sorted(filters.items())))
+        body, generation = self.cache.get(key)
+        if body is not None:
+            self._send(HTTPStatus.OK, body, output_format, "HIT")
+            return
+
+        sql, params = query.build_query("daily_volume", **filters)
+        try:
+            with warehouse.connection(self.db_path) as conn:
+                body = render(query.iter_rows(conn, sql, params), output_format)
+        except Exception as e:
+            logger.error(f"Erro na consulta do volume diário: {e}")
+            self._error(HTTPStatus.INTERNAL_SERVER_ERROR, "Erro na consulta")
+            return
+        self.cache.put(key, body, generation)
+        self._send(HTTPStatus.OK, body, output_format, "MISS")
+
+    def _error(self, status, message):
+        body = json.dumps({"erro": message}, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "json")
+
+    def _send(self, status, body, output_format, cache_status=None):
+        self.send_response(status)
+        self.send_header("Content-Type", CONTENT_TYPES[output_format])
+        self.send_header("Content-Length", str(len(body)))
+        if cache_status is not None:
+            self.send_header("X-Cache", cache_status)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def make_server(host=API_HOST, port=API_PORT, db_path=WAREHOUSE_PATH, cache=None):
+    """
+    Cria o servidor HTTP da API, com uma thread por requisição.
+
+    As consultas usam o pool de conexões do banco (ver warehouse.use_pool).
+
+    Retorna:
+    ThreadingHTTPServer pronto para serve_forever().
+    """
+    warehouse.use_pool(True, db_path)
+    handler = type(
+        "Handler",
+        (Handler,),
+        {"cache": cache or ResponseCache(db_path), "db_path": db_path},
+    )
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(host=API_HOST, port=API_PORT, db_path=WAREHOUSE_PATH):
+    """Atende as requisições até o processo ser interrompido."""
+    server = make_server(host, port, db_path)
+    logger.info(f"API de volume diário em http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.RequestHandlerClass.cache.close()
+        warehouse.use_pool(False)
+
+
+def add_arguments(parser):
+    """Adiciona os argumentos do servidor a um parser do argparse."""
+    parser.add_argument("--host", default=API_HOST, help="Endereço de escuta")
+    parser.add_argument("--port", type=int, default=API_PORT, help="Porta de escuta")
+    parser.add_argument("--db", default=WAREHOUSE_PATH, help=argparse.SUPPRESS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="API HTTP local do volume diário previsto de Paranaguá e Santos"
+    )
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.db)
+
+
+if __name__ == "__main__":
+    logs.setup_logging()
+    main()
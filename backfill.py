@@ -0,0 +1,121 @@
+"""
+Reprocessamento das coletas a partir das páginas guardadas no arquivo bruto.
+
+Cada página registrada em raw_pages passa de novo por parsing, normalização
+e gravação no histórico, substituindo as linhas do seu snapshot. O parsing
+e a normalização rodam em um pool de processos, com no máximo
+PAGES_PER_WORKER páginas em andamento por processo para limitar a memória;
+a gravação acontece no processo principal, em ordem de snapshot, de modo
+que as alterações entre snapshots (lineup_changes) são recalculadas sobre o
+histórico já reprocessado.
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from core import archive, diff, warehouse
+from core.config import RAW_DIR, WAREHOUSE_PATH
+from core.normalize import normalize
+import main
+
+# Páginas em andamento (enviadas ao pool e ainda não gravadas) por processo
+PAGES_PER_WORKER = 2
+
+
+def reparse(porto, content_hash, root=RAW_DIR):
+    """
+    Lê uma página do arquivo bruto e retorna seus registros normalizados.
+
+    Executado nos processos do pool.
+    """
+    content = archive.load(main.PORTS[porto][1], content_hash, root)
+    records = main.load_port(porto).parse_page(content)
+    return normalize(records)
+
+
+def backfill(
+    portos=None,
+    snapshot_inicio=None,
+    snapshot_fim=None,
+    workers=None,
+    db_path=WAREHOUSE_PATH,
+    root=RAW_DIR,
+):
+    """
+    Reprocessa as páginas brutas dos snapshots selecionados.
+
+    Parâmetros:
+    - portos: Portos a reprocessar, como em main.PORTS (padrão: todos).
+    - snapshot_inicio, snapshot_fim: Intervalo de snapshots (inclusive).
+    - workers: Número de processos (padrão: um por núcleo).
+    - db_path: Caminho para o banco de dados do histórico.
+    - root: Diretório raiz do arquivo bruto.
+
+    Retorna:
+    Tupla (snapshots reprocessados, snapshots com falha).
+    """
+    portos = portos or list(main.PORTS)
+    nomes = {main.PORTS[porto][1]: porto for porto in portos}
+    workers = workers or os.cpu_count() or 1
+    inicio = time.monotonic()
+
+    with warehouse.connection(db_path) as conn:
+        paginas = archive.list_pages(conn, list(nomes), snapshot_inicio, snapshot_fim)
+    logging.info(f"Reprocessando {len(paginas)} snapshots com {workers} processos")
+
+    ok = falhas = 0
+    pendentes = deque()
+    fila = iter(paginas)
+    # Processos iniciados com "spawn": não herdam as conexões abertas com o banco
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as executor:
+
+        def enviar():
+            pagina = next(fila, None)
+            if pagina is not None:
+                future = executor.submit(
+                    reparse, nomes[pagina.porto], pagina.content_hash, root
+                )
+                pendentes.append((pagina, future))
+
+        for _ in range(workers * PAGES_PER_WORKER):
+            enviar()
+
+        # Os resultados são gravados na ordem dos snapshots
+        with warehouse.connection(db_path) as conn:
+            while pendentes:
+                pagina, future = pendentes.popleft()
+                try:
+                    registros = future.result()
+                    if registros.empty:
+                        raise ValueError("nenhum registro extraído da página")
+                    warehouse.upsert_records(
+                        conn, registros, pagina.snapshot, replace=True
+                    )
+                    diff.record_changes(conn, pagina.porto, pagina.snapshot)
+                    ok += 1
+                except BrokenProcessPool as e:
+                    logging.error(f"Pool de processos interrompido: {e}")
+                    falhas += 1 + len(pendentes)
+                    break
+                except Exception as e:
+                    # O snapshot mantém as linhas gravadas anteriormente
+                    logging.error(
+                        f"Erro ao reprocessar {pagina.porto} {pagina.snapshot}: {e}"
+                    )
+                    falhas += 1
+                enviar()
+
+            # Dias que deixaram de aparecer em algum snapshot reprocessado
+            if ok:
+                warehouse.rebuild_daily_volume(conn)
+
+    logging.info(
+        f"Reprocessamento concluído: {ok} snapshots, {falhas} falhas, "
+        f"{time.monotonic() - inicio:.1f}s"
+    )
+    return ok, falhas
@@ -0,0 +1,236 @@
+"""
+Benchmarks das etapas do pipeline com páginas gravadas, sem acesso à rede.
+
+Uso, a partir da raiz do repositório:
+
+    python -m benchmarks.bench                     # executa e compara com a baseline
+    python -m benchmarks.bench --salvar-baseline   # grava a baseline desta máquina
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+
+from core import warehouse
+from core.normalize import normalize
+from core.processing import aggregate
+from core.records import ShipmentBatch
+from main import combine_data
+from paranagua_scraper.scripts import parsers
+from paranagua_scraper.scripts.scraper import parse_paranagua_data
+from paranagua_scraper.scripts.utils import parse_html
+from santos_scraper.scripts.scraper import extract_santos_data
+from . import pages
+
+BENCHMARKS_DIR = os.path.dirname(__file__)
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+# Fatores de ampliação das páginas gravadas
+SCALES = [1, 10, 100]
+
+# Aumento relativo da mediana, em relação à baseline, considerado regressão
+TOLERANCE = 0.25
+
+PARANAGUA_SENTIDOS = {"import": "Imp", "export": "Exp", "import_export": "Imp/Exp"}
+SANTOS_TABLES = {"import": 4, "export": 5}
+
+
+def measure(func, repeat):
+    """
+    Executa func repetidas vezes e retorna os tempos em segundos.
+
+    func recebe o número da repetição, para que cada execução possa usar
+    dados próprios (por exemplo, um snapshot novo a cada gravação).
+    """
+    tempos = []
+    for i in range(repeat):
+        inicio = time.perf_counter()
+        func(i)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def stages(scale, workdir):
+    """
+    Prepara as etapas do pipeline para um fator de ampliação.
+
+    Retorna:
+    Lista de tuplas (nome da etapa, função, bytes de entrada, linhas produzidas).
+    """
+    paranagua = pages.page("paranagua", scale)
+    santos = pages.page("santos", scale)
+
+    dados_paranagua = parse_paranagua_data(paranagua, PARANAGUA_SENTIDOS)
+    dados_santos = extract_santos_data(santos, SANTOS_TABLES)
+    lote_paranagua = ShipmentBatch.concat(dados_paranagua.values())
+    lote_santos = ShipmentBatch.concat(dados_santos.values())
+    lote = ShipmentBatch.concat([lote_paranagua, lote_santos])
+    registros = normalize(lote)
+    frames = [aggregate(lote_paranagua), aggregate(lote_santos)]
+
+    db_path = os.path.join(workdir, f"warehouse-{scale}.db")
+    csv_path = os.path.join(workdir, f"combined-{scale}.csv")
+
+    def save_to_database(i):
+        # Mesma gravação da coleta dos portos, em um banco temporário
+        snapshot = f"2024-01-01T00:00:{i:02d}-03:00"
+        warehouse.save_snapshot(registros, snapshot, db_path)
+
+    result = [("parse_html", lambda i: parse_html(paranagua), len(paranagua), None)]
+    for backend in sorted(parsers.BACKENDS):
+        result.append(
+            (
+                f"paranagua_extract[{backend}]",
+                lambda i, b=backend: parse_paranagua_data(
+                    paranagua, PARANAGUA_SENTIDOS, b
+                ),
+                len(paranagua),
+                len(lote_paranagua),
+            )
+        )
+    result += [
+        (
+            "santos_extract",
+            lambda i: extract_santos_data(santos, SANTOS_TABLES),
+            len(santos),
+            len(lote_santos),
+        ),
+        ("normalize", lambda i: normalize(lote), None, len(lote)),
+        ("aggregate", lambda i: aggregate(registros), None, len(lote)),
+        ("save_to_database", save_to_database, None, len(lote)),
+        (
+            "combine_data",
+            lambda i: combine_data(frames, csv_path),
+            None,
+            sum(len(frame) for frame in frames),
+        ),
+    ]
+    return result
+
+
+def run(scales=SCALES, repeat=5):
+    """
+    Executa os benchmarks de todas as etapas em cada fator de ampliação.
+
+    Retorna:
+    Dicionário {"etapa@fator": estatísticas} com tempos em segundos.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            for nome, func, tamanho, linhas in stages(scale, workdir):
+                tempos = measure(func, repeat)
+                results[f"{nome}@{scale}"] = summarize(tempos, tamanho, linhas)
+    return results
+
+
+def summarize(tempos, tamanho, linhas):
+    """Retorna as estatísticas de uma etapa a partir dos tempos medidos."""
+    mediana = statistics.median(tempos)
+    return {
+        "min": min(tempos),
+        "median": mediana,
+        "bytes": tamanho,
+        "rows": linhas,
+        "rows_per_sec": linhas / mediana if linhas and mediana else None,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Compara as medianas com a baseline.
+
+    Retorna:
+    Lista de tuplas (benchmark, mediana da baseline, mediana atual) das
+    etapas mais lentas que a baseline além da tolerância.
+    """
+    regressions = []
+    for nome, atual in results.items():
+        anterior = baseline.get(nome)
+        if anterior and atual["median"] > anterior["median"] * (1 + tolerance):
+            regressions.append((nome, anterior["median"], atual["median"]))
+    return regressions
+
+
+def report(results, baseline):
+    """Imprime a tabela de resultados, com a variação em relação à baseline."""
+    print(
+        f"{'benchmark':<36}{'mediana (ms)':>14}{'min (ms)':>12}"
+        f"{'linhas/s':>14}{'vs baseline':>14}"
+    )
+    for nome, r in results.items():
+        anterior = baseline.get(nome)
+        variacao = (
+            f"{(r['median'] / anterior['median'] - 1) * 100:+.1f}%" if anterior else "-"
+        )
+        linhas = f"{r['rows_per_sec']:.0f}" if r["rows_per_sec"] else "-"
+        print(
+            f"{nome:<36}{r['median'] * 1000:>14.2f}{r['min'] * 1000:>12.2f}"
+            f"{linhas:>14}{variacao:>14}"
+        )
+
+
+def _load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def _write_json(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "created_On": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--escalas", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--salvar-baseline",
+        action="store_true",
+        help="Grava os resultados como a nova baseline",
+    )
+    args = parser.parse_args(argv)
+
+    # As etapas registram cada gravação no log; mantém a saída legível
+    logging.disable(logging.INFO)
+    results = run(args.escalas, args.repeticoes)
+    baseline = _load_baseline(args.baseline)
+    report(results, baseline)
+
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    _write_json(os.path.join(RESULTS_DIR, f"bench_{stamp}.json"), results)
+    if args.salvar_baseline:
+        _write_json(args.baseline, results)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerancia)
+    for nome, anterior, atual in regressions:
+        print(f"REGRESSÃO {nome}: {anterior * 1000:.2f} ms -> {atual * 1000:.2f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Teste de carga do pipeline com páginas sintéticas servidas localmente.
+
+Uso, a partir da raiz do repositório:
+
+    python -m benchmarks.load                               # 1.000 a 100.000 linhas
+    python -m benchmarks.load --linhas 1000 100000 500000 --repeticoes 3
+
+Para cada quantidade de linhas, as páginas de Paranaguá e de Santos são
+geradas por benchmarks/synthetic.py e servidas por benchmarks/server.py; os
+scrapers as buscam pelo cliente HTTP compartilhado, como nas coletas reais.
+"""
+
+import os
+import sys
+import logging
+import argparse
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from core import columnar, http, warehouse
+from core.normalize import normalize
+from core.processing import aggregate
+from core.records import ShipmentBatch
+from paranagua_scraper.config.config_request import ConfigRequest as ParanaguaRequest
+from paranagua_scraper.scripts.scraper import (
+    fetch_paranagua_page,
+    parse_paranagua_data,
+    scrape_paranagua_data,
+)
+from santos_scraper.config.config_request import ConfigRequest as SantosRequest
+from santos_scraper.scripts.scraper import scrape_santos_data
+from . import server
+from .bench import PARANAGUA_SENTIDOS, RESULTS_DIR, SANTOS_TABLES
+from .bench import _write_json, measure, report, summarize
+
+# Quantidades de linhas de cada página (Santos divide as linhas entre os sentidos)
+SIZES = [1000, 10000, 100000]
+
+
+def stages(linhas, base_url, workdir):
+    """
+    Prepara as etapas do pipeline para páginas com a quantidade de linhas informada.
+
+    Aponta as URLs dos portos para o servidor local; deve ser chamada dentro
+    de local_pages(), que as restaura ao final.
+
+    Retorna:
+    Lista de tuplas (nome da etapa, função, bytes de entrada, linhas produzidas).
+    """
+    importacao = linhas // 2
+    ParanaguaRequest.URL = f"{base_url}/paranagua?linhas={linhas}"
+    SantosRequest.URL = (
+        f"{base_url}/santos?importacao={importacao}&exportacao={linhas - importacao}"
+    )
+
+    # Primeira coleta fora da medição: gera as páginas no servidor
+    paranagua = fetch_paranagua_page()
+    dados_paranagua = parse_paranagua_data(paranagua, PARANAGUA_SENTIDOS)
+    dados_santos, content = scrape_santos_data(SANTOS_TABLES, 0, mode="http")
+    lote = ShipmentBatch.concat([*dados_paranagua.values(), *dados_santos.values()])
+    registros = normalize(lote)
+
+    db_path = os.path.join(workdir, f"warehouse-{linhas}.db")
+    parquet_dir = os.path.join(workdir, f"parquet-{linhas}")
+
+    def save_to_database(i):
+        # Mesma gravação da coleta dos portos, em um banco temporário
+        snapshot = f"2024-01-01T00:00:{i:02d}-03:00"
+        warehouse.save_snapshot(registros, snapshot, db_path)
+
+    return [
+        (
+            "scrape_paranagua_data",
+            lambda i: scrape_paranagua_data(PARANAGUA_SENTIDOS),
+            len(paranagua),
+            sum(len(batch) for batch in dados_paranagua.values()),
+        ),
+        (
+            "scrape_santos_data",
+            lambda i: scrape_santos_data(SANTOS_TABLES, 0, mode="http"),
+            len(content),
+            sum(len(batch) for batch in dados_santos.values()),
+        ),
+        ("normalize", lambda i: normalize(lote), None, len(lote)),
+        ("aggregate", lambda i: aggregate(registros), None, len(lote)),
+        ("save_to_database", save_to_database, None, len(lote)),
+        (
+            "save_to_parquet",
+            lambda i: columnar.write_parquet(
+                registros, f"2024-01-01T00:00:{i:02d}-03:00", parquet_dir
+            ),
+            None,
+            len(lote),
+        ),
+    ]
+
+
+@contextmanager
+def local_pages():
+    """
+    Prepara o processo para buscar as páginas no servidor local.
+
+    Os limites de concorrência e de taxa por host protegem os sites reais; no
+    servidor local, apenas distorceriam os tempos das coletas repetidas. Ao
+    sair, o limitador e as URLs dos portos alteradas por stages() voltam aos
+    valores anteriores.
+    """
+    urls = ParanaguaRequest.URL, SantosRequest.URL
+    limiter = http.set_limiter(http.HostLimiter(rate=None))
+    try:
+        yield
+    finally:
+        http.set_limiter(limiter)
+        ParanaguaRequest.URL, SantosRequest.URL = urls
+
+
+def run(sizes=SIZES, repeat=3):
+    """
+    Executa as etapas do pipeline para cada quantidade de linhas.
+
+    Retorna:
+    Dicionário {"etapa@linhas": estatísticas} com tempos em segundos.
+    """
+    stand_in = server.start()
+    base_url = f"http://{server.HOST}:{stand_in.server_port}"
+    results = {}
+    try:
+        with local_pages(), tempfile.TemporaryDirectory() as workdir:
+            for linhas in sizes:
+                etapas = stages(linhas, base_url, workdir)
+                for nome, func, tamanho, produzidas in etapas:
+                    tempos = measure(func, repeat)
+                    results[f"{nome}@{linhas}"] = summarize(tempos, tamanho, produzidas)
+    finally:
+        stand_in.shutdown()
+        stand_in.server_close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    # As etapas registram cada gravação no log; mantém a saída legível
+    logging.disable(logging.INFO)
+    results = run(args.linhas, args.repeticoes)
+    report(results, {})
+
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    _write_json(os.path.join(RESULTS_DIR, f"load_{stamp}.json"), results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
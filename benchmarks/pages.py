@@ -0,0 +1,78 @@
+"""Páginas de fixture dos portos e versões sintéticas ampliadas."""
+
+import os
+import re
+from datetime import datetime, timedelta
+from itertools import count
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Corpo de cada tabela da página, em ordem de documento
+TBODY = re.compile(rb"(<tbody>)(.*?)(</tbody>)", re.S)
+
+# Datas (dd/mm/aaaa) das células de ETA, ETB e ETS
+DATA = re.compile(rb"\b(\d{2})/(\d{2})/(\d{4})\b")
+
+# Tabelas (base 0, na ordem dos <tbody>) com os dados de cada porto
+DATA_TABLES = {
+    "paranagua": [4],
+    "santos": [3, 4],
+}
+
+
+def load(porto):
+    """Retorna o conteúdo bruto da página gravada do porto."""
+    with open(os.path.join(FIXTURES_DIR, f"{porto}.html"), "rb") as f:
+        return f.read()
+
+
+def scale(content, tables, factor):
+    """
+    Amplia uma página repetindo as linhas das tabelas de dados.
+
+    A marcação das linhas gravadas é mantida, incluindo as linhas com
+    rowspan da tabela de Paranaguá, de modo que a página ampliada exercita
+    os mesmos caminhos do parser que a página original. As datas de cada
+    cópia são deslocadas para depois das datas da cópia anterior, para que
+    as chaves (porto, sentido, mercadoria, eta) da página ampliada cresçam
+    com o fator, como em um line-up maior, em vez de se repetirem.
+
+    Parâmetros:
+    - content: Conteúdo bruto da página.
+    - tables: Índices (base 0) dos <tbody> a ampliar.
+    - factor: Quantidade de cópias das linhas de cada tabela.
+
+    Retorna:
+    O conteúdo da página ampliada, em bytes.
+    """
+    if factor == 1:
+        return content
+    contador = count()
+
+    def repete(match):
+        if next(contador) not in tables:
+            return match.group(0)
+        linhas = match.group(2)
+        datas = [_data(m) for m in DATA.finditer(linhas)]
+        periodo = (max(datas) - min(datas)).days + 1 if datas else 0
+        copias = [_desloca(linhas, timedelta(days=periodo * i)) for i in range(factor)]
+        return match.group(1) + b"".join(copias) + match.group(3)
+
+    return TBODY.sub(repete, content)
+
+
+def _data(match):
+    dia, mes, ano = (int(parte) for parte in match.groups())
+    return datetime(ano, mes, dia)
+
+
+def _desloca(linhas, delta):
+    # Desloca todas as datas das linhas pelo intervalo informado
+    if not delta:
+        return linhas
+    return DATA.sub(lambda m: (_data(m) + delta).strftime("%d/%m/%Y").encode(), linhas)
+
+
+def page(porto, factor=1):
+    """Retorna a página gravada do porto ampliada pelo fator informado."""
+    return scale(load(porto), DATA_TABLES[porto], factor)
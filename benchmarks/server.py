@@ -0,0 +1,159 @@
+"""
+Servidor HTTP local com páginas sintéticas de line-up, no lugar dos sites reais.
+
+    GET /paranagua?linhas=100000&continuacao=0.2&seed=0
+    GET /santos?importacao=50000&exportacao=50000&seed=0
+
+Os scrapers passam a usar o servidor pelas variáveis de ambiente das URLs
+(ver ConfigRequest de cada porto), por exemplo:
+
+    python -m benchmarks.server --port 8090 &
+    PARANAGUA_URL="http://127.0.0.1:8090/paranagua?linhas=100000" \\
+    SANTOS_URL="http://127.0.0.1:8090/santos?importacao=50000&exportacao=50000" \\
+    python main.py run --force
+
+Parâmetros desconhecidos (como as datas do relatório retroativo) são
+ignorados. As respostas não têm ETag nem Last-Modified, de modo que o cache
+HTTP dos scrapers não guarda as páginas geradas.
+"""
+
+import logging
+import argparse
+import threading
+from functools import lru_cache
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from core import logs
+from . import synthetic
+
+logger = logging.getLogger(__name__)
+
+HOST = "127.0.0.1"
+PORT = 8090
+
+# Parâmetros aceitos em cada página, com o valor padrão e a conversão aplicada
+PARAMETERS = {
+    "/paranagua": {
+        "linhas": (1000, int),
+        "continuacao": (synthetic.CONTINUATION, float),
+        "seed": (0, int),
+    },
+    "/santos": {
+        "importacao": (500, int),
+        "exportacao": (500, int),
+        "seed": (0, int),
+    },
+}
+
+GENERATORS = {
+    "/paranagua": synthetic.paranagua_page,
+    "/santos": synthetic.santos_page,
+}
+
+
+@lru_cache(maxsize=8)
+def render(path, params):
+    """
+    Gera a página sintética de um caminho, mantendo as últimas em memória.
+
+    Parâmetros:
+    - path: Caminho da página ("/paranagua" ou "/santos").
+    - params: Tupla de pares (parâmetro, valor) na ordem de PARAMETERS[path].
+
+    Retorna:
+    O conteúdo da página, em bytes.
+    """
+    return GENERATORS[path](**dict(params))
+
+
+def parse_params(path, query_string):
+    """
+    Converte os parâmetros da URL de uma página, completando com os padrões.
+
+    Lança ValueError se algum valor for inválido.
+    """
+    recebidos = parse_qs(query_string)
+    params = []
+    for nome, (padrao, tipo) in PARAMETERS[path].items():
+        valor = recebidos[nome][-1] if nome in recebidos else padrao
+        try:
+            params.append((nome, tipo(valor)))
+        except ValueError:
+            raise ValueError(f"Valor inválido para {nome}: {valor}")
+    return tuple(params)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serve as páginas sintéticas de Paranaguá e Santos."""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path not in GENERATORS:
+            self._send(HTTPStatus.NOT_FOUND, b"Pagina desconhecida")
+            return
+        try:
+            params = parse_params(url.path, url.query)
+        except ValueError as e:
+            self._send(HTTPStatus.BAD_REQUEST, str(e).encode("utf-8"))
+            return
+        self._send(HTTPStatus.OK, render(url.path, params))
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def make_server(host=HOST, port=PORT):
+    """
+    Cria o servidor de páginas sintéticas, com uma thread por requisição.
+
+    Com port=0 o sistema escolhe uma porta livre (ver server_port).
+
+    Retorna:
+    ThreadingHTTPServer pronto para serve_forever().
+    """
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def start(host=HOST, port=0):
+    """
+    Inicia o servidor de páginas sintéticas em uma thread em segundo plano.
+
+    Retorna:
+    O servidor; encerre-o com shutdown() e server_close().
+    """
+    server = make_server(host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Servidor local de páginas sintéticas de line-up"
+    )
+    parser.add_argument("--host", default=HOST, help="Endereço de escuta")
+    parser.add_argument("--port", type=int, default=PORT, help="Porta de escuta")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port)
+    base = f"http://{args.host}:{server.server_port}"
+    logger.info(f"Páginas sintéticas em {base}/paranagua e {base}/santos")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logs.setup_logging()
+    main()
@@ -0,0 +1,271 @@
+"""
+Páginas sintéticas de line-up de Paranaguá e Santos com tamanho configurável.
+
+As páginas seguem o layout das páginas gravadas em benchmarks/fixtures (mesmas
+tabelas, cabeçalhos e formatos de ETA e peso), com a quantidade de linhas
+informada, de centenas a centenas de milhares. A geração é determinística
+para uma mesma semente.
+"""
+
+import math
+import random
+from datetime import date, timedelta
+
+# Fração padrão das linhas de Paranaguá que são continuação de um navio (sem
+# as 8 primeiras colunas, cobertas pelo rowspan da linha anterior)
+CONTINUATION = 0.2
+
+# Primeiro dia das ETAs geradas e quantidade mínima de dias em que são
+# distribuídas
+ETA_INICIO = date(2024, 5, 1)
+ETA_DIAS = 60
+
+# Média de linhas por chave (sentido, mercadoria, eta): as ETAs e as
+# mercadorias se espalham com a quantidade de linhas, para que a quantidade de
+# chaves distintas cresça com a página
+LINHAS_POR_CHAVE = 2
+
+MERCADORIAS = [
+    "SOJA EM GRAOS",
+    "FARELO DE SOJA",
+    "MILHO",
+    "FERTILIZANTES",
+    "ACUCAR",
+    "OLEO VEGETAL",
+    "CELULOSE",
+    "TRIGO",
+    "ENXOFRE",
+    "SAL",
+]
+BANDEIRAS = ["PANAMA", "LIBERIA", "MARSHALL ISLANDS", "MALTA", "HONG KONG"]
+
+# Colunas da linha completa de Paranaguá cobertas pelo rowspan; as demais
+# (Operador, DUV, Sentido, Mercadoria, ETA, ETB, ETS e Previsto) se repetem em
+# cada linha de continuação
+PARANAGUA_ROWSPAN = 8
+
+# Valores da célula de sentido da tabela de esperados de Paranaguá
+PARANAGUA_SENTIDO_CELLS = ["Imp", "Exp", "Imp/Exp"]
+
+PARANAGUA_TABLE = '<table class="table table-bordered table-striped table-hover">'
+PARANAGUA_HEADER = (
+    "Programação",
+    "Embarcação",
+    "IMO",
+    "Bandeira",
+    "Comp (m)",
+    "DWT",
+    "Calado (m)",
+    "Agência",
+    "Operador",
+    "DUV",
+    "Sentido",
+    "Mercadoria",
+    "ETA",
+    "ETB",
+    "ETS",
+    "Previsto",
+)
+# Tabelas da página antes e depois da tabela de esperados (índice 4)
+PARANAGUA_ANTES = [
+    "ATRACADOS",
+    "PROGRAMADOS",
+    "AO LARGO PARA REATRACAÇÃO",
+    "AO LARGO",
+]
+PARANAGUA_DEPOIS = ["DESPACHADOS"]
+
+SANTOS_HEADER = (
+    "Navio",
+    "Bandeira",
+    "Com.",
+    "Nav.",
+    "Cheg./Arrival d/m/y",
+    "Carimbo",
+    "Agência",
+    "Operação",
+    "Mercadoria",
+    "Peso",
+    "Viagem",
+    "Terminal",
+)
+# Tabelas da página antes das tabelas de descarga (4ª) e embarque (5ª)
+SANTOS_ANTES = ["Menu", "Legenda", "Atualizado em 03/06/2024 07:45"]
+
+
+def paranagua_page(linhas, continuacao=CONTINUATION, seed=0):
+    """
+    Gera uma página de line-up de Paranaguá com a tabela de esperados.
+
+    Cada navio ocupa uma linha completa (16 células, com rowspan nas 8
+    primeiras) e, a cada linha seguinte, continua com probabilidade
+    `continuacao` em uma linha de continuação de 8 células, como nos navios
+    com mais de uma mercadoria da página real. As ETAs e as mercadorias se
+    espalham com a quantidade de linhas (ver LINHAS_POR_CHAVE).
+
+    Parâmetros:
+    - linhas: Quantidade de linhas da tabela de esperados.
+    - continuacao: Fração esperada de linhas de continuação (0 a 1).
+    - seed: Semente do gerador de números aleatórios.
+
+    Retorna:
+    O conteúdo da página, em bytes (UTF-8).
+    """
+    rng = random.Random(seed)
+    mercadorias, dias = _espaco(linhas)
+    partes = _html_inicio("Line-up de Navios - APPA")
+    for titulo in PARANAGUA_ANTES:
+        partes.append(_paranagua_auxiliar(titulo))
+
+    partes.append("  <h3>ESPERADOS</h3>\n  " + PARANAGUA_TABLE + "\n")
+    partes.append(_thead(PARANAGUA_HEADER))
+    partes.append("    <tbody>\n")
+    restantes = linhas
+    navio = 0
+    while restantes > 0:
+        # Quantidade de mercadorias do navio, limitada às linhas restantes
+        cargas = 1
+        while cargas < restantes and rng.random() < continuacao:
+            cargas += 1
+        restantes -= cargas
+        navio += 1
+
+        sentido = rng.choice(PARANAGUA_SENTIDO_CELLS)
+        eta = ETA_INICIO + timedelta(days=rng.randrange(dias))
+        etb, ets = eta + timedelta(days=2), eta + timedelta(days=5)
+        datas = [
+            f"{eta:%d/%m/%Y} {rng.randrange(24):02d}:00",
+            f"{etb:%d/%m/%Y}",
+            f"{ets:%d/%m/%Y}",
+        ]
+        navio_cells = [
+            str(20240000 + navio),
+            f"NAVIO {navio}",
+            str(9400000 + navio),
+            rng.choice(BANDEIRAS),
+            str(rng.randrange(150, 300)),
+            str(rng.randrange(20000, 90000)),
+            f"{rng.uniform(9, 15):.1f}",
+            f"AGENCIA {navio % 20}",
+        ]
+        span = f' rowspan="{cargas}"' if cargas > 1 else ""
+        inicio = "".join(f"<td{span}>{cell}</td>" for cell in navio_cells)
+        for carga in range(cargas):
+            cells = [
+                f"OPERADOR {(navio + carga) % 12}",
+                str(2024000000 + navio * 10 + carga),
+                sentido,
+                rng.choice(mercadorias),
+                *datas,
+                _peso(rng) + " t",
+            ]
+            linha = "".join(f"<td>{cell}</td>" for cell in cells)
+            partes.append(f"        <tr>{inicio if carga == 0 else ''}{linha}</tr>\n")
+    partes.append("    </tbody>\n  </table>\n")
+
+    for titulo in PARANAGUA_DEPOIS:
+        partes.append(_paranagua_auxiliar(titulo))
+    partes.append("</body>\n</html>\n")
+    return "".join(partes).encode("utf-8")
+
+
+def santos_page(importacao, exportacao, seed=0):
+    """
+    Gera uma página de navios esperados de Santos.
+
+    As ETAs e as mercadorias se espalham com a quantidade total de linhas
+    (ver LINHAS_POR_CHAVE).
+
+    Parâmetros:
+    - importacao: Quantidade de linhas da tabela de descarga.
+    - exportacao: Quantidade de linhas da tabela de embarque.
+    - seed: Semente do gerador de números aleatórios.
+
+    Retorna:
+    O conteúdo da página, em bytes (UTF-8).
+    """
+    rng = random.Random(seed)
+    mercadorias, dias = _espaco(importacao + exportacao)
+    partes = _html_inicio("Navios esperados - Porto de Santos")
+    for texto in SANTOS_ANTES:
+        partes.append(f"  <table>\n    <tbody>\n        <tr><td>{texto}</td></tr>\n")
+        partes.append("    </tbody>\n  </table>\n")
+
+    for titulo, operacao, linhas in (
+        ("Descarga", "DESC", importacao),
+        ("Embarque", "EMB", exportacao),
+    ):
+        partes.append(f"  <h3>{titulo}</h3>\n  <table>\n")
+        partes.append(_thead(SANTOS_HEADER))
+        partes.append("    <tbody>\n")
+        for i in range(linhas):
+            eta = ETA_INICIO + timedelta(days=rng.randrange(dias))
+            cells = [
+                f"NAVIO {i + 1}",
+                rng.choice(BANDEIRAS),
+                str(rng.randrange(150, 300)),
+                "LC",
+                f"{eta:%d/%m/%Y} {rng.randrange(24):02d}:00:00",
+                "ATRACADO" if rng.random() < 0.3 else "",
+                f"AGENCIA {i % 20}",
+                operacao,
+                rng.choice(mercadorias),
+                _peso(rng),
+                f"{240 + i % 100}S",
+                f"TERMINAL {i % 8 + 1}",
+            ]
+            linha = "".join(f"<td>{cell}</td>" for cell in cells)
+            partes.append(f"        <tr>{linha}</tr>\n")
+        partes.append("    </tbody>\n  </table>\n")
+
+    partes.append("  <table>\n    <tbody>\n        <tr><td>Rodapé</td></tr>\n")
+    partes.append("    </tbody>\n  </table>\n</body>\n</html>\n")
+    return "".join(partes).encode("utf-8")
+
+
+def _espaco(linhas):
+    """
+    Mercadorias e quantidade de dias de ETA para a quantidade de linhas.
+
+    As duas dimensões crescem na mesma proporção a partir de MERCADORIAS e
+    ETA_DIAS, até que haja ao menos uma chave (mercadoria, eta) para cada
+    LINHAS_POR_CHAVE linhas.
+
+    Retorna:
+    Tupla (lista de mercadorias, quantidade de dias).
+    """
+    chaves = len(MERCADORIAS) * ETA_DIAS
+    fator = max(math.ceil(math.sqrt(linhas / LINHAS_POR_CHAVE / chaves)), 1)
+    mercadorias = [
+        nome if lote == 0 else f"{nome} {lote + 1}"
+        for lote in range(fator)
+        for nome in MERCADORIAS
+    ]
+    return mercadorias, ETA_DIAS * fator
+
+
+def _html_inicio(titulo):
+    return [
+        '<!DOCTYPE html>\n<html lang="pt-br">\n<head>\n  <meta charset="utf-8">\n',
+        f"  <title>{titulo}</title>\n</head>\n<body>\n",
+    ]
+
+
+def _thead(header):
+    colunas = "".join(f"<th>{nome}</th>" for nome in header)
+    return f"    <thead><tr>{colunas}</tr></thead>\n"
+
+
+def _paranagua_auxiliar(titulo):
+    # Tabela de outra situação dos navios, ignorada pelo parser
+    return (
+        f"  <h3>{titulo}</h3>\n  {PARANAGUA_TABLE}\n"
+        "    <thead><tr><th>Embarcação</th></tr></thead>\n"
+        "    <tbody>\n        <tr><td>Embarcação 1</td></tr>\n    </tbody>\n"
+        "  </table>\n"
+    )
+
+
+def _peso(rng):
+    # Peso em toneladas com separador de milhar, como nas páginas reais
+    return f"{rng.randrange(1, 90) * 1000:,}".replace(",", ".")
@@ -0,0 +1,156 @@
+import os
+import gzip
+import logging
+import tempfile
+from typing import NamedTuple
+from .config import RAW_DIR
+from . import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Nível de compressão do gzip: bom equilíbrio entre tamanho e tempo de gravação
+COMPRESS_LEVEL = 6
+
+
+class RawPage(NamedTuple):
+    """Página bruta guardada para um snapshot de coleta."""
+
+    porto: str
+    snapshot: str
+    content_hash: str
+    bytes: int
+
+
+def page_path(porto, content_hash, root=RAW_DIR):
+    """Retorna o caminho da página no arquivo bruto, endereçado pelo hash do conteúdo."""
+    return os.path.join(root, porto.lower(), content_hash[:2], f"{content_hash}.html.gz")
+
+
+class PageWriter:
+    """
+    Grava uma página no arquivo bruto à medida que é lida.
+
+    O conteúdo é comprimido em um arquivo temporário e movido para o caminho
+    endereçado pelo hash em commit(); páginas já guardadas não são gravadas
+    de novo. Usado como context manager, descarta o arquivo temporário se
+    commit() não for chamado.
+    """
+
+    def __init__(self, porto, root=RAW_DIR):
+        self.porto = porto
+        self.root = root
+        self.bytes = 0
+        os.makedirs(root, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=root, suffix=".tmp")
+        self._raw = os.fdopen(fd, "wb")
+        # mtime fixo: o mesmo conteúdo gera sempre o mesmo arquivo comprimido
+        self._file = gzip.GzipFile(
+            fileobj=self._raw, mode="wb", compresslevel=COMPRESS_LEVEL, mtime=0
+        )
+        self._done = False
+
+    def write(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        self._file.write(chunk)
+        self.bytes += len(chunk)
+
+    def commit(self, content_hash):
+        """
+        Conclui a gravação da página com o hash do conteúdo escrito.
+
+        Retorna:
+        O caminho da página no arquivo bruto.
+        """
+        self._close()
+        path = page_path(self.porto, content_hash, self.root)
+        if os.path.exists(path):
+            os.remove(self._tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp_path, path)
+        self._done = True
+        return path
+
+    def discard(self):
+        """Descarta o conteúdo escrito."""
+        if not self._done:
+            self._close()
+            os.remove(self._tmp_path)
+            self._done = True
+
+    def _close(self):
+        self._file.close()
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.discard()
+
+
+def store(porto, content, content_hash=None, root=RAW_DIR):
+    """
+    Guarda uma página completa no arquivo bruto.
+
+    Parâmetros:
+    - porto: Porto da página.
+    - content: Conteúdo da página (bytes ou str, gravado em UTF-8).
+    - content_hash: Hash SHA-256 do conteúdo, se já calculado.
+    - root: Diretório raiz do arquivo bruto.
+
+    Retorna:
+    Tupla (hash do conteúdo, tamanho do conteúdo em bytes).
+    """
+    if content_hash is None:
+        content_hash = fingerprint.content_hash(content)
+    with PageWriter(porto, root) as writer:
+        writer.write(content)
+        writer.commit(content_hash)
+    return content_hash, writer.bytes
+
+
+def load(porto, content_hash, root=RAW_DIR):
+    """Retorna o conteúdo (bytes) de uma página do arquivo bruto."""
+    with gzip.open(page_path(porto, content_hash, root), "rb") as f:
+        return f.read()
+
+
+def record(conn, page):
+    """Registra a página bruta (RawPage) usada por um snapshot de coleta."""
+    with conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO raw_pages (porto, snapshot, content_hash, bytes)
+                VALUES (?, ?, ?, ?)""",
+            page,
+        )
+
+
+def list_pages(conn, portos=None, snapshot_inicio=None, snapshot_fim=None):
+    """
+    Lista as páginas brutas registradas, em ordem de snapshot.
+
+    Parâmetros:
+    - conn: Conexão com o banco de dados do histórico.
+    - portos: Portos a listar (padrão: todos).
+    - snapshot_inicio, snapshot_fim: Intervalo de snapshots (inclusive).
+
+    Retorna:
+    Lista de RawPage.
+    """
+    where, params = [], []
+    if portos:
+        where.append(f"porto IN ({', '.join('?' * len(portos))})")
+        params.extend(portos)
+    if snapshot_inicio is not None:
+        where.append("snapshot >= ?")
+        params.append(snapshot_inicio)
+    if snapshot_fim is not None:
+        where.append("snapshot <= ?")
+        params.append(snapshot_fim)
+    sql = "SELECT porto, snapshot, content_hash, bytes FROM raw_pages"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY snapshot, porto"
+    return [RawPage(*row) for row in conn.execute(sql, params)]
@@ -0,0 +1,81 @@
+import threading
+from contextlib import contextmanager
+
+
+class Cancelled(Exception):
+    """A execução do porto foi cancelada por exceder o tempo limite."""
+
+
+class CancelToken:
+    """
+    Cancelamento cooperativo da execução de um porto.
+
+    A thread do porto verifica o token entre as etapas (ver check) e executa a
+    gravação final da coleta em guard(); quem cancela não interrompe uma
+    gravação final em andamento.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._finished = False
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """
+        Solicita o cancelamento.
+
+        Retorna:
+        False se a gravação final já tinha sido concluída (o cancelamento
+        chegou tarde demais), True caso contrário.
+        """
+        with self._lock:
+            if self._finished:
+                return False
+            self._cancelled = True
+            return True
+
+    def check(self):
+        """Lança Cancelled se o cancelamento foi solicitado."""
+        if self._cancelled:
+            raise Cancelled("Execução cancelada por tempo limite")
+
+    @contextmanager
+    def guard(self):
+        """
+        Bloco da gravação final da coleta: só começa se não houver
+        cancelamento e, depois de iniciado, não é cancelado.
+        """
+        with self._lock:
+            self.check()
+            yield
+            self._finished = True
+
+
+_local = threading.local()
+
+
+def bind(token):
+    """Associa o token à thread atual (None remove a associação)."""
+    _local.token = token
+
+
+def check():
+    """Verifica o token da thread atual, se houver (ver CancelToken.check)."""
+    token = getattr(_local, "token", None)
+    if token is not None:
+        token.check()
+
+
+@contextmanager
+def guard():
+    """Executa o bloco em CancelToken.guard() do token da thread atual, se houver."""
+    token = getattr(_local, "token", None)
+    if token is None:
+        yield
+    else:
+        with token.guard():
+            yield
@@ -0,0 +1,90 @@
+import re
+import logging
+from datetime import datetime
+from .config import PARQUET_DIR, TIMEZONE
+from . import normalize
+
+logger = logging.getLogger(__name__)
+
+# Colunas de particionamento do dataset (hive: porto=.../sentido=.../eta_mes=...)
+PARTITION_COLUMNS = ["porto", "sentido", "eta_mes"]
+
+
+def write_parquet(records, snapshot, root=PARQUET_DIR):
+    """
+    Grava os registros de um snapshot no dataset Parquet particionado.
+
+    Os pesos com a mesma chave (porto, sentido, mercadoria, eta, unidade) são
+    somados, como no banco de dados do histórico. As colunas são tipadas:
+    eta como date32, peso como int64 (na unidade canônica) e snapshot como
+    timestamp. Cada snapshot
+    grava arquivos próprios em cada partição, sem reescrever os anteriores.
+
+    Parâmetros:
+    - records: Registros normalizados por core.normalize.normalize, ou
+      ShipmentBatch/registros de line-up ainda não normalizados.
+    - snapshot: Identificador do snapshot de coleta (ISO 8601).
+    - root: Diretório raiz do dataset.
+
+    Retorna:
+    O diretório raiz do dataset, ou None se o pyarrow não estiver instalado
+    ou não houver registros.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+    except ImportError:
+        logger.warning("pyarrow não instalado, dataset Parquet não gravado")
+        return None
+
+    df = normalize.frame(records)
+    if df.empty:
+        return None
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.set_column(
+        table.schema.get_field_index("eta"), "eta", pc.cast(table["eta"], pa.date32())
+    )
+    keys = ["porto", "sentido", "mercadoria", "eta", "unidade_Peso"]
+    table = table.group_by(keys).aggregate([("peso", "sum")])
+    table = table.rename_columns(
+        ["peso" if name == "peso_sum" else name for name in table.column_names]
+    )
+
+    snapshot_dt = datetime.fromisoformat(snapshot)
+    table = table.append_column(
+        "eta_mes", pc.strftime(table["eta"], "%Y-%m")
+    ).append_column(
+        "snapshot",
+        pa.array([snapshot_dt] * table.num_rows, pa.timestamp("s", tz=TIMEZONE)),
+    )
+
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=PARTITION_COLUMNS,
+        partitioning_flavor="hive",
+        basename_template=f"snapshot-{re.sub(r'[^0-9]', '', snapshot)}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    logger.info(f"{table.num_rows} linhas gravadas no dataset Parquet: {root}")
+    return root
+
+
+def read_parquet(root=PARQUET_DIR, filter=None):
+    """
+    Lê o dataset Parquet como uma tabela Arrow.
+
+    Parâmetros:
+    - root: Diretório raiz do dataset.
+    - filter: Expressão pyarrow.dataset opcional, aplicada com poda de partições.
+
+    Retorna:
+    Uma pyarrow.Table.
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(root, format="parquet", partitioning="hive")
+    return dataset.to_table(filter=filter)
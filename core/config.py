@@ -0,0 +1,63 @@
+import os
+
+# Banco de dados único com o histórico de todos os portos
+WAREHOUSE_DIR = "data"
+WAREHOUSE_PATH = os.path.join(WAREHOUSE_DIR, "warehouse.db")
+
+# Fuso horário usado nos snapshots de coleta
+TIMEZONE = "America/Sao_Paulo"
+
+# Cliente HTTP: tempo limite (conexão, leitura) em segundos e novas tentativas
+HTTP_TIMEOUT = (10, 60)
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 1.0
+HTTP_BACKOFF_MAX = 30.0
+HTTP_POOL_SIZE = 10
+
+# Limites por host: requisições simultâneas e requisições por segundo (0 para
+# não limitar a taxa), respeitados por todas as threads do processo
+HTTP_HOST_CONCURRENCY = 4
+HTTP_HOST_RATE = 2.0
+
+# Tamanho dos blocos lidos nos downloads em streaming, em bytes
+HTTP_CHUNK_SIZE = 16 * 1024
+
+# Cache em disco das respostas HTTP (requisições condicionais com ETag/Last-Modified)
+HTTP_CACHE_DIR = os.path.join(WAREHOUSE_DIR, "http_cache")
+
+# Arquivo bruto das páginas coletadas (gzip, endereçado pelo hash do conteúdo)
+RAW_DIR = os.path.join(WAREHOUSE_DIR, "raw")
+
+# Exportações CSV gravadas a cada execução (ex.: CSV_EXPORTS=combined,porto,sentido):
+# combined (CSV combinado dos portos), porto (CSV de cada porto) e sentido (CSV de
+# cada porto e sentido). Os mesmos dados ficam sempre disponíveis nas views do
+# banco de dados, consultadas com query.py
+CSV_EXPORTS = {
+    export.strip()
+    for export in os.environ.get("CSV_EXPORTS", "combined").split(",")
+    if export.strip()
+}
+
+# Dataset Parquet particionado por porto, sentido e mês da ETA
+PARQUET_DIR = os.path.join(WAREHOUSE_DIR, "parquet")
+
+# Métricas por etapa: histórico em JSON lines e arquivo texto do Prometheus
+# (para o textfile collector do node_exporter)
+METRICS_DIR = os.path.join(WAREHOUSE_DIR, "metrics")
+METRICS_JSONL_PATH = os.path.join(METRICS_DIR, "stages.jsonl")
+METRICS_PROM_PATH = os.path.join(METRICS_DIR, "lineup.prom")
+
+# Etapas executadas sob o cProfile (ex.: PROFILE_STAGES=parse,extract), com os
+# perfis gravados em METRICS_DIR/profiles
+PROFILE_STAGES = {
+    stage.strip()
+    for stage in os.environ.get("PROFILE_STAGES", "").split(",")
+    if stage.strip()
+}
+
+# API HTTP local de leitura do volume diário (api.py): endereço, quantidade de
+# respostas mantidas no cache e validade de cada resposta, em segundos
+API_HOST = "127.0.0.1"
+API_PORT = 8080
+API_CACHE_SIZE = 256
+API_CACHE_TTL = 300
@@ -0,0 +1,145 @@
+import logging
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tipos de alteração registrados em lineup_changes. O line-up é gravado em
+# totais por dia (sentido, mercadoria, unidade e eta), sem a identificação dos
+# navios, de modo que as alterações descrevem esses totais, não os navios
+DIA_NOVO = "dia_novo"  # total de um dia que não existia no snapshot anterior
+DIA_REMOVIDO = "dia_removido"  # total de um dia que deixou de existir
+PESO_REVISADO = "peso_revisado"  # total de um dia com outro peso
+DIA_DESLOCADO = "dia_deslocado"  # total que passou inteiro para outro dia
+
+# Tipos gravados por versões anteriores do histórico (ver warehouse._migrate)
+LEGACY_KINDS = {
+    "novo": DIA_NOVO,
+    "removido": DIA_REMOVIDO,
+    "eta_alterada": DIA_DESLOCADO,
+}
+
+INSERT_CHANGE = """
+INSERT INTO lineup_changes
+    (porto, snapshot, snapshot_anterior, tipo, sentido, mercadoria,
+     unidade_Peso, eta_anterior, eta, peso_anterior, peso)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class Change(NamedTuple):
+    """Alteração do total de um dia do line-up entre dois snapshots de um porto."""
+
+    tipo: str
+    sentido: str
+    mercadoria: str
+    unidade_Peso: str
+    eta_anterior: Optional[str]
+    eta: Optional[str]
+    peso_anterior: Optional[int]
+    peso: Optional[int]
+
+
+def diff_rows(anteriores, atuais):
+    """
+    Compara os totais diários de dois snapshots e retorna as alterações.
+
+    As linhas são totais por (sentido, mercadoria, unidade_Peso, eta), e não
+    navios: um navio que chega a um dia com outras cargas da mesma mercadoria
+    altera o peso do dia (PESO_REVISADO), e não gera um DIA_NOVO. O custo é
+    linear no número de linhas. Um dia removido e um dia novo com o mesmo
+    sentido, mercadoria, unidade e exatamente o mesmo peso são registrados
+    como um único DIA_DESLOCADO; se o peso também mudou, ficam um
+    DIA_REMOVIDO e um DIA_NOVO.
+
+    Parâmetros:
+    - anteriores: Dicionário {(sentido, mercadoria, unidade_Peso, eta): peso}
+      do snapshot anterior.
+    - atuais: Dicionário no mesmo formato, do snapshot atual.
+
+    Retorna:
+    Lista de Change.
+    """
+    changes = []
+    novos = {}
+    for key, peso in atuais.items():
+        peso_anterior = anteriores.get(key)
+        if peso_anterior is None:
+            novos.setdefault((*key[:3], peso), []).append(key[3])
+        elif peso_anterior != peso:
+            changes.append(
+                Change(PESO_REVISADO, *key, key[3], peso_anterior, peso)
+            )
+
+    for key, peso_anterior in anteriores.items():
+        if key in atuais:
+            continue
+        etas = novos.get((*key[:3], peso_anterior))
+        if etas:
+            eta = etas.pop(0)
+            changes.append(
+                Change(DIA_DESLOCADO, *key, eta, peso_anterior, peso_anterior)
+            )
+        else:
+            changes.append(
+                Change(DIA_REMOVIDO, *key, None, peso_anterior, None)
+            )
+
+    for (sentido, mercadoria, unidade, peso), etas in novos.items():
+        for eta in etas:
+            changes.append(
+                Change(DIA_NOVO, sentido, mercadoria, unidade, None, eta, None, peso)
+            )
+    return changes
+
+
+def previous_snapshot(conn, porto, snapshot):
+    """Retorna o snapshot do porto imediatamente anterior ao informado, ou None."""
+    return conn.execute(
+        "SELECT MAX(snapshot) FROM lineup WHERE porto = ? AND snapshot < ?",
+        (porto, snapshot),
+    ).fetchone()[0]
+
+
+def load_rows(conn, porto, snapshot):
+    """Retorna {(sentido, mercadoria, unidade_Peso, eta): peso} de um snapshot."""
+    cursor = conn.execute(
+        """SELECT sentido, mercadoria, unidade_Peso, eta, peso
+            FROM lineup WHERE porto = ? AND snapshot = ?""",
+        (porto, snapshot),
+    )
+    return {row[:4]: row[4] for row in cursor}
+
+
+def record_changes(conn, porto, snapshot):
+    """
+    Registra em lineup_changes as alterações do snapshot em relação ao anterior.
+
+    O primeiro snapshot de um porto não gera alterações. Registrar novamente
+    o mesmo snapshot substitui as alterações gravadas anteriormente.
+
+    Parâmetros:
+    - conn: Conexão com o banco de dados do histórico.
+    - porto: Porto do snapshot.
+    - snapshot: Identificador do snapshot já gravado em lineup.
+
+    Retorna:
+    Lista de Change gravadas.
+    """
+    anterior = previous_snapshot(conn, porto, snapshot)
+    if anterior is None:
+        logger.info(f"Primeiro snapshot de {porto}, nenhuma alteração registrada")
+        return []
+
+    changes = diff_rows(
+        load_rows(conn, porto, anterior), load_rows(conn, porto, snapshot)
+    )
+    with conn:
+        conn.execute(
+            "DELETE FROM lineup_changes WHERE porto = ? AND snapshot = ?",
+            (porto, snapshot),
+        )
+        conn.executemany(
+            INSERT_CHANGE, [(porto, snapshot, anterior, *change) for change in changes]
+        )
+    logger.info(f"{len(changes)} alterações em {porto} desde o snapshot {anterior}")
+    return changes
@@ -0,0 +1,60 @@
+import hashlib
+from typing import NamedTuple, Optional
+from .warehouse import new_snapshot
+
+
+class Fingerprint(NamedTuple):
+    """Hashes da última coleta processada de um porto."""
+
+    content_hash: Optional[str]
+    rows_hash: Optional[str]
+
+
+def content_hash(content):
+    """Retorna o hash SHA-256 do conteúdo bruto da página."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    digest = content_digest()
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def content_digest():
+    """Retorna o objeto hashlib usado em content_hash, para conteúdo lido em blocos."""
+    return hashlib.sha256()
+
+
+def rows_hash(records):
+    """
+    Retorna o hash SHA-256 do conjunto normalizado de registros.
+
+    Os registros são ordenados antes do cálculo, de modo que a ordem das
+    linhas na página não altera o hash.
+    """
+    digest = hashlib.sha256()
+    for line in sorted("\t".join(map(str, record)) for record in records):
+        digest.update(line.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def load(conn, porto):
+    """Retorna o Fingerprint da última coleta processada do porto."""
+    row = conn.execute(
+        "SELECT content_hash, rows_hash FROM fingerprints WHERE porto = ?", (porto,)
+    ).fetchone()
+    return Fingerprint(*row) if row else Fingerprint(None, None)
+
+
+def save(conn, porto, fingerprint):
+    """Registra o Fingerprint da coleta processada do porto."""
+    with conn:
+        conn.execute(
+            """INSERT INTO fingerprints (porto, content_hash, rows_hash, updated_On)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (porto) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    rows_hash = excluded.rows_hash,
+                    updated_On = excluded.updated_On""",
+            (porto, fingerprint.content_hash, fingerprint.rows_hash, new_snapshot()),
+        )
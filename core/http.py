@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from .config import (
+    HTTP_TIMEOUT,
+    HTTP_RETRIES,
+    HTTP_BACKOFF,
+    HTTP_BACKOFF_MAX,
+    HTTP_POOL_SIZE,
+    HTTP_HOST_CONCURRENCY,
+    HTTP_HOST_RATE,
+    HTTP_CACHE_DIR,
+    HTTP_CHUNK_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Status que justificam uma nova tentativa
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Retorna a sessão HTTP compartilhada, criando-a na primeira chamada.
+
+    A sessão mantém um pool de conexões keep-alive por host, reaproveitado
+    por todos os scrapers do processo.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def close_session():
+    """Fecha a sessão HTTP compartilhada e suas conexões."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+class HostLimiter:
+    """
+    Limita as requisições simultâneas e a taxa de requisições por host.
+
+    Cada host tem um semáforo com `concurrency` vagas; o início das
+    requisições ao mesmo host é espaçado em pelo menos 1/rate segundos.
+    """
+
+    def __init__(self, concurrency=HTTP_HOST_CONCURRENCY, rate=HTTP_HOST_RATE):
+        self.concurrency = concurrency
+        self.interval = 1.0 / rate if rate else 0.0
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url):
+        """Aguarda uma vaga e a vez do host da URL e a mantém durante o bloco."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                # [semáforo do host, próximo início permitido]
+                state = [threading.BoundedSemaphore(self.concurrency), 0.0]
+                self._hosts[host] = state
+        with state[0]:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, state[1])
+                state[1] = start + self.interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+_limiter = HostLimiter()
+
+
+def set_limiter(limiter):
+    """
+    Substitui o HostLimiter usado por todas as requisições do processo.
+
+    Retorna:
+    O HostLimiter anterior, para que quem chamou possa restaurá-lo.
+    """
+    global _limiter
+    anterior, _limiter = _limiter, limiter
+    return anterior
+
+
+class HttpCache:
+    """
+    Cache em disco de respostas HTTP indexado pela URL.
+
+    Cada entrada guarda o corpo da resposta e os cabeçalhos ETag e
+    Last-Modified, usados para montar requisições condicionais.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".body", base + ".json"
+
+    def conditional_headers(self, url):
+        """Retorna os cabeçalhos If-None-Match/If-Modified-Since da entrada da URL."""
+        meta = self._load_meta(url)
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def get(self, url):
+        """Retorna o corpo em cache da URL ou None."""
+        body_path, _ = self._paths(url)
+        try:
+            with open(body_path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, url, response):
+        """Grava a resposta no cache se ela puder ser revalidada."""
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        if not (meta["etag"] or meta["last_modified"]):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        body_path, meta_path = self._paths(url)
+        _write_atomic(body_path, response.content)
+        _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _load_meta(self, url):
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "rb") as f:
+                return json.loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+
+def _write_atomic(path, content):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+_default_cache = HttpCache()
+
+
+def fetch(
+    url,
+    headers=None,
+    timeout=HTTP_TIMEOUT,
+    retries=HTTP_RETRIES,
+    cache=_default_cache,
+):
+    """
+    Busca uma URL com a sessão compartilhada e retorna o conteúdo da resposta.
+
+    Falhas de conexão, tempo limite e status transitórios (429/5xx) são
+    repetidos com backoff exponencial e jitter (ver _request). Com cache, a
+    requisição é condicional e uma resposta 304 devolve o corpo guardado em disco;
+    se o corpo não estiver mais no cache, a URL é buscada novamente sem os
+    cabeçalhos condicionais.
+
+    Parâmetros:
+    - url: URL a ser buscada.
+    - headers: Cabeçalhos adicionais da requisição.
+    - timeout: Tempo limite (conexão, leitura) em segundos.
+    - retries: Número de novas tentativas após a primeira.
+    - cache: HttpCache usado nas requisições condicionais, ou None.
+
+    Retorna:
+    Conteúdo da resposta em bytes.
+
+    Lança:
+    requests.RequestException se todas as tentativas falharem ou se o servidor
+    responder 304 também à requisição sem cabeçalhos condicionais.
+    """
+    request_headers = dict(headers or {})
+    if cache is not None and cache.get(url) is not None:
+        request_headers.update(cache.conditional_headers(url))
+
+    response = _request(url, request_headers, timeout, retries)
+    if response.status_code == 304:
+        cached = cache.get(url) if cache is not None else None
+        if cached is not None:
+            logger.info(f"Conteúdo não modificado, usando o cache: {url}")
+            return cached
+        # A entrada do cache sumiu (ou o servidor respondeu 304 sem requisição
+        # condicional): repete uma vez sem os cabeçalhos condicionais
+        logger.warning(f"Resposta 304 sem corpo em cache, nova requisição: {url}")
+        response.close()
+        response = _request(url, dict(headers or {}), timeout, retries)
+        if response.status_code == 304:
+            raise requests.HTTPError(
+                f"Resposta 304 sem corpo em cache para {url}", response=response
+            )
+    response.raise_for_status()
+    if cache is not None:
+        cache.put(url, response)
+    return response.content
+
+
+def stream(
+    url,
+    headers=None,
+    timeout=HTTP_TIMEOUT,
+    retries=HTTP_RETRIES,
+    chunk_size=HTTP_CHUNK_SIZE,
+):
+    """
+    Busca uma URL e retorna o corpo da resposta em blocos, à medida que chegam.
+
+    As novas tentativas valem apenas para o início da requisição. Encerrar o
+    gerador antes do fim (por exemplo, com close()) interrompe o download e
+    libera a conexão. Não usa o cache em disco, já que o corpo pode não ser
+    lido por inteiro.
+
+    Parâmetros:
+    - url: URL a ser buscada.
+    - headers: Cabeçalhos adicionais da requisição.
+    - timeout: Tempo limite (conexão, leitura) em segundos.
+    - retries: Número de novas tentativas após a primeira.
+    - chunk_size: Tamanho máximo, em bytes, de cada bloco.
+
+    Retorna:
+    Gerador de blocos em bytes.
+
+    Lança:
+    requests.RequestException se todas as tentativas falharem.
+    """
+    response = _request(url, dict(headers or {}), timeout, retries, stream=True)
+    try:
+        response.raise_for_status()
+        yield from response.iter_content(chunk_size=chunk_size)
+    finally:
+        response.close()
+
+
+def _request(url, headers, timeout, retries, stream=False):
+    """
+    Faz o GET com a sessão compartilhada, repetindo as falhas transitórias.
+
+    Falhas de conexão, tempo limite e status transitórios (429/5xx) são
+    repetidos com backoff exponencial e jitter. Cada tentativa respeita os
+    limites de concorrência e de taxa do host (ver HostLimiter). Retorna a
+    última resposta, cujo status deve ser verificado por quem chamou.
+    """
+    for attempt in range(retries + 1):
+        try:
+            with _limiter.slot(url):
+                response = get_session().get(
+                    url, headers=headers, timeout=timeout, stream=stream
+                )
+            if response.status_code in RETRY_STATUS and attempt < retries:
+                response.close()
+                raise requests.HTTPError(
+                    f"Status {response.status_code}", response=response
+                )
+            return response
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            status = getattr(e.response, "status_code", None)
+            if attempt >= retries or (status is not None and status not in RETRY_STATUS):
+                raise
+            delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF * 2**attempt))
+            logger.warning(
+                f"Falha ao acessar {url} ({e}), nova tentativa em {delay:.1f}s"
+            )
+            time.sleep(delay)
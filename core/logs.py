@@ -0,0 +1,33 @@
+import os
+import logging
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+def setup_logging(log_file=None, logger_name=None, level=logging.INFO):
+    """
+    Configura o logging na saída padrão e, opcionalmente, em um arquivo.
+
+    Deve ser chamada pelos pontos de entrada (CLI, main dos portos), nunca na
+    importação dos módulos. Chamadas repetidas não duplicam os handlers.
+
+    Parâmetros:
+    - log_file: Caminho do arquivo de log; o diretório é criado se necessário.
+    - logger_name: Logger que grava no arquivo (por exemplo, o pacote do porto).
+      Se None, o arquivo recebe as mensagens de todos os módulos.
+    - level: Nível mínimo das mensagens.
+    """
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+    if log_file is None:
+        return
+
+    logger = logging.getLogger(logger_name)
+    path = os.path.abspath(log_file)
+    for handler in logger.handlers:
+        if isinstance(handler, logging.FileHandler) and handler.baseFilename == path:
+            return
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.addHandler(handler)
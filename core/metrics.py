@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import logging
+import cProfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pytz
+from .config import (
+    METRICS_DIR,
+    METRICS_JSONL_PATH,
+    METRICS_PROM_PATH,
+    PROFILE_STAGES,
+    TIMEZONE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Métricas do arquivo do Prometheus: (nome, atributo, descrição)
+PROM_METRICS = [
+    ("lineup_stage_duration_seconds", "duration", "Duração da etapa em segundos"),
+    ("lineup_stage_bytes", "bytes", "Bytes processados pela etapa"),
+    ("lineup_stage_rows", "rows", "Linhas produzidas pela etapa"),
+    ("lineup_stage_rows_per_second", "rows_per_sec", "Linhas por segundo da etapa"),
+    ("lineup_stage_success", "ok", "1 se a etapa terminou sem erro"),
+    ("lineup_stage_timestamp_seconds", "end_time", "Fim da etapa (epoch)"),
+]
+
+_lock = threading.Lock()
+_stages = []
+
+
+class StageMetric:
+    """
+    Medição de uma execução de etapa do pipeline.
+
+    bytes e rows podem ser preenchidos pela etapa durante a execução; a
+    duração e o status são registrados ao final por stage().
+    """
+
+    __slots__ = [
+        "porto",
+        "stage",
+        "sentido",
+        "bytes",
+        "rows",
+        "duration",
+        "ok",
+        "end_time",
+    ]
+
+    def __init__(self, porto, stage, sentido=None, bytes=None, rows=None):
+        self.porto = porto
+        self.stage = stage
+        self.sentido = sentido
+        self.bytes = bytes
+        self.rows = rows
+        self.duration = None
+        self.ok = True
+        self.end_time = None
+
+    @property
+    def rows_per_sec(self):
+        if self.rows is None or not self.duration:
+            return None
+        return self.rows / self.duration
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["rows_per_sec"] = self.rows_per_sec
+        data["end_time"] = datetime.fromtimestamp(
+            self.end_time, pytz.timezone(TIMEZONE)
+        ).isoformat(timespec="seconds")
+        return data
+
+
+@contextmanager
+def stage(porto, name, sentido=None, bytes=None, rows=None):
+    """
+    Mede a duração de uma etapa do pipeline.
+
+    Uso:
+        with metrics.stage("Santos", "extract", sentido) as m:
+            ...
+            m.rows = len(registros)
+
+    Quando o nome da etapa está em PROFILE_STAGES, a etapa é executada sob o
+    cProfile e o perfil é gravado em METRICS_DIR/profiles.
+
+    Parâmetros:
+    - porto: Porto da etapa (ou None para etapas dos dois portos).
+    - name: Nome da etapa (fetch, parse, extract, aggregate, persist_*, combine).
+    - sentido: Sentido dos dados, quando a etapa é feita por sentido.
+    - bytes, rows: Valores iniciais de bytes e linhas processados.
+    """
+    metric = StageMetric(porto, name, sentido, bytes, rows)
+    profiler = _start_profiler(name)
+    start = time.perf_counter()
+    try:
+        yield metric
+    except BaseException:
+        metric.ok = False
+        raise
+    finally:
+        metric.duration = time.perf_counter() - start
+        metric.end_time = time.time()
+        if profiler is not None:
+            _save_profile(profiler, metric)
+        with _lock:
+            _stages.append(metric)
+
+
+def collected():
+    """Retorna as medições registradas desde o último reset()."""
+    with _lock:
+        return list(_stages)
+
+
+def reset():
+    """Descarta as medições registradas."""
+    with _lock:
+        _stages.clear()
+
+
+def export(jsonl_path=METRICS_JSONL_PATH, prom_path=METRICS_PROM_PATH):
+    """
+    Exporta as medições registradas e as descarta.
+
+    As medições são acrescentadas ao arquivo JSON lines, e o arquivo texto do
+    Prometheus é atualizado com o valor mais recente de cada etapa.
+
+    Retorna:
+    Quantidade de medições exportadas.
+    """
+    with _lock:
+        stages = list(_stages)
+        _stages.clear()
+    if not stages:
+        return 0
+    write_jsonl(stages, jsonl_path)
+    write_prometheus(stages, prom_path)
+    return len(stages)
+
+
+def write_jsonl(stages, path=METRICS_JSONL_PATH):
+    """Acrescenta as medições ao arquivo, uma por linha em JSON."""
+    _makedirs(path)
+    with open(path, "a", encoding="utf-8") as f:
+        for metric in stages:
+            f.write(json.dumps(metric.as_dict(), ensure_ascii=False))
+            f.write("\n")
+
+
+def write_prometheus(stages, path=METRICS_PROM_PATH):
+    """
+    Grava as medições no formato texto do Prometheus.
+
+    As medições são combinadas com as séries já gravadas no arquivo: cada
+    combinação de rótulos (porto, etapa, sentido) medida agora tem suas
+    séries substituídas, e as demais mantêm o último valor conhecido, de modo
+    que um porto coletado em intervalos maiores não some do arquivo entre as
+    suas coletas. O arquivo é escrito em um temporário e renomeado, para que o
+    coletor nunca leia um arquivo incompleto.
+    """
+    # Séries já gravadas: {rótulos: {métrica: valor}}
+    series = _read_prometheus(path)
+
+    # Apenas a medição mais recente de cada combinação de rótulos
+    latest = {}
+    for metric in stages:
+        latest[(metric.porto, metric.stage, metric.sentido)] = metric
+    for (porto, stage_name, sentido), metric in latest.items():
+        labels = f'porto="{porto or ""}",stage="{stage_name}",sentido="{sentido or ""}"'
+        series[labels] = {
+            name: float(getattr(metric, attr))
+            for name, attr, _ in PROM_METRICS
+            if getattr(metric, attr) is not None
+        }
+
+    lines = []
+    for name, _, description in PROM_METRICS:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, values in series.items():
+            if name in values:
+                lines.append(f"{name}{{{labels}}} {values[name]}")
+
+    _makedirs(path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def _read_prometheus(path):
+    # Lê as séries gravadas por write_prometheus; linhas inválidas são ignoradas
+    series = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                nome, _, resto = line.partition("{")
+                labels, _, valor = resto.rpartition("} ")
+                try:
+                    series.setdefault(labels, {})[nome] = float(valor)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return series
+
+
+def _start_profiler(name):
+    if name not in PROFILE_STAGES:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Outro perfilador já ativo (por exemplo, outra etapa em paralelo)
+        logger.warning(f"cProfile não iniciado para a etapa {name}: {e}")
+        return None
+    return profiler
+
+
+def _save_profile(profiler, metric):
+    profiler.disable()
+    stamp = datetime.fromtimestamp(metric.end_time).strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(
+        METRICS_DIR,
+        "profiles",
+        f"{metric.porto or 'todos'}_{metric.stage}_{stamp}.prof",
+    )
+    _makedirs(path)
+    profiler.dump_stats(path)
+    logger.info(f"Perfil da etapa {metric.stage} gravado em {path}")
+
+
+def _makedirs(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
@@ -0,0 +1,73 @@
+import logging
+from .records import COLUMNS, ShipmentBatch
+
+logger = logging.getLogger(__name__)
+
+# Unidade em que os pesos são armazenados e agregados
+CANONICAL_UNIT = "t"
+
+# Fator de conversão para a unidade canônica de cada unidade informada pelos
+# portos (chave em minúsculas, sem espaços nas pontas). Unidades fora da
+# tabela, como volumes, são mantidas sem conversão.
+UNIT_FACTORS = {
+    "t": 1,
+    "ton": 1,
+    "tons": 1,
+    "tonelada": 1,
+    "toneladas": 1,
+    "kg": 0.001,
+}
+
+# Formato da eta nas páginas dos portos e nos arquivos CSV
+ETA_FORMAT = "%d/%m/%Y"
+
+
+def normalize(records):
+    """
+    Converte os registros de line-up em um DataFrame com tipos nativos.
+
+    A eta passa a datetime64 e o peso a int64 na unidade canônica, com a
+    conversão feita de uma vez para cada coluna.
+
+    Parâmetros:
+    - records: ShipmentBatch ou registros de line-up, com a eta no formato
+      dd/mm/YYYY e o peso na unidade informada pelo porto.
+
+    Retorna:
+    DataFrame com as colunas em core.records.COLUMNS.
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = ShipmentBatch.from_records(records).to_frame()
+    df["eta"] = pd.to_datetime(df["eta"], format=ETA_FORMAT)
+
+    unidades = df["unidade_Peso"]
+    # Fator consultado uma vez por unidade distinta e aplicado à coluna inteira
+    fatores = unidades.map(
+        {unidade: _factor(unidade) for unidade in unidades.unique()}
+    )
+    desconhecidas = fatores.isna()
+    if desconhecidas.any():
+        logger.warning(
+            "Unidades sem conversão para a unidade canônica: "
+            f"{sorted(unidades[desconhecidas].unique())}"
+        )
+    if not (fatores[~desconhecidas] == 1).all():
+        pesos = df["peso"].to_numpy() * fatores.fillna(1).to_numpy()
+        df["peso"] = np.rint(pesos).astype(np.int64)
+    df["unidade_Peso"] = unidades.where(desconhecidas, CANONICAL_UNIT)
+    return df[COLUMNS]
+
+
+def frame(records):
+    """Retorna os registros normalizados, aceitando um DataFrame já normalizado."""
+    import pandas as pd
+
+    if isinstance(records, pd.DataFrame):
+        return records
+    return normalize(records)
+
+
+def _factor(unidade):
+    return UNIT_FACTORS.get(unidade.strip().lower())
@@ -0,0 +1,37 @@
+import logging
+from . import normalize
+
+logger = logging.getLogger(__name__)
+
+# Chave de agregação e ordem das colunas dos dados agregados
+GROUP_COLUMNS = ["porto", "sentido", "eta", "mercadoria", "unidade_Peso"]
+OUTPUT_COLUMNS = ["porto", "sentido", "eta", "mercadoria", "peso", "unidade_Peso"]
+
+
+def aggregate(records):
+    """
+    Soma os pesos por porto, sentido, eta, mercadoria e unidade.
+
+    Parâmetros:
+    - records: Registros normalizados por core.normalize.normalize, ou
+      ShipmentBatch/registros de line-up ainda não normalizados.
+
+    Retorna:
+    DataFrame agregado, ordenado pela eta (datetime64), com as colunas em
+    OUTPUT_COLUMNS e o peso na unidade canônica.
+    """
+    df = normalize.frame(records)
+
+    # junta os dados e soma os pesos
+    df_grouped = df.groupby(GROUP_COLUMNS).agg({"peso": "sum"}).reset_index()
+
+    # Ordena o DataFrame pela eta, mantendo a ordem da chave entre datas iguais
+    df_grouped = df_grouped.sort_values("eta", kind="stable", ignore_index=True)
+
+    # Ordena as colunas no padrão de relevancia
+    return df_grouped[OUTPUT_COLUMNS]
+
+
+def filter_sentido(df_grouped, sentido):
+    """Retorna as linhas agregadas de um sentido, mantendo a ordem pela eta."""
+    return df_grouped[df_grouped["sentido"] == sentido].reset_index(drop=True)
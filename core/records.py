@@ -0,0 +1,105 @@
+import sys
+from array import array
+from typing import NamedTuple
+
+# Ordem das colunas dos registros de line-up
+COLUMNS = ["porto", "sentido", "mercadoria", "eta", "peso", "unidade_Peso"]
+
+
+class Shipment(NamedTuple):
+    """Registro de uma carga prevista no line-up de um porto."""
+
+    porto: str
+    sentido: str
+    mercadoria: str
+    eta: str  # dd/mm/YYYY
+    peso: int
+    unidade_Peso: str
+
+
+class ShipmentBatch:
+    """
+    Lote colunar de registros de line-up.
+
+    Cada coluna é armazenada separadamente: o peso em um array de inteiros de
+    64 bits e as colunas de texto em listas, com porto, sentido, mercadoria e
+    unidade internados para que valores repetidos compartilhem o mesmo objeto.
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(self):
+        self.porto = []
+        self.sentido = []
+        self.mercadoria = []
+        self.eta = []
+        self.peso = array("q")
+        self.unidade_Peso = []
+
+    @classmethod
+    def from_records(cls, records):
+        """Cria um lote a partir de registros (Shipment ou tuplas) ou retorna o próprio lote."""
+        if isinstance(records, cls):
+            return records
+        batch = cls()
+        batch.extend(records)
+        return batch
+
+    @classmethod
+    def concat(cls, batches):
+        """Concatena lotes (ou listas de registros) em um novo lote."""
+        result = cls()
+        for batch in batches:
+            batch = cls.from_records(batch)
+            for column in COLUMNS:
+                getattr(result, column).extend(getattr(batch, column))
+        return result
+
+    def append(self, record):
+        """Adiciona um registro (Shipment ou tupla) ao lote."""
+        porto, sentido, mercadoria, eta, peso, unidade_Peso = record
+        self.porto.append(sys.intern(porto))
+        self.sentido.append(sys.intern(sentido))
+        self.mercadoria.append(sys.intern(mercadoria))
+        self.eta.append(eta)
+        self.peso.append(peso)
+        self.unidade_Peso.append(sys.intern(unidade_Peso))
+
+    def extend(self, records):
+        """Adiciona registros (Shipment ou tuplas) ao lote."""
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.peso)
+
+    def __iter__(self):
+        for values in zip(*(getattr(self, column) for column in COLUMNS)):
+            yield Shipment(*values)
+
+    def __getitem__(self, index):
+        return Shipment(*(getattr(self, column)[index] for column in COLUMNS))
+
+    def to_frame(self):
+        """Retorna o lote como DataFrame, construído coluna a coluna."""
+        import numpy as np
+        import pandas as pd
+
+        data = {column: getattr(self, column) for column in COLUMNS}
+        data["peso"] = np.frombuffer(self.peso, dtype=np.int64).copy()
+        return pd.DataFrame(data, columns=COLUMNS)
+
+    def to_arrow(self):
+        """Retorna o lote como pyarrow.Table, com o peso em int64."""
+        import pyarrow as pa
+
+        return pa.table(
+            {
+                "porto": pa.array(self.porto, pa.string()),
+                "sentido": pa.array(self.sentido, pa.string()),
+                "mercadoria": pa.array(self.mercadoria, pa.string()),
+                "eta": pa.array(self.eta, pa.string()),
+                "peso": pa.array(self.peso, pa.int64()),
+                "unidade_Peso": pa.array(self.unidade_Peso, pa.string()),
+            }
+        )
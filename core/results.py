@@ -0,0 +1,8 @@
+from typing import Any, NamedTuple, Optional
+
+
+class RunResult(NamedTuple):
+    """Resultado da execução do scraping de um porto."""
+
+    status: str  # "ok", "unchanged", "failed" ou "timeout"
+    frame: Optional[Any] = None  # DataFrame com os dados agregados da coleta
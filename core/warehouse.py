@@ -0,0 +1,514 @@
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pytz
+from .config import WAREHOUSE_PATH, TIMEZONE
+from . import diff, normalize
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lineup (
+    porto TEXT NOT NULL,
+    sentido TEXT NOT NULL,
+    mercadoria TEXT NOT NULL,
+    eta DATE NOT NULL,
+    unidade_Peso TEXT NOT NULL,
+    peso INTEGER NOT NULL,
+    snapshot TIMESTAMP NOT NULL,
+    PRIMARY KEY (porto, sentido, mercadoria, eta, unidade_Peso, snapshot)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_lineup_snapshot ON lineup (porto, snapshot);
+CREATE INDEX IF NOT EXISTS idx_lineup_eta ON lineup (eta, porto, sentido);
+CREATE INDEX IF NOT EXISTS idx_lineup_mercadoria ON lineup (mercadoria, eta);
+
+-- Volume diário previsto mais recente por porto, sentido, eta, mercadoria e unidade,
+-- mantido incrementalmente a cada carga (snapshot indica a coleta de origem)
+CREATE TABLE IF NOT EXISTS daily_volume (
+    porto TEXT NOT NULL,
+    sentido TEXT NOT NULL,
+    eta DATE NOT NULL,
+    mercadoria TEXT NOT NULL,
+    unidade_Peso TEXT NOT NULL,
+    peso INTEGER NOT NULL,
+    snapshot TIMESTAMP NOT NULL,
+    PRIMARY KEY (porto, sentido, eta, mercadoria, unidade_Peso)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_daily_volume_eta ON daily_volume (eta, porto);
+CREATE INDEX IF NOT EXISTS idx_daily_volume_mercadoria ON daily_volume (mercadoria, eta);
+
+-- Alterações dos totais diários de cada snapshot em relação ao snapshot
+-- anterior do mesmo porto (tipo: dia_novo, dia_removido, peso_revisado ou
+-- dia_deslocado; ver core/diff.py)
+CREATE TABLE IF NOT EXISTS lineup_changes (
+    porto TEXT NOT NULL,
+    snapshot TIMESTAMP NOT NULL,
+    snapshot_anterior TIMESTAMP NOT NULL,
+    tipo TEXT NOT NULL,
+    sentido TEXT NOT NULL,
+    mercadoria TEXT NOT NULL,
+    unidade_Peso TEXT NOT NULL,
+    eta_anterior DATE,
+    eta DATE,
+    peso_anterior INTEGER,
+    peso INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_lineup_changes_snapshot ON lineup_changes (porto, snapshot);
+CREATE INDEX IF NOT EXISTS idx_lineup_changes_mercadoria ON lineup_changes (mercadoria, snapshot);
+
+-- Relatório retroativo de Paranaguá, por janela de datas (ver
+-- paranagua_scraper/scripts/retro.py); fica fora de lineup para não entrar nas
+-- visões combinadas, no volume diário nem no controle de alterações, que
+-- descrevem a evolução das previsões coletadas (snapshot indica a carga)
+CREATE TABLE IF NOT EXISTS retro_lineup (
+    porto TEXT NOT NULL,
+    sentido TEXT NOT NULL,
+    mercadoria TEXT NOT NULL,
+    eta DATE NOT NULL,
+    unidade_Peso TEXT NOT NULL,
+    peso INTEGER NOT NULL,
+    janela_inicio DATE NOT NULL,
+    janela_fim DATE NOT NULL,
+    content_hash TEXT NOT NULL,
+    snapshot TIMESTAMP NOT NULL,
+    PRIMARY KEY (porto, janela_inicio, sentido, mercadoria, eta, unidade_Peso)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_retro_lineup_eta ON retro_lineup (eta, porto, sentido);
+
+-- Página bruta de cada snapshot, guardada em data/raw (ver core/archive.py)
+CREATE TABLE IF NOT EXISTS raw_pages (
+    porto TEXT NOT NULL,
+    snapshot TIMESTAMP NOT NULL,
+    content_hash TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (porto, snapshot)
+) WITHOUT ROWID;
+
+-- Hashes da última coleta processada de cada porto
+CREATE TABLE IF NOT EXISTS fingerprints (
+    porto TEXT PRIMARY KEY,
+    content_hash TEXT,
+    rows_hash TEXT,
+    updated_On TIMESTAMP
+);
+
+-- Dados combinados dos portos no snapshot mais recente de cada um
+CREATE VIEW IF NOT EXISTS combined_data AS
+SELECT lineup.*
+FROM lineup
+JOIN (SELECT porto, MAX(snapshot) AS snapshot FROM lineup GROUP BY porto)
+USING (porto, snapshot);
+
+-- Dados combinados por sentido, derivados de combined_data em vez de gravados
+-- em cópias separadas
+CREATE VIEW IF NOT EXISTS combined_import AS
+SELECT * FROM combined_data WHERE sentido = 'import';
+
+CREATE VIEW IF NOT EXISTS combined_export AS
+SELECT * FROM combined_data WHERE sentido = 'export';
+
+CREATE VIEW IF NOT EXISTS combined_import_export AS
+SELECT * FROM combined_data WHERE sentido = 'import_export';
+"""
+
+UPSERT = """
+INSERT INTO lineup (porto, sentido, mercadoria, eta, unidade_Peso, peso, snapshot)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (porto, sentido, mercadoria, eta, unidade_Peso, snapshot)
+DO UPDATE SET peso = excluded.peso
+"""
+
+INSERT_RETRO = """
+INSERT INTO retro_lineup (porto, sentido, mercadoria, eta, unidade_Peso, peso,
+    janela_inicio, janela_fim, content_hash, snapshot)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Snapshots do porto imediatamente anterior e posterior a um snapshot
+SNAPSHOT_NEIGHBOURS = """
+SELECT
+    (SELECT MAX(snapshot) FROM lineup WHERE porto = :porto AND snapshot < :snapshot),
+    (SELECT MIN(snapshot) FROM lineup WHERE porto = :porto AND snapshot > :snapshot)
+"""
+
+# Remove os dias do porto no horizonte do snapshot, [:inicio, :fim) (limites
+# nulos não restringem)
+DELETE_DAILY_VOLUME = """
+DELETE FROM daily_volume
+WHERE porto = :porto
+  AND (:inicio IS NULL OR eta >= :inicio)
+  AND (:fim IS NULL OR eta < :fim)
+"""
+
+# Insere os totais diários do snapshot para os dias do seu horizonte
+INSERT_DAILY_VOLUME = """
+INSERT OR REPLACE INTO daily_volume
+    (porto, sentido, eta, mercadoria, unidade_Peso, peso, snapshot)
+SELECT porto, sentido, eta, mercadoria, unidade_Peso, SUM(peso), snapshot
+FROM lineup
+WHERE porto = :porto
+  AND snapshot = :snapshot
+  AND (:inicio IS NULL OR eta >= :inicio)
+  AND (:fim IS NULL OR eta < :fim)
+GROUP BY porto, sentido, eta, mercadoria, unidade_Peso
+"""
+
+# Conversão dos pesos de uma unidade para a unidade canônica (ver _migrate_units)
+MIGRATE_LINEUP_UNITS = """
+INSERT INTO lineup (porto, sentido, mercadoria, eta, unidade_Peso, peso, snapshot)
+SELECT porto, sentido, mercadoria, eta, :canonical,
+       CAST(ROUND(SUM(peso) * :fator) AS INTEGER), snapshot
+FROM lineup
+WHERE lower(trim(unidade_Peso)) = :unidade
+GROUP BY porto, sentido, mercadoria, eta, snapshot
+ON CONFLICT (porto, sentido, mercadoria, eta, unidade_Peso, snapshot)
+DO UPDATE SET peso = peso + excluded.peso
+"""
+
+MIGRATE_CHANGES_UNITS = """
+UPDATE lineup_changes
+SET unidade_Peso = :canonical,
+    peso_anterior = CAST(ROUND(peso_anterior * :fator) AS INTEGER),
+    peso = CAST(ROUND(peso * :fator) AS INTEGER)
+WHERE lower(trim(unidade_Peso)) = :unidade
+"""
+
+# Versão do schema registrada em PRAGMA user_version; a versão 1 grava os
+# pesos na unidade canônica (ver core.normalize), a versão 2 mantém em
+# daily_volume apenas a previsão do horizonte de cada snapshot e a versão 3
+# grava em lineup_changes os tipos de alteração dos totais diários
+SCHEMA_VERSION = 3
+
+
+def connect(db_path=WAREHOUSE_PATH, check_same_thread=True):
+    """
+    Abre o banco de dados do histórico, criando o arquivo e o schema se necessário.
+
+    Parâmetros:
+    - db_path: Caminho para o arquivo do banco de dados SQLite.
+    - check_same_thread: Se False, a conexão pode ser usada (uma thread por
+      vez) por threads diferentes da que a criou.
+
+    Retorna:
+    Conexão sqlite3 em modo WAL.
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    # Os portos gravam em paralelo; aguarda o lock de escrita em vez de falhar
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    if versao < SCHEMA_VERSION:
+        _migrate(conn, versao)
+    elif _needs_daily_volume_rebuild(conn):
+        rebuild_daily_volume(conn)
+    return conn
+
+
+class ConnectionPool:
+    """
+    Conexões abertas com o banco de dados do histórico, reaproveitadas entre
+    ciclos de coleta.
+
+    Cada conexão é usada por uma única thread por vez; uma conexão cujo uso
+    terminou com erro é fechada em vez de voltar ao pool.
+    """
+
+    def __init__(self, db_path=WAREHOUSE_PATH):
+        self.db_path = db_path
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = connect(self.db_path, check_same_thread=False)
+        try:
+            yield conn
+        except BaseException:
+            conn.close()
+            raise
+        with self._lock:
+            self._idle.append(conn)
+
+    def close(self):
+        """Fecha as conexões ociosas do pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pool = None
+
+
+def use_pool(enabled=True, db_path=WAREHOUSE_PATH):
+    """
+    Ativa ou desativa o pool de conexões usado por connection().
+
+    Processos de longa duração (como o daemon) ativam o pool para manter as
+    conexões abertas entre os ciclos; desativá-lo fecha as conexões ociosas.
+    """
+    global _pool
+    if _pool is not None:
+        _pool.close()
+    _pool = ConnectionPool(db_path) if enabled else None
+
+
+@contextmanager
+def connection(db_path=WAREHOUSE_PATH):
+    """
+    Fornece uma conexão com o banco de dados do histórico.
+
+    Com o pool ativo (ver use_pool), a conexão é reaproveitada; caso
+    contrário, é aberta e fechada a cada uso.
+    """
+    pool = _pool
+    if pool is not None and pool.db_path == db_path:
+        with pool.connection() as conn:
+            yield conn
+        return
+    conn = connect(db_path)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def new_snapshot():
+    """Retorna o identificador do snapshot de coleta atual (ISO 8601)."""
+    return datetime.now(pytz.timezone(TIMEZONE)).isoformat(timespec="seconds")
+
+
+def upsert_records(conn, records, snapshot, replace=False):
+    """
+    Insere ou atualiza os registros de um snapshot em uma única transação.
+
+    Os pesos de registros com a mesma chave (porto, sentido, mercadoria, eta,
+    unidade) são somados antes da gravação. Gravar novamente o mesmo snapshot
+    substitui os valores anteriores, de modo que a carga é idempotente. Com
+    replace=True, as linhas já gravadas no snapshot para os portos dos
+    registros são removidas antes (usado no reprocessamento de coletas).
+
+    Na mesma transação, a tabela daily_volume é atualizada para o horizonte
+    do snapshot (ver refresh_daily_volume).
+
+    Parâmetros:
+    - conn: Conexão com o banco de dados do histórico.
+    - records: Registros normalizados por core.normalize.normalize, ou
+      ShipmentBatch/registros de line-up ainda não normalizados.
+    - snapshot: Identificador do snapshot de coleta.
+    - replace: Substitui todo o snapshot dos portos em vez de atualizá-lo.
+
+    Retorna:
+    Quantidade de linhas gravadas.
+    """
+    pesos = _sum_weights(records)
+    rows = list(zip(*_columns(pesos), [snapshot] * len(pesos)))
+    portos = pesos["porto"].unique().tolist()
+    with conn:
+        if replace:
+            conn.executemany(
+                "DELETE FROM lineup WHERE porto = ? AND snapshot = ?",
+                [(porto, snapshot) for porto in portos],
+            )
+        conn.executemany(UPSERT, rows)
+        for porto in portos:
+            refresh_daily_volume(conn, porto, snapshot)
+    logger.info(f"{len(rows)} linhas gravadas no histórico (snapshot {snapshot})")
+    return len(rows)
+
+
+def save_snapshot(records, snapshot, db_path=WAREHOUSE_PATH):
+    """
+    Grava os registros de uma coleta no histórico e registra as alterações de
+    cada porto em relação ao snapshot anterior (ver diff.record_changes).
+
+    É a gravação usada pela coleta de todos os portos. Registros vazios não
+    são gravados, e erros do banco de dados são propagados para quem chama,
+    que deve tratar a coleta como falha.
+
+    Parâmetros:
+    - records: Registros normalizados por core.normalize.normalize.
+    - snapshot: Identificador do snapshot de coleta.
+    - db_path: Caminho do banco de dados do histórico.
+
+    Retorna:
+    Quantidade de linhas gravadas.
+    """
+    if records.empty:
+        logger.warning(f"Nenhum registro a gravar no histórico (snapshot {snapshot})")
+        return 0
+    with connection(db_path) as conn:
+        gravadas = upsert_records(conn, records, snapshot)
+        for porto in records["porto"].unique():
+            diff.record_changes(conn, porto, snapshot)
+    return gravadas
+
+
+def save_retro_window(conn, records, janela, content_hash):
+    """
+    Grava os registros de uma janela do relatório retroativo em retro_lineup.
+
+    Os pesos de registros com a mesma chave são somados, como em
+    upsert_records. As janelas já carregadas do porto que se sobrepõem à
+    janela são substituídas, em uma única transação.
+
+    Parâmetros:
+    - conn: Conexão com o banco de dados do histórico.
+    - records: Registros normalizados por core.normalize.normalize.
+    - janela: Tupla (início, fim) de datas (datetime.date) da janela.
+    - content_hash: Hash da página da janela (ver core.fingerprint).
+
+    Retorna:
+    Quantidade de linhas gravadas.
+    """
+    pesos = _sum_weights(records)
+    inicio, fim = (data.isoformat() for data in janela)
+    extras = [inicio, fim, content_hash, new_snapshot()]
+    rows = [(*row, *extras) for row in zip(*_columns(pesos))]
+    portos = pesos["porto"].unique().tolist()
+    with conn:
+        conn.executemany(
+            """DELETE FROM retro_lineup
+                WHERE porto = ? AND janela_inicio <= ? AND janela_fim >= ?""",
+            [(porto, fim, inicio) for porto in portos],
+        )
+        conn.executemany(INSERT_RETRO, rows)
+    logger.info(f"{len(rows)} linhas gravadas da janela retroativa {inicio} a {fim}")
+    return len(rows)
+
+
+def _sum_weights(records):
+    # Soma os pesos dos registros com a mesma chave
+    keys = ["porto", "sentido", "mercadoria", "eta", "unidade_Peso"]
+    df = normalize.frame(records)
+    return df.groupby(keys, sort=False)["peso"].sum().reset_index()
+
+
+def _columns(pesos):
+    # Colunas convertidas para tipos do Python (a eta em ISO 8601) de uma vez
+    return (
+        pesos["porto"].tolist(),
+        pesos["sentido"].tolist(),
+        pesos["mercadoria"].tolist(),
+        pesos["eta"].dt.strftime("%Y-%m-%d").tolist(),
+        pesos["unidade_Peso"].tolist(),
+        pesos["peso"].tolist(),
+    )
+
+
+def refresh_daily_volume(conn, porto, snapshot):
+    """
+    Atualiza o volume diário a partir de um snapshot já gravado em lineup.
+
+    Cada snapshot substitui a previsão do porto para todo o seu horizonte: os
+    dias com eta a partir da data do snapshot e anteriores à data do snapshot
+    seguinte do porto, se houver. Dias do horizonte que não aparecem no
+    snapshot (navio cancelado ou com a eta alterada) deixam de ter volume;
+    dias anteriores à data do snapshot mantêm a previsão já registrada. O
+    primeiro snapshot do porto cobre também os dias anteriores à sua data.
+    Não abre transação própria.
+
+    Parâmetros:
+    - conn: Conexão com o banco de dados do histórico.
+    - porto: Porto do snapshot.
+    - snapshot: Identificador do snapshot de coleta.
+    """
+    params = {"porto": porto, "snapshot": snapshot}
+    anterior, seguinte = conn.execute(SNAPSHOT_NEIGHBOURS, params).fetchone()
+    # Snapshots em ISO 8601: os 10 primeiros caracteres são a data local
+    params["inicio"] = snapshot[:10] if anterior is not None else None
+    params["fim"] = seguinte[:10] if seguinte is not None else None
+    if params["inicio"] is not None and params["fim"] is not None:
+        if params["fim"] <= params["inicio"]:
+            return
+    conn.execute(DELETE_DAILY_VOLUME, params)
+    conn.execute(INSERT_DAILY_VOLUME, params)
+
+
+def rebuild_daily_volume(conn):
+    """Recalcula toda a tabela daily_volume aplicando os snapshots em ordem."""
+    logger.info("Recalculando a tabela daily_volume a partir do histórico")
+    snapshots = conn.execute(
+        "SELECT DISTINCT porto, snapshot FROM lineup ORDER BY snapshot"
+    ).fetchall()
+    with conn:
+        conn.execute("DELETE FROM daily_volume")
+        for porto, snapshot in snapshots:
+            refresh_daily_volume(conn, porto, snapshot)
+
+
+def _needs_daily_volume_rebuild(conn):
+    # Histórico gravado antes da existência da tabela daily_volume
+    return conn.execute(
+        """SELECT NOT EXISTS (SELECT 1 FROM daily_volume)
+            AND EXISTS (SELECT 1 FROM lineup)"""
+    ).fetchone()[0]
+
+
+def _migrate(conn, versao):
+    # Atualiza o histórico gravado por versões anteriores do schema; o volume
+    # diário é recalculado com as regras atuais
+    if versao < 1:
+        _migrate_units(conn)
+    historico = conn.execute("SELECT EXISTS (SELECT 1 FROM lineup)").fetchone()[0]
+    if versao < 2 and historico:
+        rebuild_daily_volume(conn)
+    if versao < 3:
+        with conn:
+            conn.executemany(
+                "UPDATE lineup_changes SET tipo = ? WHERE tipo = ?",
+                [(novo, antigo) for antigo, novo in diff.LEGACY_KINDS.items()],
+            )
+    with conn:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _migrate_units(conn):
+    # Histórico gravado antes da normalização dos pesos: converte as unidades
+    # de UNIT_FACTORS para a unidade canônica, somando os pesos que passam a
+    # ter a mesma chave
+    canonical = normalize.CANONICAL_UNIT
+    with conn:
+        for unidade, fator in normalize.UNIT_FACTORS.items():
+            if unidade == canonical:
+                continue
+            params = {"unidade": unidade, "fator": fator, "canonical": canonical}
+            conn.execute(MIGRATE_LINEUP_UNITS, params)
+            conn.execute(
+                "DELETE FROM lineup WHERE lower(trim(unidade_Peso)) = :unidade",
+                params,
+            )
+            conn.execute(MIGRATE_CHANGES_UNITS, params)
+
+
+def latest_frame(conn, porto):
+    """
+    Retorna os dados do snapshot mais recente do porto como DataFrame.
+
+    O DataFrame segue o layout dos dados agregados (porto, sentido, eta,
+    mercadoria, peso, unidade_Peso), com a eta como datetime64.
+    """
+    import pandas as pd
+
+    df = pd.read_sql_query(
+        """SELECT porto, sentido, eta, mercadoria, peso, unidade_Peso
+            FROM combined_data WHERE porto = ? ORDER BY eta""",
+        conn,
+        params=(porto,),
+    )
+    df["eta"] = pd.to_datetime(df["eta"], format="%Y-%m-%d")
+    return df
@@ -0,0 +1,140 @@
+"""
+Execução contínua dos ciclos de coleta, com recursos mantidos entre ciclos.
+
+A sessão HTTP, as conexões com o banco de dados do histórico e o navegador
+do Santos permanecem abertos entre os ciclos e são descartados quando um
+porto falha, assim que nenhuma coleta em andamento os utiliza. SIGTERM e
+SIGINT encerram o daemon ao fim do ciclo em andamento.
+"""
+
+import time
+import signal
+import logging
+import threading
+from core import http, warehouse
+import main
+
+# Intervalo, em segundos, entre as coletas de cada porto
+PORT_INTERVALS = {"paranagua": 300, "santos": 300}
+
+# Espera máxima, em segundos, enquanto um porto aguarda o fim da coleta anterior
+BUSY_WAIT = 1.0
+
+
+class Daemon:
+    """Agenda as coletas de cada porto e mantém os recursos entre os ciclos."""
+
+    def __init__(self, intervals=PORT_INTERVALS):
+        self.intervals = dict(intervals)
+        self.stop_event = threading.Event()
+
+    def run(self, max_cycles=None):
+        """
+        Executa os ciclos até receber um sinal de parada.
+
+        Em cada ciclo são coletados apenas os portos cujo intervalo expirou;
+        os demais entram na combinação com o snapshot mais recente. Um porto
+        cuja coleta anterior excedeu o tempo limite e ainda não terminou não é
+        agendado de novo até que ela termine.
+
+        Os recursos de um porto que falhou são recriados somente quando
+        nenhuma coleta está em andamento, pois a sessão HTTP e o navegador
+        ainda podem estar em uso pela coleta que excedeu o tempo limite.
+
+        Parâmetros:
+        - max_cycles: Número máximo de ciclos (None para executar até a parada).
+
+        Retorna:
+        Quantidade de ciclos executados.
+        """
+        self._install_signal_handlers()
+        self._open_resources()
+        next_run = {porto: time.monotonic() for porto in self.intervals}
+        # Portos com recursos a recriar quando nenhuma coleta estiver em andamento
+        recycle = set()
+        cycles = 0
+        try:
+            while not self.stop_event.is_set():
+                if recycle and not self._running():
+                    for porto in sorted(recycle):
+                        self._recycle_resources(porto)
+                    recycle.clear()
+
+                now = time.monotonic()
+                due = [porto for porto, when in next_run.items() if when <= now]
+                busy = [porto for porto in due if main.port_running(porto)]
+                due = [porto for porto in due if porto not in busy]
+                if due:
+                    results = main.main(due)
+                    cycles += 1
+                    for porto, result in results.items():
+                        next_run[porto] = now + self.intervals[porto]
+                        if result.status in ("failed", "timeout"):
+                            recycle.add(porto)
+                    if max_cycles is not None and cycles >= max_cycles:
+                        break
+
+                livres = [when for porto, when in next_run.items() if porto not in busy]
+                wait = min(livres, default=float("inf")) - time.monotonic()
+                if busy or (recycle and self._running()):
+                    # Verifica periodicamente o fim da coleta em andamento
+                    wait = min(wait, BUSY_WAIT)
+                self.stop_event.wait(max(wait, 0))
+        finally:
+            self._close_resources()
+        logging.info(f"Daemon encerrado após {cycles} ciclos")
+        return cycles
+
+    def stop(self, *_):
+        """Solicita o encerramento ao fim do ciclo em andamento."""
+        logging.info("Encerramento solicitado, aguardando o ciclo em andamento")
+        self.stop_event.set()
+
+    def _install_signal_handlers(self):
+        # Sinais só podem ser tratados na thread principal
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+    def _open_resources(self):
+        warehouse.use_pool(True)
+        for porto in self.intervals:
+            module = main.load_port(porto)
+            module.setup_logging()
+            keep = getattr(module, "keep_resources", None)
+            if keep is not None:
+                keep(True)
+
+    def _running(self):
+        return any(main.port_running(porto) for porto in self.intervals)
+
+    def _recycle_resources(self, porto):
+        logging.warning(f"Recriando os recursos após falha no porto {porto}")
+        recycle = getattr(main.load_port(porto), "recycle_resources", None)
+        if recycle is not None:
+            recycle()
+        http.close_session()
+        warehouse.use_pool(True)
+
+    def _close_resources(self):
+        for porto in self.intervals:
+            keep = getattr(main.load_port(porto), "keep_resources", None)
+            if keep is not None:
+                keep(False)
+        http.close_session()
+        warehouse.use_pool(False)
+
+
+def parse_intervals(values, defaults=PORT_INTERVALS):
+    """
+    Converte argumentos "porto=segundos" em um dicionário de intervalos.
+
+    Portos não informados usam o intervalo padrão.
+    """
+    intervals = dict(defaults)
+    for value in values or []:
+        porto, _, seconds = value.partition("=")
+        if porto not in main.PORTS or not seconds:
+            raise ValueError(f"Intervalo inválido: {value} (use porto=segundos)")
+        intervals[porto] = float(seconds)
+    return intervals
@@ -1,99 +1,455 @@
+"""
+Coleta dos line-ups de Paranaguá e Santos e combinação dos dados.
+
+Uso:
+    python main.py                          # coleta os dois portos e combina
+    python main.py run --porto santos       # coleta apenas um porto
+    python main.py combine                  # combina os snapshots mais recentes
+    python main.py query --porto Santos     # consulta o histórico (ver query.py)
+    python main.py status                   # último snapshot de cada porto
+    python main.py daemon --intervalo santos=120   # coletas contínuas
+
+Os pacotes dos portos, o pandas e o Selenium só são importados pelos
+subcomandos que precisam deles.
+"""
+
 import os
+import sys
+import time
 import logging
-from datetime import datetime
-import pandas as pd
-import sqlite3
+import argparse
+import importlib
+import threading
+from concurrent.futures import Future, TimeoutError
+from datetime import date, datetime
+from typing import Any, NamedTuple, Optional
+from core import cancel, logs, metrics, warehouse
+from core.config import CSV_EXPORTS
+from core.normalize import ETA_FORMAT
+import api
+import query
+
+# Módulo com a função principal e nome nos registros de cada porto
+PORTS = {
+    "paranagua": ("paranagua_scraper.main", "Paranagua"),
+    "santos": ("santos_scraper.main", "Santos"),
+}
+
+# Tempo máximo, em segundos, de execução de cada porto
+PORT_TIMEOUTS = {"paranagua": 300, "santos": 180}
+
+# Thread da última execução de cada porto (ver port_running)
+_threads = {}
+
+# Diretório dos CSVs combinados
+COMBINED_CSV_DIR = os.path.join("combined_data", "csv")
+
+
+class PortResult(NamedTuple):
+    """Resultado da execução de um porto no ciclo de coleta."""
+
+    porto: str
+    status: str  # "ok", "unchanged", "failed" ou "timeout"
+    frame: Optional[Any]  # pandas.DataFrame
+    duration: float
+    error: Optional[str] = None
 
-# Importar as funções de scraping e salvamento de Paranaguá e Santos
-from paranagua_scraper.main import main as main_paranagua
-from santos_scraper.main import main as main_santos
 
+def load_port(porto, ports=PORTS):
+    """Importa e retorna o módulo principal do porto."""
+    return importlib.import_module(ports[porto][0])
 
-def combine_data(paranagua_csv_path, santos_csv_path, output_csv_path, db_path):
-    # Ler os arquivos CSV
-    df_paranagua = pd.read_csv(paranagua_csv_path)
-    df_santos = pd.read_csv(santos_csv_path)
 
-    # Verificar as colunas para garantir que sejam consistentes
-    print("Colunas em Paranaguá:", df_paranagua.columns)
-    print("Colunas em Santos:", df_santos.columns)
+def combine_data(frames, output_csv_path):
+    """
+    Combina os dados agregados dos portos e salva em um arquivo CSV.
+
+    Parâmetros:
+    - frames: Lista de DataFrames agregados de cada porto.
+    - output_csv_path: Caminho para o arquivo CSV combinado.
+
+    Retorna:
+    DataFrame com os dados combinados.
+    """
+    import pandas as pd
 
     # Combinar os DataFrames
-    df_combined = pd.concat([df_paranagua, df_santos], ignore_index=True)
+    df_combined = pd.concat(frames, ignore_index=True)
+
+    # Ordenar os dados combinados por 'eta' (datetime64 nos dados agregados)
+    df_combined = df_combined.sort_values(by="eta", kind="stable")
+
+    # Salvar o DataFrame combinado em um novo arquivo CSV, com a eta no formato
+    # original das páginas
+    df_combined.to_csv(output_csv_path, index=False, date_format=ETA_FORMAT)
+    logging.info(f"Dados combinados salvos em {output_csv_path}")
+    return df_combined
+
+
+def run_ports(ports=PORTS, timeouts=PORT_TIMEOUTS, force=False):
+    """
+    Executa o scraping dos portos em paralelo.
+
+    Cada porto roda em sua própria thread e tem seu tempo máximo definido em
+    timeouts. Um porto que excede o tempo é marcado como "timeout", sem
+    impedir a combinação dos demais, e é cancelado de forma cooperativa: a
+    thread encerra a coleta na próxima verificação entre etapas (ver
+    core.cancel). Até lá, o porto pode ainda concluir a etapa em andamento:
+    a página no arquivo bruto e, se a gravação já tinha começado, o snapshot
+    no banco de dados, no dataset Parquet e nos CSVs. O fingerprint nunca é
+    gravado depois do tempo limite, de modo que a próxima coleta processa a
+    página de novo. As threads não impedem o encerramento do processo.
+
+    Parâmetros:
+    - ports: Dicionário {porto: (módulo principal, nome do porto nos registros)}.
+    - timeouts: Dicionário {porto: tempo máximo em segundos}.
+    - force: Processa as coletas mesmo que não haja alterações.
+
+    Retorna:
+    Dicionário {porto: PortResult}.
+    """
+    results = {}
+    start = time.monotonic()
+    execucoes = {}
+    for porto in ports:
+        if port_running(porto):
+            logging.error(f"Coleta anterior do porto {porto} ainda em andamento")
+            results[porto] = PortResult(
+                porto, "failed", None, 0.0, "Coleta anterior em andamento"
+            )
+            continue
+        token = cancel.CancelToken()
+        future = Future()
+        thread = threading.Thread(
+            target=_run_port,
+            args=(porto, ports, force, token, future),
+            name=f"porto-{porto}",
+            daemon=True,
+        )
+        _threads[porto] = thread
+        thread.start()
+        execucoes[porto] = (token, future)
+
+    for porto, (token, future) in execucoes.items():
+        remaining = max(start + timeouts[porto] - time.monotonic(), 0)
+        try:
+            results[porto] = future.result(timeout=remaining)
+        except TimeoutError:
+            if not token.cancel():
+                # A gravação final já havia sido concluída
+                results[porto] = future.result()
+                continue
+            logging.error(f"Tempo limite excedido para o porto: {porto}")
+            results[porto] = PortResult(
+                porto, "timeout", None, time.monotonic() - start
+            )
+    return {porto: results[porto] for porto in ports}
 
-    # Converter a coluna 'eta' para o formato datetime
-    df_combined["eta"] = pd.to_datetime(df_combined["eta"], format="%d/%m/%Y")
 
-    # Ordenar os dados combinados por 'eta'
-    df_combined = df_combined.sort_values(by="eta")
+def port_running(porto):
+    """Indica se a última execução do porto iniciada por run_ports não terminou."""
+    thread = _threads.get(porto)
+    return thread is not None and thread.is_alive()
 
-    # Converter a coluna 'eta' de volta para string no formato original
-    df_combined["eta"] = df_combined["eta"].dt.strftime("%d/%m/%Y")
 
-    # Salvar o DataFrame combinado em um novo arquivo CSV
-    df_combined.to_csv(output_csv_path, index=False)
-    print(f"Dados combinados salvos em {output_csv_path}")
+def _run_port(porto, ports, force, token, future):
+    start = time.monotonic()
+    cancel.bind(token)
+    try:
+        status, frame = load_port(porto, ports).main(force=force)
+        error = "Erro durante o scraping" if status == "failed" else None
+    except Exception as e:
+        status, frame, error = "failed", None, str(e)
+    finally:
+        cancel.bind(None)
+    if error is not None:
+        logging.error(f"Falha no porto {porto}: {error}")
+    future.set_result(PortResult(porto, status, frame, time.monotonic() - start, error))
 
-    # Conectar ao banco de dados SQLite e salvar os dados combinados
-    conn = sqlite3.connect(db_path)
-    df_combined.to_sql("combined_data", conn, if_exists="replace", index=False)
-    conn.close()
-    print(f"Dados combinados salvos em {db_path}")
 
+def _port_frames(results, ports=PORTS):
+    """
+    Retorna os DataFrames dos portos disponíveis para a combinação.
 
-def main():
-    # Configurar logging
-    logging.basicConfig(
-        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    Os portos concluídos entregam seus dados em memória; os portos sem
+    alterações, com falha ou tempo limite excedido, não executados neste
+    ciclo ou cujo DataFrame não foi gerado são lidos do snapshot mais recente
+    no banco de dados do histórico.
+    """
+    frames = []
+    historico = []
+    for porto, (_, nome) in ports.items():
+        result = results.get(porto)
+        if result is not None and result.status == "ok" and result.frame is not None:
+            frames.append(result.frame)
+        else:
+            historico.append(nome)
+
+    if historico:
+        with warehouse.connection() as conn:
+            for nome in historico:
+                frame = warehouse.latest_frame(conn, nome)
+                if not frame.empty:
+                    frames.append(frame)
+    return frames
+
+
+def combine(results=None):
+    """
+    Combina os dados dos portos e salva o CSV combinado.
+
+    Parâmetros:
+    - results: Dicionário {porto: PortResult} do ciclo atual. Os portos sem
+      resultado são lidos do banco de dados do histórico.
+
+    Retorna:
+    Caminho do CSV combinado, ou None se não houver dados.
+    """
+    frames = _port_frames(results or {})
+    if not frames:
+        logging.error("Nenhum dado disponível para a combinação")
+        return None
+
+    # Definir e criar o diretório de saída, se não existir
+    os.makedirs(COMBINED_CSV_DIR, exist_ok=True)
+
+    # Definir o caminho para o arquivo CSV combinado
+    timestamp = datetime.now().strftime("%d%m%Y_%H%M%S")
+    output_csv_path = os.path.join(
+        COMBINED_CSV_DIR, f"combined_paranagua_santos_{timestamp}.csv"
     )
+
+    # Combinar os dados e salvar em um novo arquivo CSV; no banco de dados do
+    # histórico, os dados combinados ficam disponíveis na view combined_data
+    with metrics.stage(None, "combine", rows=sum(len(frame) for frame in frames)):
+        combine_data(frames, output_csv_path)
+    return output_csv_path
+
+
+def main(portos=None, force=False):
+    """
+    Executa um ciclo de coleta dos portos e combina os dados.
+
+    Parâmetros:
+    - portos: Portos a coletar (padrão: todos). Os demais entram na
+      combinação com o snapshot mais recente do histórico.
+    - force: Processa as coletas mesmo que não haja alterações.
+
+    Retorna:
+    Dicionário {porto: PortResult}.
+    """
     logging.info("Iniciando o processo de scraping e combinacao dos dados")
 
-    # Definir diretórios de saída
-    paranagua_csv_dir = os.path.join(
-        "paranagua_scraper", "data", "csv", "Combined_ImpExp"
+    # Executar o scraping dos portos em paralelo
+    ports = {porto: PORTS[porto] for porto in (portos or PORTS)}
+    results = run_ports(ports, force=force)
+    for result in results.values():
+        logging.info(
+            f"Porto {result.porto}: {result.status} em {result.duration:.1f}s"
+        )
+
+    if not any(r.status == "ok" for r in results.values()):
+        logging.info("Nenhum porto com dados novos, combinação ignorada")
+    elif "combined" not in CSV_EXPORTS:
+        logging.info("CSV combinado não solicitado, dados na view combined_data")
+    elif combine(results) is not None:
+        logging.info("Processo concluido com sucesso")
+    _export_metrics()
+    return results
+
+
+def _export_metrics():
+    """Exporta as métricas das etapas do ciclo sem interromper a execução."""
+    try:
+        count = metrics.export()
+        logging.info(f"{count} métricas de etapas exportadas")
+    except Exception as e:
+        logging.error(f"Erro ao exportar as métricas: {e}")
+
+
+def _cmd_run(args):
+    portos = args.porto or list(PORTS)
+    for porto in portos:
+        load_port(porto).setup_logging()
+    results = main(portos, force=args.force)
+    return 0 if all(r.status in ("ok", "unchanged") for r in results.values()) else 1
+
+
+def _cmd_combine(args):
+    path = combine()
+    _export_metrics()
+    return 0 if path is not None else 1
+
+
+def _cmd_query(args):
+    query.run(args)
+    return 0
+
+
+def _cmd_daemon(args):
+    # Importado aqui: daemon.py importa este módulo
+    import daemon
+
+    try:
+        intervals = daemon.parse_intervals(args.intervalo)
+    except ValueError as e:
+        logging.error(str(e))
+        return 2
+    if args.porto:
+        intervals = {porto: intervals[porto] for porto in args.porto}
+    daemon.Daemon(intervals).run(args.ciclos)
+    return 0
+
+
+def _cmd_backfill(args):
+    # Importado aqui: backfill.py importa este módulo
+    import backfill
+
+    _, falhas = backfill.backfill(
+        args.porto, args.snapshot_inicio, args.snapshot_fim, args.workers
     )
-    santos_csv_dir = os.path.join("santos_scraper", "data", "csv", "ImpExp")
-    output_csv_dir = os.path.join("combined_data", "csv")
-    db_dir = os.path.join("combined_data", "db")
+    return 0 if not falhas else 1
+
+
+def _cmd_history(args):
+    module = load_port("paranagua")
+    module.setup_logging()
+    # Janela e downloads simultâneos não informados usam a configuração do porto
+    opcoes = {"dias": args.dias, "workers": args.workers}
+    try:
+        _, falhas = module.load_history(
+            date.fromisoformat(args.inicio),
+            date.fromisoformat(args.fim),
+            **{nome: valor for nome, valor in opcoes.items() if valor is not None},
+        )
+    except ValueError as e:
+        logging.error(str(e))
+        return 2
+    _export_metrics()
+    return 0 if not falhas else 1
+
+
+def _cmd_api(args):
+    api.serve(args.host, args.port, args.db)
+    return 0
 
-    # Criar diretórios de saída, se não existirem
-    os.makedirs(paranagua_csv_dir, exist_ok=True)
-    os.makedirs(santos_csv_dir, exist_ok=True)
-    os.makedirs(output_csv_dir, exist_ok=True)
-    os.makedirs(db_dir, exist_ok=True)
 
-    # Executar scraping de Paranagua
-    main_paranagua()
+def _cmd_status(args):
+    with warehouse.connection() as conn:
+        rows = conn.execute(
+            """SELECT porto, MAX(snapshot), COUNT(DISTINCT snapshot)
+                FROM lineup GROUP BY porto ORDER BY porto"""
+        ).fetchall()
+    for porto, snapshot, snapshots in rows:
+        print(f"{porto}: último snapshot {snapshot} ({snapshots} snapshots)")
+    return 0 if rows else 1
 
-    # Obter o arquivo CSV mais recente de Paranagua
-    paranagua_csv_path = max(
-        [os.path.join(paranagua_csv_dir, f) for f in os.listdir(paranagua_csv_dir)],
-        key=os.path.getctime,
+
+def build_parser():
+    """Monta o parser da linha de comando com os subcomandos."""
+    parser = argparse.ArgumentParser(
+        description="Coleta e consulta dos line-ups de Paranaguá e Santos"
     )
+    parser.set_defaults(func=_cmd_run, porto=None, force=False)
+    subparsers = parser.add_subparsers(title="subcomandos")
 
-    # Executar scraping de Santos
-    main_santos()
+    run = subparsers.add_parser("run", help="Coleta os portos e combina os dados")
+    run.add_argument(
+        "--porto",
+        action="append",
+        choices=sorted(PORTS),
+        help="Porto a coletar (pode ser repetido; padrão: todos)",
+    )
+    run.add_argument(
+        "--force",
+        action="store_true",
+        help="Processa a coleta mesmo que não haja alterações",
+    )
+    run.set_defaults(func=_cmd_run)
 
-    # Obter o arquivo CSV mais recente de Santos
-    santos_csv_path = max(
-        [os.path.join(santos_csv_dir, f) for f in os.listdir(santos_csv_dir)],
-        key=os.path.getctime,
+    combine_parser = subparsers.add_parser(
+        "combine", help="Combina os snapshots mais recentes do histórico"
     )
+    combine_parser.set_defaults(func=_cmd_combine)
 
-    # Definir o caminho para o arquivo CSV combinado
-    timestamp = datetime.now().strftime("%d%m%Y_%H%M%S")
-    output_csv_path = os.path.join(
-        output_csv_dir, f"combined_paranagua_santos_{timestamp}.csv"
+    query_parser = subparsers.add_parser("query", help="Consulta o histórico")
+    query.add_arguments(query_parser)
+    query_parser.set_defaults(func=_cmd_query)
+
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="Executa as coletas continuamente, em intervalos por porto"
+    )
+    daemon_parser.add_argument(
+        "--porto",
+        action="append",
+        choices=sorted(PORTS),
+        help="Porto a coletar (pode ser repetido; padrão: todos)",
+    )
+    daemon_parser.add_argument(
+        "--intervalo",
+        action="append",
+        metavar="PORTO=SEGUNDOS",
+        help="Intervalo entre as coletas de um porto (pode ser repetido)",
+    )
+    daemon_parser.add_argument(
+        "--ciclos", type=int, help="Número máximo de ciclos (padrão: sem limite)"
+    )
+    daemon_parser.set_defaults(func=_cmd_daemon)
+
+    backfill_parser = subparsers.add_parser(
+        "backfill", help="Reprocessa as páginas guardadas no arquivo bruto"
+    )
+    backfill_parser.add_argument(
+        "--porto",
+        action="append",
+        choices=sorted(PORTS),
+        help="Porto a reprocessar (pode ser repetido; padrão: todos)",
+    )
+    backfill_parser.add_argument(
+        "--snapshot-inicio", help="Snapshot inicial (ISO 8601, inclusive)"
+    )
+    backfill_parser.add_argument(
+        "--snapshot-fim", help="Snapshot final (ISO 8601, inclusive)"
+    )
+    backfill_parser.add_argument(
+        "--workers", type=int, help="Número de processos (padrão: um por núcleo)"
+    )
+    backfill_parser.set_defaults(func=_cmd_backfill)
+
+    history_parser = subparsers.add_parser(
+        "historico",
+        help="Carrega o relatório retroativo de Paranaguá entre duas datas",
+    )
+    history_parser.add_argument(
+        "--inicio", type=query.parse_date, required=True, help="Data inicial"
+    )
+    history_parser.add_argument(
+        "--fim", type=query.parse_date, required=True, help="Data final"
+    )
+    history_parser.add_argument(
+        "--dias", type=int, help="Dias por janela de datas (padrão: 7)"
+    )
+    history_parser.add_argument(
+        "--workers", type=int, help="Downloads simultâneos (padrão: 4)"
+    )
+    history_parser.set_defaults(func=_cmd_history)
+
+    api_parser = subparsers.add_parser(
+        "api", help="Serve o volume diário por HTTP, com cache em memória"
     )
+    api.add_arguments(api_parser)
+    api_parser.set_defaults(func=_cmd_api)
 
-    # Definir o caminho para o arquivo do banco de dados
-    db_path = os.path.join(db_dir, f"combined_data_{timestamp}.db")
+    status = subparsers.add_parser("status", help="Último snapshot de cada porto")
+    status.set_defaults(func=_cmd_status)
+    return parser
 
-    # Combinar os dados e salvar em um novo arquivo CSV e banco de dados
-    combine_data(paranagua_csv_path, santos_csv_path, output_csv_path, db_path)
 
-    logging.info("Processo concluido com sucesso")
+def cli(argv=None):
+    args = build_parser().parse_args(argv)
+    logs.setup_logging()
+    return args.func(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
@@ -1,6 +1,26 @@
 # Diretórios de saída
 OUTPUT_DIR = "paranagua_scraper"
 DATA_DIR = "data"
-DB_DIR = "db"
 CSV_DIR = "csv"
 PARANAGUA_DIR = "paranagua_scraper"
+
+# Tabela de navios esperados
+TABLE_CLASS = "table table-bordered table-striped table-hover"
+TABLE_INDEX = 4
+
+# Backend de parsing da página ("stream", "lxml" ou "html.parser")
+PARSER_BACKEND = "stream"
+
+# Modo de download da página: "buffered" (página inteira, com cache HTTP) ou
+# "stream" (leitura em blocos, interrompida ao fim da tabela de esperados)
+FETCH_MODE = "buffered"
+
+# Coleta do relatório retroativo: dias por janela de datas e janelas buscadas
+# em paralelo (os limites por host de core/config.py continuam valendo)
+RETRO_WINDOW_DAYS = 7
+RETRO_WORKERS = 4
+
+# Verificação das janelas do relatório retroativo: dias de tolerância em torno
+# da janela e fração máxima de registros com a eta fora dela
+RETRO_ETA_TOLERANCE_DAYS = 3
+RETRO_MAX_OUTSIDE = 0.1
@@ -1,5 +1,7 @@
 """ configuracoes de requests """
 
+import os
+
 
 class ConfigRequest:
 
@@ -7,4 +9,16 @@ class ConfigRequest:
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
     }
 
-    URL = "https://www.appaweb.appa.pr.gov.br/appaweb/pesquisa.aspx?WCI=relLineUpRetroativo"
+    # PARANAGUA_URL substitui a página da APPA, por exemplo pelo servidor local
+    # de páginas sintéticas (benchmarks/server.py)
+    URL = os.environ.get(
+        "PARANAGUA_URL",
+        "https://www.appaweb.appa.pr.gov.br/appaweb/pesquisa.aspx?WCI=relLineUpRetroativo",
+    )
+
+    # Relatório retroativo para uma janela de datas: {inicio} e {fim} são
+    # preenchidos com as datas no formato RETRO_DATE_FORMAT. Os nomes dos
+    # parâmetros de data dependem do formulário da APPA e não têm valor padrão:
+    # PARANAGUA_RETRO_URL deve ser configurada antes de carregar o histórico
+    RETRO_URL_TEMPLATE = os.environ.get("PARANAGUA_RETRO_URL")
+    RETRO_DATE_FORMAT = os.environ.get("PARANAGUA_RETRO_DATE_FORMAT", "%d/%m/%Y")
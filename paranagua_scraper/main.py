@@ -1,94 +1,255 @@
 import os
 import logging
 from datetime import datetime
-from .scripts.scraper import scrape_paranagua_data
-from .scripts.data_processing import save_to_database, save_to_csv, save_combined_data
+from .scripts.scraper import (
+    fetch_paranagua_page,
+    parse_paranagua_data,
+    stream_paranagua_data,
+)
+from .scripts.data_processing import (
+    save_to_parquet,
+    save_to_csv,
+    save_combined_data,
+)
+from .scripts.retro import (
+    check_live,
+    check_retro_url,
+    check_window,
+    date_windows,
+    fetch_retro_pages,
+    last_retro_day,
+)
 from .scripts.utils import create_directories
-from .config.config import DB_DIR, CSV_DIR, DATA_DIR, PARANAGUA_DIR
-
-# Configuração de logging
-# Define o diretório de saída dos logs
-output_log_dir = os.path.join("paranagua_scraper", "logs")
-create_directories([output_log_dir])
-log_file = os.path.join(output_log_dir, "scraper.log")
-
-# Configura o logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_file), logging.StreamHandler()],
+from .config.config import (
+    CSV_DIR,
+    DATA_DIR,
+    FETCH_MODE,
+    PARANAGUA_DIR,
+    RETRO_WINDOW_DAYS,
+    RETRO_WORKERS,
 )
+from core import archive, cancel, fingerprint, logs, metrics, warehouse
+from core.config import CSV_EXPORTS
+from core.normalize import normalize
+from core.processing import aggregate, filter_sentido
+from core.records import ShipmentBatch
+from core.results import RunResult
+from core.warehouse import new_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Nome do porto nos registros e no controle de alterações
+PORTO = "Paranagua"
+
+# Valores da célula de sentido na tabela para cada sentido
+SENTIDOS = {"import": "Imp", "export": "Exp", "import_export": "Imp/Exp"}
+
+
+def setup_logging():
+    """Configura o logging na saída padrão e no arquivo de log do porto."""
+    log_file = os.path.join("paranagua_scraper", "logs", "scraper.log")
+    logs.setup_logging(log_file, "paranagua_scraper")
+
+
+def parse_page(content):
+    """
+    Extrai os registros de todos os sentidos de uma página de line-up.
+
+    Usado no reprocessamento das páginas guardadas no arquivo bruto.
+
+    Retorna:
+    ShipmentBatch com os registros da página.
+    """
+    return ShipmentBatch.concat(parse_paranagua_data(content, SENTIDOS).values())
+
 
+def load_history(inicio, fim, dias=RETRO_WINDOW_DAYS, workers=RETRO_WORKERS):
+    """
+    Carrega no histórico o relatório retroativo de line-up entre duas datas.
+
+    O intervalo é limitado a ontem e dividido em janelas de `dias` dias,
+    baixadas em paralelo. Cada janela passa pela extração e normalização e é
+    descartada se a página for igual à página atual do line-up (ver
+    check_live) ou se as etas não corresponderem às suas datas (ver
+    check_window). As janelas aceitas são gravadas na tabela retro_lineup
+    (ver warehouse.save_retro_window), separadas dos snapshots das coletas;
+    carregar de novo a mesma janela substitui a carga anterior.
+
+    Parâmetros:
+    - inicio, fim: Datas (datetime.date) inicial e final, inclusive.
+    - dias: Número de dias de cada janela.
+    - workers: Número de downloads simultâneos.
+
+    Retorna:
+    Tupla (janelas gravadas, janelas com falha).
 
-def main():
+    Lança ValueError se a URL do relatório retroativo não estiver configurada.
+    """
+    check_retro_url()
+    ultimo = last_retro_day()
+    if fim > ultimo:
+        # O dia atual e os futuros ainda não pertencem ao histórico
+        logger.warning(f"Relatório retroativo limitado a {ultimo}")
+        fim = ultimo
+    janelas = date_windows(inicio, fim, dias)
+    logger.info(f"Carregando {len(janelas)} janelas do relatório retroativo")
+    gravadas = falhas = 0
+    with warehouse.connection() as conn:
+        live = _live_hashes(conn)
+        for janela, content in fetch_retro_pages(janelas, workers):
+            if content is None:
+                falhas += 1
+                continue
+            try:
+                lote = parse_page(content)
+                content_hash = fingerprint.content_hash(content)
+                check_live(content_hash, fingerprint.rows_hash(lote), live)
+                registros = normalize(lote)
+                if registros.empty:
+                    logger.info(f"Janela {janela[0]} a {janela[1]} sem registros")
+                    continue
+                check_window(registros, janela)
+                warehouse.save_retro_window(conn, registros, janela, content_hash)
+                gravadas += 1
+            except Exception as e:
+                logger.error(f"Erro na janela {janela[0]} a {janela[1]}: {e}")
+                falhas += 1
+    logger.info(f"Relatório retroativo: {gravadas} janelas gravadas, {falhas} falhas")
+    return gravadas, falhas
+
+
+def _live_hashes(conn):
+    # Hashes da página atual do line-up: os da última coleta processada e os
+    # da página baixada agora, quando disponível
+    anterior = fingerprint.load(conn, PORTO)
+    live = {anterior.content_hash, anterior.rows_hash}
+    try:
+        content = fetch_paranagua_page()
+        live.add(fingerprint.content_hash(content))
+        live.add(fingerprint.rows_hash(parse_page(content)))
+    except Exception as e:
+        logger.warning(f"Página atual indisponível para conferir as janelas: {e}")
+    live.discard(None)
+    return live
+
+
+def main(force=False):
     """
     Função principal que faz o scraping, processamento e salvamento dos dados.
+
+    Quando a página ou o conjunto de registros não mudou desde a última coleta
+    processada, o parsing e o salvamento são ignorados.
+
+    Parâmetros:
+    - force: Processa a coleta mesmo que não haja alterações.
+
+    Retorna:
+    RunResult com o status ("ok", "unchanged", "failed" ou "timeout") e, quando
+    concluído, o DataFrame com os dados combinados agregados da coleta.
     """
     try:
-        # Gera um timestamp para os nomes dos arquivos
+        with warehouse.connection() as conn:
+            anterior = fingerprint.load(conn, PORTO)
+
+        data = content = None
+        if FETCH_MODE == "stream":
+            # Download e parsing intercalados; o hash cobre o conteúdo lido até
+            # o fim da tabela de esperados, que é o que vai para o arquivo bruto
+            with archive.PageWriter(PORTO) as pagina:
+                data, content_hash = stream_paranagua_data(SENTIDOS, pagina)
+                if force or content_hash != anterior.content_hash:
+                    pagina.commit(content_hash)
+            page_bytes = pagina.bytes
+        else:
+            content = fetch_paranagua_page()
+            content_hash = fingerprint.content_hash(content)
+            page_bytes = len(content)
+
+        # Verifica se a página mudou antes de analisá-la
+        if not force and content_hash == anterior.content_hash:
+            logger.info("Página de Paranaguá sem alterações desde a última coleta")
+            return RunResult("unchanged")
+
+        # Guarda a página no arquivo bruto, para reprocessamentos futuros
+        if content is not None:
+            archive.store(PORTO, content, content_hash)
+
+        # Gera um timestamp para os nomes dos arquivos e o snapshot da coleta
         timestamp = datetime.now().strftime("%d%m%Y_%H%M%S")
-
-        # Define os nomes dos arquivos CSV e de banco de dados
-        csv_filename = f"paranagua__{timestamp}.csv"
-        db_filename = f"paranagua__{timestamp}.db"
-
-        # Define os diretórios de saída para o banco de dados e CSV
-        output_db_Imp_dir = os.path.join(PARANAGUA_DIR, DATA_DIR, DB_DIR, "Imp")
-        output_db_Exp_dir = os.path.join(PARANAGUA_DIR, DATA_DIR, DB_DIR, "Exp")
-        output_db_ImpExp_dir = os.path.join(PARANAGUA_DIR, DATA_DIR, DB_DIR, "ImpExp")
-
-        output_csv_Imp_dir = os.path.join(PARANAGUA_DIR, DATA_DIR, CSV_DIR, "Imp")
-        output_csv_Exp_dir = os.path.join(PARANAGUA_DIR, DATA_DIR, CSV_DIR, "Exp")
-        output_csv_ImpExp_dir = os.path.join(PARANAGUA_DIR, DATA_DIR, CSV_DIR, "ImpExp")
-
-        # Cria os diretórios de saída, se não existirem
-        create_directories(
-            [
-                output_db_Imp_dir,
-                output_db_Exp_dir,
-                output_db_ImpExp_dir,
-                output_csv_Imp_dir,
-                output_csv_Exp_dir,
-                output_csv_ImpExp_dir,
-            ]
-        )
-
-        sentido_import = "Imp"
-        sentido_export = "Exp"
-        sentido_import_export = "Imp/Exp"
-
-        db_imp_path = os.path.join(output_db_Imp_dir, db_filename)
-        db_exp_path = os.path.join(output_db_Exp_dir, db_filename)
-        db_imp_exp_path = os.path.join(output_db_ImpExp_dir, db_filename)
-
-        csv_imp_path = os.path.join(output_csv_Imp_dir, csv_filename)
-        csv_exp_path = os.path.join(output_csv_Exp_dir, csv_filename)
-        csv_imp_exp_path = os.path.join(output_csv_ImpExp_dir, csv_filename)
-
-        # Scrape de dados de importação
-        data_import = scrape_paranagua_data(sentido_import, "import")
-        save_to_database(data_import, "import", db_imp_path)
-        save_to_csv(data_import, "import", csv_imp_path)
-
-        # Scrape de dados de exportação
-        data_export = scrape_paranagua_data(sentido_export, "export")
-        save_to_database(data_export, "export", db_exp_path)
-        save_to_csv(data_export, "export", csv_exp_path)
-
-        # Scrape de dados de importação e exportação
-        data_import_export = scrape_paranagua_data(
-            sentido_import_export, "import_export"
-        )
-        save_to_database(data_import_export, "import_export", db_imp_exp_path)
-        save_to_csv(data_import_export, "import_export", csv_imp_exp_path)
-
-        # Combinação dos dados de importação e exportação
-        save_combined_data(data_import, data_export, data_import_export)
-
-        logging.info("Scraping e arquivos exportados concluído com sucesso")
+        snapshot = new_snapshot()
+
+        # Parsing de todos os sentidos com uma única leitura da página
+        cancel.check()
+        if data is None:
+            data = parse_paranagua_data(content, SENTIDOS)
+        data_all = ShipmentBatch.concat(data.values())
+
+        # Verifica se os registros mudaram, mesmo que a página tenha mudado
+        atual = fingerprint.Fingerprint(content_hash, fingerprint.rows_hash(data_all))
+        if not force and atual.rows_hash == anterior.rows_hash:
+            with cancel.guard(), warehouse.connection() as conn:
+                fingerprint.save(conn, PORTO, atual)
+            logger.info("Registros de Paranaguá sem alterações desde a última coleta")
+            return RunResult("unchanged")
+
+        # Normalização única dos tipos e unidades de todos os sentidos
+        cancel.check()
+        with metrics.stage(PORTO, "normalize", rows=len(data_all)):
+            registros = normalize(data_all)
+
+        # Salvamento de todos os sentidos no histórico em uma única transação
+        with metrics.stage(PORTO, "persist_db", rows=len(registros)):
+            warehouse.save_snapshot(registros, snapshot)
+        cancel.check()
+        with metrics.stage(PORTO, "persist_parquet", rows=len(registros)):
+            save_to_parquet(registros, snapshot)
+
+        # Agregação única dos dados de todos os sentidos
+        with metrics.stage(PORTO, "aggregate", rows=len(registros)):
+            df_grouped = aggregate(registros)
+
+        # Exportações CSV solicitadas em CSV_EXPORTS; os dados de cada sentido
+        # ficam sempre disponíveis nas views combined_<sentido> do banco
+        cancel.check()
+        if "sentido" in CSV_EXPORTS:
+            for sentido, csv_path in _csv_paths(timestamp).items():
+                df_sentido = filter_sentido(df_grouped, sentido)
+                with metrics.stage(PORTO, "persist_csv", sentido, rows=len(df_sentido)):
+                    save_to_csv(df_sentido, csv_path)
+        if "porto" in CSV_EXPORTS:
+            with metrics.stage(PORTO, "persist_csv", rows=len(df_grouped)):
+                save_combined_data(df_grouped)
+
+        # Registra a coleta processada e sua página bruta apenas após o
+        # salvamento, e nunca depois do tempo limite do porto
+        with cancel.guard(), warehouse.connection() as conn:
+            archive.record(
+                conn, archive.RawPage(PORTO, snapshot, content_hash, page_bytes)
+            )
+            fingerprint.save(conn, PORTO, atual)
+
+        logger.info("Scraping e arquivos exportados concluído com sucesso")
+        return RunResult("ok", df_grouped)
+    except cancel.Cancelled:
+        logger.warning("Coleta cancelada por exceder o tempo limite")
+        return RunResult("timeout")
     except Exception as e:
-        logging.error(f"Ocorreu um erro: {e}")
+        logger.error(f"Ocorreu um erro: {e}")
+        return RunResult("failed")
+
+
+def _csv_paths(timestamp):
+    # Caminhos dos CSVs de cada sentido, criando os diretórios de saída
+    csv_filename = f"paranagua__{timestamp}.csv"
+    diretorios = {"import": "Imp", "export": "Exp", "import_export": "ImpExp"}
+    paths = {}
+    for sentido, diretorio in diretorios.items():
+        output_dir = os.path.join(PARANAGUA_DIR, DATA_DIR, CSV_DIR, diretorio)
+        create_directories([output_dir])
+        paths[sentido] = os.path.join(output_dir, csv_filename)
+    return paths
 
 
 if __name__ == "__main__":
+    setup_logging()
     main()
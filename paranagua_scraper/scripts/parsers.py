@@ -0,0 +1,410 @@
+import codecs
+import logging
+import re
+import unicodedata
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import NamedTuple
+from .utils import parse_html
+from ..config.config import TABLE_CLASS, TABLE_INDEX
+
+logger = logging.getLogger(__name__)
+
+
+class TableNotFound(IndexError):
+    """A tabela de navios esperados não foi encontrada na página."""
+
+
+class HeaderNotRecognized(ValueError):
+    """O cabeçalho da tabela de esperados não tem as colunas necessárias."""
+
+
+class ColumnPlan(NamedTuple):
+    """Índices das colunas de interesse em uma linha completa da tabela."""
+
+    mercadoria: int
+    eta: int
+    peso: int
+    largura: int
+
+
+# Layout das linhas de continuação de um navio com mais de uma mercadoria: as
+# colunas do navio são cobertas pelo rowspan da linha completa e a linha traz
+# apenas Operador, DUV, Sentido, Mercadoria, ETA, ETB, ETS e Previsto
+CONTINUATION_PLAN = ColumnPlan(mercadoria=3, eta=4, peso=7, largura=8)
+
+# Nome de cada coluna no cabeçalho (sem acentos, em minúsculas e com os
+# espaços normalizados), comparado com o nome inteiro da coluna
+# Bytes do início da página em que o charset declarado é procurado
+SNIFF_SIZE = 4096
+
+HEADER_NAMES = {
+    "mercadoria": "mercadoria",
+    "eta": "eta",
+    "peso": "previsto",
+}
+
+
+def parse_expected_table(content, backend):
+    """
+    Extrai a tabela de navios esperados do conteúdo HTML.
+
+    Parâmetros:
+    - content: Conteúdo HTML da página.
+    - backend: Nome do backend de parsing registrado em BACKENDS.
+
+    Retorna:
+    Tupla (cabeçalho, linhas), onde o cabeçalho é uma lista de textos e
+    cada linha é uma lista com o texto das células.
+    """
+    try:
+        parse = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Backend de parsing desconhecido: {backend}")
+    return parse(content)
+
+
+def register_backend(name, parse):
+    """Registra um backend de parsing que recebe o conteúdo e retorna (cabeçalho, linhas)."""
+    BACKENDS[name] = parse
+
+
+@lru_cache(maxsize=32)
+def build_column_plan(header):
+    """
+    Calcula os índices das colunas a partir dos nomes do cabeçalho.
+
+    O resultado é mantido em cache por layout de página, de modo que o plano
+    é calculado uma única vez enquanto o cabeçalho não muda. Cada coluna é
+    localizada pelo nome inteiro (ver HEADER_NAMES), em qualquer posição.
+
+    Parâmetros:
+    - header: Tupla com os textos do cabeçalho da tabela, uma posição por
+      coluna (ver merge_header_rows).
+
+    Retorna:
+    Um ColumnPlan com os índices de mercadoria, ETA e peso.
+
+    Lança HeaderNotRecognized se alguma das colunas não estiver no cabeçalho.
+    """
+    nomes = [_normalize_header(nome) for nome in header]
+    indices = {}
+    for campo, nome in HEADER_NAMES.items():
+        if nome in nomes:
+            indices[campo] = nomes.index(nome)
+    faltantes = [nome for campo, nome in HEADER_NAMES.items() if campo not in indices]
+    if faltantes:
+        raise HeaderNotRecognized(
+            f"Colunas {faltantes} não encontradas no cabeçalho {list(header)}"
+        )
+    return ColumnPlan(largura=len(header), **indices)
+
+
+def merge_header_rows(linhas):
+    """
+    Combina as linhas de um cabeçalho agrupado em um nome por coluna.
+
+    As células com colspan e rowspan são expandidas em uma grade; o nome de
+    cada coluna é o da última linha do cabeçalho, de modo que um grupo (por
+    exemplo, "Navio" sobre "Embarcação" e "IMO") dá lugar às colunas que
+    agrupa, e uma célula com rowspan vale para as linhas que cobre.
+
+    Parâmetros:
+    - linhas: Lista de linhas do cabeçalho, cada uma com tuplas
+      (texto, colspan, rowspan).
+
+    Retorna:
+    Lista com o nome de cada coluna.
+    """
+    grade = {}
+    for i, linha in enumerate(linhas):
+        coluna = 0
+        for texto, colspan, rowspan in linha:
+            # Pula as posições ocupadas por rowspan de linhas anteriores
+            while (i, coluna) in grade:
+                coluna += 1
+            for r in range(i, i + rowspan):
+                for c in range(coluna, coluna + colspan):
+                    grade[(r, c)] = texto
+            coluna += colspan
+    ultima = len(linhas) - 1
+    largura = max((c + 1 for r, c in grade if r == ultima), default=0)
+    return [grade.get((ultima, c), "") for c in range(largura)]
+
+
+def row_plan(cells, plan):
+    """
+    Escolhe o layout da linha pela quantidade de células.
+
+    Parâmetros:
+    - cells: Texto das células da linha da tabela.
+    - plan: ColumnPlan da linha completa, calculado a partir do cabeçalho.
+
+    Retorna:
+    O plano da linha completa ou CONTINUATION_PLAN, ou None se a linha não
+    tiver a largura de nenhum dos dois.
+    """
+    if len(cells) == plan.largura:
+        return plan
+    if len(cells) == CONTINUATION_PLAN.largura:
+        return CONTINUATION_PLAN
+    return None
+
+
+def _normalize_header(nome):
+    nome = unicodedata.normalize("NFKD", nome)
+    nome = "".join(c for c in nome if not unicodedata.combining(c))
+    return " ".join(nome.lower().split())
+
+
+def _header_cell(th):
+    return th.get_text(strip=True), _span(th.get("colspan")), _span(th.get("rowspan"))
+
+
+def _span(valor):
+    # Valor de colspan/rowspan; ausente ou inválido vale 1
+    try:
+        return max(int(valor), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _parse_soup(content, parser):
+    from bs4 import SoupStrainer
+
+    # Materializa apenas as tabelas com a classe da tabela de esperados
+    somente = SoupStrainer("table", class_=TABLE_CLASS)
+    soup = parse_html(content, parser, parse_only=somente)
+    tabelas = soup.find_all("table", class_=TABLE_CLASS)
+    if len(tabelas) <= TABLE_INDEX:
+        raise TableNotFound("Tabela de esperados não encontrada na página")
+    tabela = tabelas[TABLE_INDEX]
+
+    # Linhas só com <th> antes da primeira linha de dados
+    thead = tabela.find("thead")
+    linhas_cabecalho = []
+    for linha in (thead or tabela).find_all("tr"):
+        if linha.find("td") is not None:
+            break
+        linhas_cabecalho.append([_header_cell(th) for th in linha.find_all("th")])
+    header = merge_header_rows(linhas_cabecalho)
+
+    corpo = tabela.find("tbody") or tabela
+    linhas = []
+    for linha in corpo.find_all("tr"):
+        cells = [td.get_text(strip=True) for td in linha.find_all("td")]
+        if cells:
+            linhas.append(cells)
+    return header, linhas
+
+
+def _parse_html_parser(content):
+    return _parse_soup(content, "html.parser")
+
+
+def _parse_lxml(content):
+    return _parse_soup(content, "lxml")
+
+
+class TableTokenizer(HTMLParser):
+    """
+    Tokenizador que materializa apenas o texto das células da tabela alvo.
+
+    As tabelas com a classe TABLE_CLASS são contadas à medida que aparecem e
+    somente a de índice TABLE_INDEX é convertida em linhas. Ao fechar a tabela
+    alvo, o atributo done passa a ser True e o restante da página é ignorado.
+    """
+
+    def __init__(self, table_class=TABLE_CLASS, table_index=TABLE_INDEX):
+        super().__init__(convert_charrefs=True)
+        self.table_class = table_class
+        self.table_index = table_index
+        self.header = []
+        self.rows = []
+        self._header_rows = []
+        self.found = False
+        self.done = False
+        self._tables_seen = 0
+        self._depth = 0  # Profundidade dentro da tabela alvo (0 = fora dela)
+        self._row = None
+        self._row_has_td = False
+        self._spans = []
+        self._cell = None
+        self._text = []
+
+    def iter_rows(self, chunks):
+        """
+        Alimenta o tokenizador com os blocos do conteúdo e produz as linhas da
+        tabela alvo à medida que são fechadas.
+
+        A leitura dos blocos é interrompida assim que a tabela alvo termina.
+        O cabeçalho fica disponível em header antes da primeira linha.
+
+        Parâmetros:
+        - chunks: Iterável de blocos do conteúdo HTML, em bytes.
+        """
+        decoder = None
+        inicio = b""
+        for chunk in chunks:
+            if decoder is None:
+                # O charset é procurado nos primeiros SNIFF_SIZE bytes, que podem
+                # chegar em mais de um bloco
+                inicio += chunk
+                if len(inicio) < SNIFF_SIZE:
+                    continue
+                chunk, inicio = inicio, b""
+                decoder = _decoder(chunk)
+            self.feed(decoder.decode(chunk))
+            yield from self._take_rows()
+            if self.done:
+                return
+        if decoder is None:
+            decoder = _decoder(inicio)
+            self.feed(decoder.decode(inicio))
+        self.feed(decoder.decode(b"", final=True))
+        self.close()
+        yield from self._take_rows()
+
+    def _take_rows(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if self._cell is not None:
+            self._flush_text()
+        if tag == "table":
+            if self._depth:
+                self._depth += 1
+            elif " ".join((dict(attrs).get("class") or "").split()) == self.table_class:
+                if self._tables_seen == self.table_index:
+                    self._depth = 1
+                    self.found = True
+                self._tables_seen += 1
+            return
+        if self._depth != 1:
+            return
+        if tag == "tr":
+            self._close_row()
+            self._row = []
+        elif tag in ("td", "th"):
+            self._close_cell()
+            if self._row is None:
+                self._row = []
+            self._row_has_td = self._row_has_td or tag == "td"
+            attrs = dict(attrs)
+            span = _span(attrs.get("colspan")), _span(attrs.get("rowspan"))
+            self._spans.append(span)
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self._depth:
+            return
+        if self._cell is not None:
+            self._flush_text()
+        if tag == "table":
+            self._depth -= 1
+            if not self._depth:
+                self._close_row()
+                self._finish_header()
+                self.done = True
+        elif self._depth == 1:
+            if tag in ("td", "th"):
+                self._close_cell()
+            elif tag in ("tr", "thead", "tbody", "tfoot"):
+                self._close_row()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            # Um mesmo texto pode chegar em partes quando a página é lida em blocos
+            self._text.append(data)
+
+    def _flush_text(self):
+        if self._text:
+            data = "".join(self._text).strip()
+            if data:
+                self._cell.append(data)
+            self._text = []
+
+    def _close_cell(self):
+        if self._cell is not None:
+            self._flush_text()
+            self._row.append("".join(self._cell))
+            self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row:
+            if self._row_has_td:
+                self._finish_header()
+                self.rows.append(self._row)
+            elif self._header_rows is not None:
+                # Linhas só com <th> antes da primeira linha de dados
+                linha = [(texto, *span) for texto, span in zip(self._row, self._spans)]
+                self._header_rows.append(linha)
+        self._row = None
+        self._row_has_td = False
+        self._spans = []
+
+    def _finish_header(self):
+        # Combina as linhas do cabeçalho uma única vez (ver merge_header_rows)
+        if self._header_rows is not None:
+            self.header = merge_header_rows(self._header_rows)
+            self._header_rows = None
+
+
+def decode_content(content):
+    """Decodifica o conteúdo da página usando o charset declarado, se houver."""
+    if isinstance(content, str):
+        return content
+    declared = _declared_charset(content)
+    encodings = [declared] if declared else []
+    for encoding in encodings + ["utf-8"]:
+        try:
+            return content.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return content.decode("cp1252", errors="replace")
+
+
+def sniff_encoding(content):
+    """
+    Retorna o charset declarado no início do conteúdo, ou utf-8.
+
+    Usado na leitura em blocos, em que não é possível decodificar a página
+    inteira novamente com outro charset.
+    """
+    declared = _declared_charset(content)
+    if declared:
+        try:
+            codecs.lookup(declared)
+            return declared
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def _decoder(content):
+    return codecs.getincrementaldecoder(sniff_encoding(content))("replace")
+
+
+def _declared_charset(content):
+    match = re.search(rb"charset=[\"']?([\w-]+)", content[:SNIFF_SIZE], re.IGNORECASE)
+    return match.group(1).decode("ascii") if match else None
+
+
+def _parse_stream(content):
+    tokenizer = TableTokenizer()
+    tokenizer.feed(decode_content(content))
+    tokenizer.close()
+    if not tokenizer.found:
+        raise TableNotFound("Tabela de esperados não encontrada na página")
+    return tokenizer.header, tokenizer.rows
+
+
+BACKENDS = {
+    "html.parser": _parse_html_parser,
+    "lxml": _parse_lxml,
+    "stream": _parse_stream,
+}
@@ -0,0 +1,153 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytz
+from .utils import fetch_page
+from ..config.config import (
+    RETRO_ETA_TOLERANCE_DAYS,
+    RETRO_MAX_OUTSIDE,
+    RETRO_WINDOW_DAYS,
+    RETRO_WORKERS,
+)
+from ..config.config_request import ConfigRequest
+from core import metrics
+from core.config import TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+
+def date_windows(inicio, fim, dias=RETRO_WINDOW_DAYS):
+    """
+    Divide o intervalo [inicio, fim] em janelas consecutivas de até `dias` dias.
+
+    Retorna:
+    Lista de tuplas (início, fim) de datas, ambos inclusive.
+    """
+    janelas = []
+    while inicio <= fim:
+        final = min(inicio + timedelta(days=dias - 1), fim)
+        janelas.append((inicio, final))
+        inicio = final + timedelta(days=1)
+    return janelas
+
+
+def check_retro_url(template=None):
+    """
+    Verifica se a URL do relatório retroativo foi configurada.
+
+    Lança ValueError se RETRO_URL_TEMPLATE não estiver definida ou não tiver
+    os campos {inicio} e {fim}.
+    """
+    template = template or ConfigRequest.RETRO_URL_TEMPLATE
+    if not template:
+        raise ValueError(
+            "URL do relatório retroativo não configurada: defina "
+            "PARANAGUA_RETRO_URL com os parâmetros de data do formulário da APPA"
+        )
+    if "{inicio}" not in template or "{fim}" not in template:
+        raise ValueError(f"PARANAGUA_RETRO_URL sem os campos {{inicio}} e {{fim}}")
+
+
+def retro_url(inicio, fim):
+    """Retorna a URL do relatório retroativo para uma janela de datas."""
+    formato = ConfigRequest.RETRO_DATE_FORMAT
+    return ConfigRequest.RETRO_URL_TEMPLATE.format(
+        inicio=inicio.strftime(formato), fim=fim.strftime(formato)
+    )
+
+
+def last_retro_day():
+    """Retorna o último dia aceito no relatório retroativo: o dia anterior a hoje."""
+    return datetime.now(pytz.timezone(TIMEZONE)).date() - timedelta(days=1)
+
+
+def check_window(registros, janela, tolerancia=RETRO_ETA_TOLERANCE_DAYS):
+    """
+    Verifica se os registros de uma janela correspondem às suas datas.
+
+    Se a APPA ignorar os parâmetros de data da URL, a página devolvida é o
+    line-up atual, que não pode ser gravado como histórico da janela. Esta
+    verificação complementa check_live, que compara a página com a atual.
+
+    Parâmetros:
+    - registros: Registros normalizados da janela (eta como datetime64).
+    - janela: Tupla (início, fim) de datas.
+    - tolerancia: Dias aceitos antes do início e depois do fim da janela.
+
+    Lança ValueError se mais de RETRO_MAX_OUTSIDE dos registros tiverem a eta
+    fora da janela.
+    """
+    inicio = janela[0] - timedelta(days=tolerancia)
+    fim = janela[1] + timedelta(days=tolerancia)
+    etas = registros["eta"].dt.date
+    fora = (~etas.between(inicio, fim)).mean()
+    if fora > RETRO_MAX_OUTSIDE:
+        raise ValueError(
+            f"{fora:.0%} dos registros com eta fora da janela (parâmetros de data "
+            "ignorados pela página?)"
+        )
+
+
+def check_live(content_hash, rows_hash, live):
+    """
+    Verifica se a página de uma janela difere da página atual do line-up.
+
+    Parâmetros:
+    - content_hash: Hash do conteúdo da página da janela.
+    - rows_hash: Hash dos registros extraídos da página da janela.
+    - live: Conjunto de hashes (de conteúdo e de registros) da página atual.
+
+    Lança ValueError se algum dos hashes da janela for o da página atual,
+    sinal de que os parâmetros de data foram ignorados.
+    """
+    if content_hash in live or rows_hash in live:
+        raise ValueError(
+            "Página igual ao line-up atual (parâmetros de data ignorados pela "
+            "página? confira PARANAGUA_RETRO_URL)"
+        )
+
+
+def fetch_retro_page(janela):
+    """
+    Baixa o relatório retroativo de uma janela de datas.
+
+    Retorna:
+    Conteúdo da página, ou None se ela não puder ser obtida.
+    """
+    with metrics.stage("Paranagua", "fetch_retro") as m:
+        content = fetch_page(retro_url(*janela), ConfigRequest.HEADERS)
+        if content is not None:
+            m.bytes = len(content)
+    return content
+
+
+def fetch_retro_pages(janelas, workers=RETRO_WORKERS):
+    """
+    Baixa o relatório retroativo de várias janelas de datas em paralelo.
+
+    No máximo 2 * workers páginas ficam em memória aguardando o consumo; a
+    concorrência e a taxa por host são limitadas em core.http.
+
+    Parâmetros:
+    - janelas: Lista de tuplas (início, fim) de datas.
+    - workers: Número de downloads simultâneos.
+
+    Retorna:
+    Gerador de tuplas (janela, conteúdo ou None), na ordem das janelas.
+    """
+    pendentes = deque()
+    fila = iter(janelas)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+
+        def enviar():
+            janela = next(fila, None)
+            if janela is not None:
+                pendentes.append((janela, executor.submit(fetch_retro_page, janela)))
+
+        for _ in range(2 * workers):
+            enviar()
+        while pendentes:
+            janela, future = pendentes.popleft()
+            enviar()
+            yield janela, future.result()
@@ -1,98 +1,228 @@
 import logging
-from .utils import fetch_page, parse_html
+from itertools import chain
+from .utils import fetch_page, stream_page
+from .parsers import (
+    CONTINUATION_PLAN,
+    HeaderNotRecognized,
+    TableNotFound,
+    TableTokenizer,
+    build_column_plan,
+    parse_expected_table,
+    row_plan,
+)
+from ..config.config import PARSER_BACKEND
 from ..config.config_request import ConfigRequest
+from core import fingerprint, metrics
+from core.records import Shipment, ShipmentBatch
 
 
 logger = logging.getLogger(__name__)
 
 
-def scrape_paranagua_data(sentido_cell_value, sentido):
+def scrape_paranagua_data(sentidos, backend=PARSER_BACKEND):
     """
-    Extrai os dados da tabela HTML.
+    Baixa a página de line-up e extrai os dados de todos os sentidos.
+
+    Parâmetros:
+    - sentidos: Dicionário {sentido: valor da célula na tabela},
+      por exemplo {"import": "Imp", "export": "Exp"}.
+    - backend: Backend de parsing usado para ler a tabela de esperados.
+
+    Retorna:
+    Dicionário {sentido: ShipmentBatch com os dados extraídos}.
+    """
+    content = fetch_paranagua_page()
+    return parse_paranagua_data(content, sentidos, backend)
+
+
+def fetch_paranagua_page():
+    """
+    Baixa o conteúdo da página de line-up de Paranaguá.
+
+    Lança RuntimeError se a página não puder ser obtida.
+    """
+    with metrics.stage("Paranagua", "fetch") as m:
+        content = fetch_page(ConfigRequest.URL, ConfigRequest.HEADERS)
+        if content is None:
+            raise RuntimeError("Não foi possível obter a página de line-up de Paranaguá")
+        m.bytes = len(content)
+    return content
+
+
+def parse_paranagua_data(content, sentidos, backend=PARSER_BACKEND):
+    """
+    Extrai os dados da tabela de navios esperados para todos os sentidos.
+
+    A página é analisada uma única vez; cada linha da tabela é classificada
+    no sentido correspondente ao valor da sua célula de sentido.
 
     Parâmetros:
     - content: Conteúdo HTML da página.
-    - sentido_cell_value: Valor que identifica o sentido na tabela.
-    - sentido: Sentido da operação (importação, exportação, etc.).
+    - sentidos: Dicionário {sentido: valor da célula na tabela},
+      por exemplo {"import": "Imp", "export": "Exp"}.
+    - backend: Backend de parsing usado para ler a tabela de esperados.
 
     Retorna:
-    Lista de tuplas contendo os dados extraídos.
+    Dicionário {sentido: ShipmentBatch com os dados extraídos}.
     """
-    logger.info(f"Iniciando parsing da tabela para o sentido: {sentido}")
-    content = fetch_page(ConfigRequest.URL, ConfigRequest.HEADERS)
-    soup = parse_html(content)
-    tabela = soup.find_all(
-        "table", class_="table table-bordered table-striped table-hover"
-    )
-    tabela_esperados = tabela[4]  # Obter a tabela de esperados
-    conteudo_tabela_esperados = tabela_esperados.find("tbody")
-    linhas_tabela_esperados = conteudo_tabela_esperados.find_all("tr")
-    data = []
-
-    # Itera sobre as linhas da tabela
-    try:
-        logger.info(f"Iniciando scraping para o sentido: {sentido}")
-
-        for linha in linhas_tabela_esperados:
-            if linha.find("td", string=f"{sentido_cell_value}"):
-                cells = linha.find_all("td")
-                if len(cells) > 10:
-                    data.append(extract_data(cells, 11, 12, 15, sentido))
-                else:
-                    data.append(extract_data(cells, 3, 4, 7, sentido))
-
-    except Exception as e:
-        logger.error(f"Erro ao fazer scraping: {e}")
-
-    logger.info(
-        f"Parsing concluído para o sentido: {sentido}, {len(data)} registros encontrados"
-    )
+    logger.info(f"Iniciando parsing da tabela para os sentidos: {list(sentidos)}")
+    with metrics.stage("Paranagua", "parse", bytes=len(content)) as m:
+        header, linhas_tabela_esperados = parse_expected_table(content, backend)
+        m.rows = len(linhas_tabela_esperados)
+    plan = build_column_plan(tuple(header))
+
+    # Mapeia o valor da célula de sentido para o sentido da operação
+    sentido_por_valor = {valor: sentido for sentido, valor in sentidos.items()}
+    data = {sentido: ShipmentBatch() for sentido in sentidos}
+
+    # Itera uma única vez sobre as linhas da tabela
+    with metrics.stage("Paranagua", "extract") as m:
+        try:
+            logger.info("Iniciando scraping da tabela de esperados")
+
+            for cells in linhas_tabela_esperados:
+                sentido = _find_sentido(cells, sentido_por_valor)
+                if sentido is None:
+                    continue
+                registro = extract_data(cells, plan, sentido)
+                if registro is not None:
+                    data[sentido].append(registro)
+
+        except Exception as e:
+            logger.error(f"Erro ao fazer scraping: {e}")
+        m.rows = sum(len(registros) for registros in data.values())
+
+    for sentido, registros in data.items():
+        logger.info(
+            f"Parsing concluído para o sentido: {sentido}, {len(registros)} registros encontrados"
+        )
     return data
 
 
-def extract_data(cells, mercadoria_idx, eta_idx, peso_idx, sentido):
+def stream_paranagua_data(sentidos, sink=None):
+    """
+    Baixa a página de line-up em blocos e extrai os dados à medida que chegam.
+
+    O download é interrompido assim que a tabela de esperados termina, de
+    modo que o restante da página não é lido nem mantido em memória.
+
+    Parâmetros:
+    - sentidos: Dicionário {sentido: valor da célula na tabela}.
+    - sink: Objeto com write(bytes) que recebe cada bloco lido (por exemplo,
+      um core.archive.PageWriter).
+
+    Retorna:
+    Tupla ({sentido: ShipmentBatch}, hash do conteúdo lido).
+
+    Lança RuntimeError se a página não puder ser obtida, TableNotFound se
+    a tabela de esperados não estiver na página e HeaderNotRecognized se o
+    cabeçalho não tiver as colunas necessárias.
+    """
+    logger.info(f"Iniciando leitura em blocos para os sentidos: {list(sentidos)}")
+    digest = fingerprint.content_digest()
+    data = {sentido: ShipmentBatch() for sentido in sentidos}
+
+    # Download, parsing e extração acontecem intercalados, em uma única etapa
+    with metrics.stage("Paranagua", "fetch_stream", bytes=0) as m:
+        chunks = stream_page(ConfigRequest.URL, ConfigRequest.HEADERS)
+
+        def lidos():
+            for chunk in chunks:
+                digest.update(chunk)
+                m.bytes += len(chunk)
+                if sink is not None:
+                    sink.write(chunk)
+                yield chunk
+
+        try:
+            for registro in iter_paranagua_records(lidos(), sentidos):
+                data[registro.sentido].append(registro)
+        except (RuntimeError, TableNotFound, HeaderNotRecognized):
+            # Falhas no download ou na tabela, como no modo buffered
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao fazer scraping: {e}")
+        finally:
+            chunks.close()
+        m.rows = sum(len(registros) for registros in data.values())
+
+    for sentido, registros in data.items():
+        logger.info(
+            f"Leitura concluída para o sentido: {sentido}, {len(registros)} registros"
+        )
+    return data, digest.hexdigest()
+
+
+def iter_paranagua_records(chunks, sentidos):
+    """
+    Produz os registros da tabela de navios esperados à medida que os blocos
+    da página são lidos.
+
+    Parâmetros:
+    - chunks: Iterável de blocos do conteúdo HTML, em bytes.
+    - sentidos: Dicionário {sentido: valor da célula na tabela}.
+
+    Retorna:
+    Gerador de Shipment.
+    """
+    tokenizer = TableTokenizer()
+    sentido_por_valor = {valor: sentido for sentido, valor in sentidos.items()}
+    linhas = tokenizer.iter_rows(chunks)
+
+    # O cabeçalho fica disponível antes da primeira linha: o plano é calculado
+    # uma única vez, antes de percorrer as linhas
+    primeira = next(linhas, None)
+    if not tokenizer.found:
+        raise TableNotFound("Tabela de esperados não encontrada na página")
+    plan = build_column_plan(tuple(tokenizer.header))
+    if primeira is None:
+        return
+
+    for cells in chain([primeira], linhas):
+        sentido = _find_sentido(cells, sentido_por_valor)
+        if sentido is not None:
+            registro = extract_data(cells, plan, sentido)
+            if registro is not None:
+                yield registro
+
+
+def _find_sentido(cells, sentido_por_valor):
+    """Retorna o sentido da primeira célula cujo texto identifica um sentido."""
+    for cell in cells:
+        sentido = sentido_por_valor.get(cell)
+        if sentido is not None:
+            return sentido
+    return None
+
+
+def extract_data(cells, plan, sentido):
     """
     Extrai os dados de cada linha da tabela.
 
+    As linhas completas seguem o plano calculado a partir do cabeçalho; as
+    linhas de continuação de um navio, que não repetem as colunas do navio,
+    seguem CONTINUATION_PLAN (ver parsers.row_plan). Linhas com outra
+    quantidade de células são ignoradas.
+
     Parâmetros:
-    - cells: Células da linha da tabela.
-    - mercadoria_idx: Índice da coluna que contém a informação da mercadoria.
-    - eta_idx: Índice da coluna que contém a informação da data estimada de chegada.
-    - peso_idx: Índice da coluna que contém a informação do peso.
+    - cells: Texto das células da linha da tabela.
+    - plan: ColumnPlan da linha completa da tabela.
     - sentido: Sentido da operação (importação, exportação, etc.).
 
     Retorna:
-    Uma tupla contendo os dados extraídos.
+    Um Shipment com os dados extraídos, ou None se a linha foi ignorada.
     """
-    mercadoria = cells[mercadoria_idx].get_text(strip=True)
-    eta_full = cells[eta_idx].get_text(strip=True)
+    layout = row_plan(cells, plan)
+    if layout is None:
+        logger.warning(
+            f"Linha com {len(cells)} células ignorada (esperadas {plan.largura} "
+            f"ou {CONTINUATION_PLAN.largura}): {cells}"
+        )
+        return None
+    mercadoria = cells[layout.mercadoria]
+    eta_full = cells[layout.eta]
     eta_date = eta_full.split()[0]
-    peso_full = cells[peso_idx].get_text(strip=True).replace(",", "").replace(".", "")
+    peso_full = cells[layout.peso].replace(",", "").replace(".", "")
     peso = int(peso_full.split()[0])
     unidade_peso = peso_full.split()[1]
-    return ("Paranagua", sentido, mercadoria, eta_date, peso, unidade_peso)
-
-
-# def scrape_paranagua_data(sentidos):
-#     """
-#     Realiza o scraping dos dados de Paranaguá.
-
-#     Parâmetros:
-#     - sentidos: Lista de tuplas contendo os sentidos e seus valores correspondentes.
-
-#     Retorna:
-#     Lista de tuplas contendo os dados extraídos de todas as páginas.
-#     """
-#     logger.info("Iniciando scraping de dados de Paranagua")
-#     all_data = []
-#     for sentido, sentido_cell_value in sentidos:
-#         logger.info(f"Iniciando scraping para o sentido: {sentido}")
-#         content = fetch_page(ConfigRequest.URL, ConfigRequest.HEADERS)
-#         if content:
-#             data = parse_table(content, sentido_cell_value, sentido)
-#             if data:
-#                 all_data.extend(data)
-#         else:
-#             logger.warning(f"Falha ao obter conteúdo para o sentido: {sentido}")
-#     logger.info("Scraping concluído")
-#     return all_data
+    return Shipment("Paranagua", sentido, mercadoria, eta_date, peso, unidade_peso)
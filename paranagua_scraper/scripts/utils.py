@@ -1,22 +1,38 @@
 import os
+import logging
 import requests
-from bs4 import BeautifulSoup
+from core import http
+
+logger = logging.getLogger(__name__)
 
 
 def fetch_page(url, headers):
     """Busca uma página web e retorna seu conteudo"""
     try:
-        result = requests.get(url, headers=headers)
-        result.raise_for_status()
-        return result.content
+        return http.fetch(url, headers)
     except requests.RequestException as e:
-        print(f"Erro ao acessar o site: {e}")
+        logger.error(f"Erro ao acessar o site: {e}")
         return None
 
 
-def parse_html(content):
+def stream_page(url, headers):
+    """
+    Busca uma página web e retorna um gerador com os blocos do conteudo.
+
+    Lança RuntimeError se a página não puder ser obtida.
+    """
+    try:
+        yield from http.stream(url, headers)
+    except requests.RequestException as e:
+        logger.error(f"Erro ao acessar o site: {e}")
+        raise RuntimeError(f"Erro ao acessar o site: {e}") from e
+
+
+def parse_html(content, parser="html.parser", parse_only=None):
     """Analisa o conteúdo HTML e retorna um objeto BeautifulSoup"""
-    return BeautifulSoup(content, "html.parser")
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(content, parser, parse_only=parse_only)
 
 
 def create_directories(paths):
@@ -0,0 +1,194 @@
+"""Consulta ao histórico de line-ups coletados (data/warehouse.db)."""
+
+import sys
+import csv
+import json
+import argparse
+from contextlib import closing
+from datetime import datetime
+
+from core import warehouse
+from core.config import WAREHOUSE_PATH
+
+# Fontes de dados consultáveis e colunas retornadas
+SOURCES = [
+    "daily_volume",
+    "lineup",
+    "combined_data",
+    "combined_import",
+    "combined_export",
+    "combined_import_export",
+    "retro_lineup",
+]
+COLUMNS = ["porto", "sentido", "eta", "mercadoria", "peso", "unidade_Peso", "snapshot"]
+
+# Quantidade de linhas lidas do cursor por vez
+FETCH_SIZE = 1000
+
+
+def build_query(
+    source="daily_volume",
+    porto=None,
+    sentido=None,
+    mercadoria=None,
+    mercadoria_contem=None,
+    eta_inicio=None,
+    eta_fim=None,
+    snapshot_inicio=None,
+    snapshot_fim=None,
+    limite=None,
+):
+    """
+    Monta a consulta SQL parametrizada sobre uma fonte do histórico.
+
+    Os filtros de igualdade e os intervalos de eta e snapshot usam os índices
+    das tabelas; o filtro mercadoria_contem faz uma busca por substring.
+
+    Retorna:
+    Tupla (sql, parâmetros).
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Fonte desconhecida: {source}")
+
+    where, params = [], []
+    for column, value in (
+        ("porto", porto),
+        ("sentido", sentido),
+        ("mercadoria", mercadoria),
+    ):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if mercadoria_contem is not None:
+        where.append("mercadoria LIKE ?")
+        params.append(f"%{mercadoria_contem}%")
+    for column, op, value in (
+        ("eta", ">=", eta_inicio),
+        ("eta", "<=", eta_fim),
+        ("snapshot", ">=", snapshot_inicio),
+        ("snapshot", "<=", snapshot_fim),
+    ):
+        if value is not None:
+            where.append(f"{column} {op} ?")
+            params.append(value)
+
+    sql = f"SELECT {', '.join(COLUMNS)} FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY eta, porto, sentido, mercadoria, snapshot"
+    if limite is not None:
+        sql += " LIMIT ?"
+        params.append(limite)
+    return sql, params
+
+
+def iter_rows(conn, sql, params):
+    """Percorre o resultado da consulta em blocos, sem carregá-lo inteiro na memória."""
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        yield from rows
+
+
+def write_rows(rows, columns, output, output_format="csv"):
+    """
+    Escreve as linhas no arquivo de saída à medida que são lidas.
+
+    Parâmetros:
+    - rows: Iterável de linhas da consulta.
+    - columns: Nomes das colunas.
+    - output: Arquivo de saída em modo texto.
+    - output_format: "csv" ou "json" (um objeto JSON por linha).
+
+    Retorna:
+    Quantidade de linhas escritas.
+    """
+    count = 0
+    if output_format == "csv":
+        writer = csv.writer(output)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            output.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+            output.write("\n")
+            count += 1
+    return count
+
+
+def parse_date(value):
+    """Aceita datas em YYYY-MM-DD ou dd/mm/YYYY e retorna no formato ISO."""
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Data inválida: {value}")
+
+
+def add_arguments(parser):
+    """Adiciona os argumentos da consulta a um parser do argparse."""
+    parser.add_argument(
+        "--fonte",
+        choices=SOURCES,
+        default="daily_volume",
+        help="daily_volume (previsão mais recente por dia), lineup (todos os "
+        "snapshots, para acompanhar a evolução da previsão), combined_data "
+        "(snapshot mais recente de cada porto), combined_<sentido> (o mesmo, "
+        "para um sentido) ou retro_lineup (relatório retroativo de Paranaguá, "
+        "com o snapshot indicando a carga da janela)",
+    )
+    parser.add_argument("--porto", help="Paranagua ou Santos")
+    parser.add_argument("--sentido", help="import, export ou import_export")
+    parser.add_argument("--mercadoria", help="Mercadoria exata")
+    parser.add_argument("--mercadoria-contem", help="Trecho do nome da mercadoria")
+    parser.add_argument("--eta-inicio", type=parse_date, help="ETA inicial (inclusive)")
+    parser.add_argument("--eta-fim", type=parse_date, help="ETA final (inclusive)")
+    parser.add_argument("--snapshot-inicio", help="Snapshot inicial (ISO 8601)")
+    parser.add_argument("--snapshot-fim", help="Snapshot final (ISO 8601)")
+    parser.add_argument("--limite", type=int, help="Número máximo de linhas")
+    parser.add_argument("--formato", choices=["csv", "json"], default="csv")
+    parser.add_argument("--saida", help="Arquivo de saída (padrão: saída padrão)")
+    parser.add_argument("--db", default=WAREHOUSE_PATH, help=argparse.SUPPRESS)
+
+
+def run(args):
+    """Executa a consulta descrita pelos argumentos e escreve o resultado."""
+    sql, params = build_query(
+        source=args.fonte,
+        porto=args.porto.capitalize() if args.porto else None,
+        sentido=args.sentido,
+        mercadoria=args.mercadoria,
+        mercadoria_contem=args.mercadoria_contem,
+        eta_inicio=args.eta_inicio,
+        eta_fim=args.eta_fim,
+        snapshot_inicio=args.snapshot_inicio,
+        snapshot_fim=args.snapshot_fim,
+        limite=args.limite,
+    )
+    with closing(warehouse.connect(args.db)) as conn:
+        rows = iter_rows(conn, sql, params)
+        if args.saida:
+            with open(args.saida, "w", newline="", encoding="utf-8") as output:
+                count = write_rows(rows, COLUMNS, output, args.formato)
+        else:
+            count = write_rows(rows, COLUMNS, sys.stdout, args.formato)
+        # Mantém as estatísticas usadas pelo planejador de consultas atualizadas
+        conn.execute("PRAGMA optimize")
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Consulta o histórico de line-ups de Paranaguá e Santos"
+    )
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
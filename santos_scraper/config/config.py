@@ -5,5 +5,8 @@ CHROME_PATH = which("chromedriver")
 
 # Diretórios de saída
 OUTPUT_DIR = "santos_scraper"
-DB_DIR = "db"
 CSV_DIR = "csv"
+
+# Modo de scraping: "http" (sem navegador), "selenium" ou "auto"
+# (tenta HTTP e recorre ao Selenium quando as tabelas não são encontradas)
+SCRAPING_MODE = "auto"
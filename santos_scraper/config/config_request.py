@@ -1,6 +1,17 @@
 """ configuracoes de requests """
 
+import os
+
 
 class ConfigRequest:
 
-    URL = "https://www.portodesantos.com.br/informacoes-operacionais/operacoes-portuarias/navegacao-e-movimento-de-navios/navios-esperados-carga/"
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+    }
+
+    # SANTOS_URL substitui a página do porto, por exemplo pelo servidor local de
+    # páginas sintéticas (benchmarks/server.py)
+    URL = os.environ.get(
+        "SANTOS_URL",
+        "https://www.portodesantos.com.br/informacoes-operacionais/operacoes-portuarias/navegacao-e-movimento-de-navios/navios-esperados-carga/",
+    )
@@ -1,47 +1,148 @@
 import logging
-from .scripts.scraper import scrape_santos_data
-from .scripts.data_processing import save_to_database, save_to_csv, save_combined_data
-from .scripts.utils import create_directories
+from .scripts.scraper import (
+    close_browser,
+    extract_santos_data,
+    keep_browser_open,
+    scrape_santos_data,
+)
+from .scripts.data_processing import (
+    save_to_parquet,
+    save_to_csv,
+    save_combined_data,
+)
+from core import archive, cancel, fingerprint, logs, metrics, warehouse
+from core.config import CSV_EXPORTS
+from core.normalize import normalize
+from core.processing import aggregate, filter_sentido
+from core.records import ShipmentBatch
+from core.results import RunResult
+from core.warehouse import new_snapshot
 import os
 
-# Configuração de logging
-# Define o diretório de saída dos logs
-output_log_dir = os.path.join("santos_scraper", "logs")
-create_directories([output_log_dir])
-log_file = os.path.join(output_log_dir, "scraper.log")
-
-# Configura o logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_file), logging.StreamHandler()],
-)
+logger = logging.getLogger(__name__)
+
+# Nome do porto nos registros e no controle de alterações
+PORTO = "Santos"
+
+# Número de cada tabela de navios esperados na página
+TABLES = {"import": 4, "export": 5}
+
+
+def setup_logging():
+    """Configura o logging na saída padrão e no arquivo de log do porto."""
+    log_file = os.path.join("santos_scraper", "logs", "scraper.log")
+    logs.setup_logging(log_file, "santos_scraper")
+
+
+def keep_resources(enabled=True):
+    """Mantém o navegador do Selenium aberto entre as coletas do processo."""
+    keep_browser_open(enabled)
+
+
+def recycle_resources():
+    """Descarta o navegador aberto; a próxima coleta abre um novo, se necessário."""
+    close_browser()
+
 
+def parse_page(content):
+    """
+    Extrai os registros de importação e exportação de uma página de line-up.
 
-def main():
-    logging.info("Iniciando o processo de scraping dos dados do Porto de Santos")
+    Usado no reprocessamento das páginas guardadas no arquivo bruto.
+
+    Retorna:
+    ShipmentBatch com os registros da página (vazio se as tabelas não forem
+    encontradas).
+    """
+    data = extract_santos_data(content, TABLES)
+    return ShipmentBatch.concat(data.values()) if data else ShipmentBatch()
+
+
+def main(force=False):
+    """
+    Função principal que faz o scraping, processamento e salvamento dos dados.
+
+    Quando o conjunto de registros extraídos não mudou desde a última coleta
+    processada, o salvamento é ignorado.
+
+    Parâmetros:
+    - force: Processa a coleta mesmo que não haja alterações.
+
+    Retorna:
+    RunResult com o status ("ok", "unchanged", "failed" ou "timeout") e, quando
+    concluído, o DataFrame com os dados combinados agregados da coleta.
+    """
+    logger.info("Iniciando o processo de scraping dos dados do Porto de Santos")
     try:
-        time_sleep = 5  # Tempo de espera para o carregamento da página
-        import_table_number = 4
-        export_table_number = 5
+        timeout = 30  # Tempo máximo de espera pelas tabelas no navegador
+        snapshot = new_snapshot()
+
+        # Scrape dos dados de importação e exportação em uma única leitura
+        data, content = scrape_santos_data(TABLES, timeout)
+        data_all = ShipmentBatch.concat(data.values())
+        if not len(data_all):
+            raise RuntimeError("Nenhum registro extraído da página de Santos")
+
+        # Verifica se os registros mudaram desde a última coleta processada
+        cancel.check()
+        with warehouse.connection() as conn:
+            anterior = fingerprint.load(conn, PORTO)
+        atual = fingerprint.Fingerprint(None, fingerprint.rows_hash(data_all))
+        if not force and atual.rows_hash == anterior.rows_hash:
+            logger.info("Registros de Santos sem alterações desde a última coleta")
+            return RunResult("unchanged")
+
+        # Normalização única dos tipos e unidades de todos os sentidos
+        cancel.check()
+        with metrics.stage(PORTO, "normalize", rows=len(data_all)):
+            registros = normalize(data_all)
+
+        # Salvamento dos dois sentidos no histórico em uma única transação
+        with metrics.stage(PORTO, "persist_db", rows=len(registros)):
+            warehouse.save_snapshot(registros, snapshot)
+        cancel.check()
+        with metrics.stage(PORTO, "persist_parquet", rows=len(registros)):
+            save_to_parquet(registros, snapshot)
+
+        # Agregação única dos dados dos dois sentidos
+        with metrics.stage(PORTO, "aggregate", rows=len(registros)):
+            df_grouped = aggregate(registros)
 
-        # Scrape de dados de importação
-        data_import = scrape_santos_data(time_sleep, import_table_number, "import")
-        save_to_database(data_import, "import")
-        save_to_csv(data_import, "import")
+        # Exportações CSV solicitadas em CSV_EXPORTS; os dados de cada sentido
+        # ficam sempre disponíveis nas views combined_<sentido> do banco
+        cancel.check()
+        if "sentido" in CSV_EXPORTS:
+            for sentido in TABLES:
+                df_sentido = filter_sentido(df_grouped, sentido)
+                with metrics.stage(PORTO, "persist_csv", sentido, rows=len(df_sentido)):
+                    save_to_csv(df_sentido, sentido)
+        if "porto" in CSV_EXPORTS:
+            with metrics.stage(PORTO, "persist_csv", rows=len(df_grouped)):
+                save_combined_data(df_grouped)
 
-        # Scrape de dados de exportação
-        data_export = scrape_santos_data(time_sleep, export_table_number, "export")
-        save_to_database(data_export, "export")
-        save_to_csv(data_export, "export")
+        # Guarda a página lida no arquivo bruto, para reprocessamentos futuros
+        pagina = None
+        if content is not None:
+            content_hash, page_bytes = archive.store(PORTO, content)
+            pagina = archive.RawPage(PORTO, snapshot, content_hash, page_bytes)
 
-        # Combinação dos dados de importação e exportação
-        save_combined_data(data_import, data_export)
+        # Registra a coleta processada e sua página bruta apenas após o
+        # salvamento, e nunca depois do tempo limite do porto
+        with cancel.guard(), warehouse.connection() as conn:
+            if pagina is not None:
+                archive.record(conn, pagina)
+            fingerprint.save(conn, PORTO, atual)
 
-        logging.info("Scraping e arquivos exportados concluído com sucesso")
+        logger.info("Scraping e arquivos exportados concluído com sucesso")
+        return RunResult("ok", df_grouped)
+    except cancel.Cancelled:
+        logger.warning("Coleta cancelada por exceder o tempo limite")
+        return RunResult("timeout")
     except Exception as e:
-        logging.error(f"Ocorreu um erro: {e}")
+        logger.error(f"Ocorreu um erro: {e}")
+        return RunResult("failed")
 
 
 if __name__ == "__main__":
+    setup_logging()
     main()
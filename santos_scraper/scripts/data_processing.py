@@ -1,98 +1,60 @@
-import pandas as pd
-import sqlite3
 import pytz
 from datetime import datetime
 import os
 import logging
-from ..config.config import OUTPUT_DIR, DB_DIR, CSV_DIR
+from ..config.config import OUTPUT_DIR, CSV_DIR
 from .utils import create_directories
+from core import columnar
+from core.normalize import ETA_FORMAT
 
 logger = logging.getLogger(__name__)
 
 
-def save_to_database(data, sentido):
+def save_to_parquet(data, snapshot):
     """
-    Salva os dados em um banco de dados SQLite.
+    Salva os dados no dataset Parquet particionado.
 
     Parâmetros:
-    - data: Lista de dados scrapados
-    - sentido: Sentido da operação (importação, exportação).
+    - data: Registros scrapados, normalizados por core.normalize.normalize.
+    - snapshot: Identificador do snapshot de coleta.
     """
-    if data:
-        db_path = _get_db_path(sentido)
-        _save_data_to_db(data, sentido, db_path)
+    if not data.empty:
+        columnar.write_parquet(data, snapshot)
 
 
-def save_to_csv(data, sentido):
+def save_to_csv(df_grouped, sentido):
     """
-    Salva os dados em um arquivo CSV.
+    Salva os dados agregados em um arquivo CSV.
 
     Parâmetros:
-    - data: Lista de dados scrapados.
+    - df_grouped: Dados agregados por core.processing.aggregate.
     - sentido: Sentido da operação (importação, exportação, etc.).
     """
-    if data:
+    if not df_grouped.empty:
         csv_path = _get_csv_path(sentido)
-        _save_data_to_csv(data, sentido, csv_path)
+        _save_data_to_csv(df_grouped, csv_path)
 
 
-def save_combined_data(data_import, data_export):
+def save_combined_data(df_grouped):
     """
-    Combina e salva os dados de importação e exportação em um único arquivo CSV e banco de dados.
+    Salva os dados agregados de importação e exportação em um único arquivo CSV.
 
     Parâmetros:
-    - data_import: Lista de dados de importação.
-    - data_export: Lista de dados de exportação.
+    - df_grouped: Dados agregados de importação e exportação.
+
+    Retorna:
+    - O DataFrame combinado, ou None em caso de erro.
     """
     try:
-        data_combined = data_import + data_export
         sentido = "ImpExp"
-        db_path = _get_db_path(sentido)
         csv_path = _get_csv_path(sentido)
 
-        _save_data_to_db(data_combined, sentido, db_path)
-        _save_data_to_csv(data_combined, sentido, csv_path)
-        logger.info(
-            f"Dados combinados salvos com sucesso no banco de dados: {db_path} e CSV:{csv_path}"
-        )
+        _save_data_to_csv(df_grouped, csv_path)
+        logger.info(f"Dados combinados salvos com sucesso no CSV:{csv_path}")
+        return df_grouped
     except Exception as e:
         logger.error(f"Salvar os dados combinados: {e}")
-
-
-def _get_db_path(sentido):
-    tz = pytz.timezone("America/Sao_Paulo")
-    now = datetime.now(tz)
-    timestamp = now.strftime("%d%m%Y_%H%M%S")
-    db_name = f"santos_{sentido}_{timestamp}.db"
-    db_output_dir = os.path.join(OUTPUT_DIR, "data", DB_DIR, sentido)
-    create_directories([db_output_dir])
-    return os.path.join(db_output_dir, db_name)
-
-
-def _save_data_to_db(data, sentido, db_path):
-    tz = pytz.timezone("America/Sao_Paulo")
-    now = datetime.now(tz)
-
-    with sqlite3.connect(db_path) as conn:
-        c = conn.cursor()
-        c.execute(
-            f"""CREATE TABLE IF NOT EXISTS santos_{sentido}(
-                porto TEXT, 
-                sentido TEXT,
-                mercadoria TEXT, 
-                eta DATE, 
-                peso INTEGER,
-                unidade_Peso TEXT,                    
-                updated_On TIMESTAMP 
-            )"""
-        )
-        for entry in data:
-            c.execute(
-                f"""INSERT INTO santos_{sentido} (porto, sentido, mercadoria, eta, peso, unidade_Peso, updated_On) VALUES (?, ?, ?, ?, ?, ?,?)""",
-                (*entry, now),
-            )
-        conn.commit()
-    logger.info(f"Dados salvos com sucesso no banco de dados: {db_path}")
+        return None
 
 
 def _get_csv_path(sentido):
@@ -107,33 +69,8 @@ def _get_csv_path(sentido):
     return os.path.join(csv_output_dir, csv_filename)
 
 
-def _save_data_to_csv(data, sentido, csv_path):
-    # Cria um DataFrame a partir dos dados
-    df = pd.DataFrame(
-        data, columns=["porto", "sentido", "mercadoria", "eta", "peso", "unidade_Peso"]
-    )
-
-    # Agrupa os dados por porto, sentido, eta e mercadoria, somando os pesos
-    df_grouped = (
-        df.groupby(["porto", "sentido", "eta", "mercadoria", "unidade_Peso"])
-        .agg({"peso": "sum"})
-        .reset_index()
-    )
-    # Converte a coluna 'eta' para o formato de data
-    df_grouped["eta"] = pd.to_datetime(df_grouped["eta"], format="%d/%m/%Y")
-
-    # Ordena o DataFrame pela coluna 'eta
-    df_grouped = df_grouped.sort_values(by="eta").reset_index(drop=True)
-
-    # Converte a coluna 'eta' de volta para o formato de string
-    df_grouped["eta"] = df_grouped["eta"].dt.strftime("%d/%m/%Y")
-
-    # Ordena as colunas no padrão de relevancia
-    df_grouped = df_grouped[
-        ["porto", "sentido", "eta", "mercadoria", "peso", "unidade_Peso"]
-    ]
-
+def _save_data_to_csv(df_grouped, csv_path):
     # Salva o DataFrame no arquivo CSV
-    df_grouped.to_csv(csv_path, index=False)
+    df_grouped.to_csv(csv_path, index=False, date_format=ETA_FORMAT)
 
     logger.info(f"Dados salvos com sucesso no CSV: {csv_path}")
@@ -1,58 +1,221 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
-from ..config.config import CHROME_PATH
+from ..config.config import CHROME_PATH, SCRAPING_MODE
 from ..config.config_request import ConfigRequest
-import time
+from .utils import fetch_page, parse_html
+from core import metrics
+from core.records import Shipment, ShipmentBatch
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 
-def scrape_santos_data(time_sleep, table_number, sentido):
+def scrape_santos_data(tables, timeout, mode=SCRAPING_MODE):
     """
+    Raspa as tabelas de navios esperados com uma única leitura da página.
+
     Parâmetros:
-    - time_sleep: Tempo para aguardar o carregamento da página.
-    - table_number: Número da tabela a ser raspada.
-    - sentido: Sentido da operação (importação, exportação, etc.).
+    - tables: Dicionário {sentido: número da tabela na página}.
+    - timeout: Tempo máximo, em segundos, para aguardar as tabelas no navegador.
+    - mode: Modo de scraping ("http", "selenium" ou "auto").
 
     Retorna:
-    - Lista de dados raspados.
+    - Tupla ({sentido: ShipmentBatch com os dados raspados}, HTML da página
+      lida).
+
+    Lança RuntimeError se a página não puder ser obtida ou se alguma das
+    tabelas não for encontrada.
+    """
+    if mode in ("http", "auto"):
+        data, content = _scrape_santos_http(tables)
+        if data is not None:
+            return data, content
+        if mode == "http":
+            raise RuntimeError("Tabelas de navios esperados não encontradas via HTTP")
+        logger.warning("Tabelas não encontradas via HTTP, utilizando o Selenium")
+    data, content = _scrape_santos_selenium(tables, timeout)
+    if data is None:
+        raise RuntimeError("Tabelas de navios esperados não encontradas via Selenium")
+    return data, content
+
+
+def _scrape_santos_http(tables):
+    """
+    Raspa as tabelas a partir do HTML obtido por uma requisição HTTP simples.
+
+    Retorna uma tupla (dados, HTML); os dados são None quando a página não
+    pôde ser obtida ou alguma tabela não possui linhas, indicando que é
+    necessário renderizar a página no navegador.
+    """
+    logger.info("Iniciando scraping via HTTP")
+    with metrics.stage("Santos", "fetch") as m:
+        content = fetch_page(ConfigRequest.URL, ConfigRequest.HEADERS)
+        if content is not None:
+            m.bytes = len(content)
+    if content is None:
+        return None, None
+    return extract_santos_data(content, tables), content
+
+
+def _scrape_santos_selenium(tables, timeout):
+    """
+    Raspa as tabelas em uma única sessão do navegador.
+
+    A página é carregada uma vez, aguarda-se explicitamente até que a última
+    tabela possua linhas e o HTML renderizado é entregue ao parser local,
+    evitando uma chamada ao WebDriver por célula. Com keep_browser_open(True),
+    o navegador é mantido aberto para as próximas coletas e só é descartado
+    quando ocorre um erro.
+
+    Retorna uma tupla (dados, HTML); os dados são None quando as tabelas não
+    puderam ser obtidas.
     """
-    logger.info(f"Iniciando scraping para o sentido: {sentido}")
-    data = []
+    # O Selenium só é importado quando o navegador é necessário
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    logger.info("Iniciando scraping via Selenium")
+    data = content = None
 
     try:
-        options = webdriver.ChromeOptions()
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        service = ChromeService(executable_path=CHROME_PATH)
-        driver = webdriver.Chrome(service=service, options=options)
-
-        driver.get(ConfigRequest.URL)
-        time.sleep(time_sleep)
-
-        xpath = f"((//table)[{table_number}])/tbody/tr"
-        santos_tabela_selecionada = driver.find_elements(By.XPATH, xpath)
-
-        for row in santos_tabela_selecionada:
-            mercadoria = row.find_element(By.XPATH, "./td[9]").text
-            eta_full = row.find_element(By.XPATH, "./td[5]").text
-            eta_date = eta_full.split()[0]
-            peso = int(
-                row.find_element(By.XPATH, "./td[10]")
-                .text.replace(",", "")
-                .replace(".", "")
+        # Inclui a abertura do navegador (se necessária) e a renderização das tabelas
+        with metrics.stage("Santos", "fetch_browser") as m:
+            driver = _get_driver()
+            driver.get(ConfigRequest.URL)
+            xpath = f"((//table)[{max(tables.values())}])/tbody/tr"
+            WebDriverWait(driver, timeout).until(
+                EC.presence_of_element_located((By.XPATH, xpath))
             )
+            content = driver.page_source
+            m.bytes = len(content)
 
-            data.append(("Santos", sentido, mercadoria, eta_date, peso, "Tons"))
+        data = extract_santos_data(content, tables)
     except Exception as e:
         logger.error(f"Erro ao fazer scraping: {e}")
+        # Um navegador em estado desconhecido não é reaproveitado
+        close_browser()
     finally:
-        driver.quit()
+        if not _keep_browser:
+            close_browser()
+
+    return data, content
+
+
+# Navegador reaproveitado entre coletas quando _keep_browser está ativo
+_driver = None
+_keep_browser = False
+_driver_lock = threading.Lock()
+
+
+def keep_browser_open(enabled=True):
+    """Mantém (ou não) o navegador aberto entre as coletas do processo."""
+    global _keep_browser
+    _keep_browser = enabled
+    if not enabled:
+        close_browser()
+
+
+def close_browser():
+    """Fecha o navegador aberto, se houver."""
+    global _driver
+    with _driver_lock:
+        driver, _driver = _driver, None
+    if driver is not None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Erro ao fechar o navegador: {e}")
+
+
+def _get_driver():
+    """Retorna o navegador aberto ou abre um novo navegador headless."""
+    global _driver
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from selenium.webdriver.chrome.options import Options
+
+    with _driver_lock:
+        if _driver is None:
+            options = Options()
+            options.add_argument("--headless")
+            service = ChromeService(executable_path=CHROME_PATH)
+            _driver = webdriver.Chrome(service=service, options=options)
+        return _driver
+
 
-    logger.info(
-        f"Scraping concluído para o sentido: {sentido} com {len(data)} registros."
-    )
+def extract_santos_data(content, tables):
+    """
+    Extrai os dados das tabelas de um HTML da página de navios esperados.
+
+    Parâmetros:
+    - content: Conteúdo HTML da página.
+    - tables: Dicionário {sentido: número da tabela na página}.
+
+    Retorna:
+    - Dicionário {sentido: ShipmentBatch com os dados raspados}, ou None se
+      alguma das tabelas não for encontrada ou não possuir linhas.
+    """
+    with metrics.stage("Santos", "parse", bytes=len(content)):
+        tabelas = parse_html(content).find_all("table")
+    data = {}
+    for sentido, table_number in tables.items():
+        with metrics.stage("Santos", "extract", sentido) as m:
+            rows = extract_table_rows(tabelas, table_number)
+            if not rows:
+                return None
+
+            data[sentido] = ShipmentBatch()
+            try:
+                for cells in rows:
+                    data[sentido].append(parse_row(cells, sentido))
+            except Exception as e:
+                logger.error(f"Erro ao fazer scraping: {e}")
+            m.rows = len(data[sentido])
+
+        logger.info(
+            f"Scraping concluído para o sentido: {sentido} com {len(data[sentido])} registros."
+        )
     return data
+
+
+def extract_table_rows(tabelas, table_number):
+    """
+    Retorna o texto das células das linhas de uma tabela.
+
+    Parâmetros:
+    - tabelas: Lista de tabelas da página, em ordem de documento.
+    - table_number: Número da tabela na página, começando em 1 (como no XPath).
+
+    Retorna:
+    - Lista de linhas, cada uma com a lista de textos das células,
+      ou None se a tabela não existir na página.
+    """
+    if len(tabelas) < table_number:
+        return None
+    tabela = tabelas[table_number - 1]
+    corpo = tabela.find("tbody", recursive=False) or tabela
+    rows = []
+    for linha in corpo.find_all("tr", recursive=False):
+        cells = [
+            td.get_text(" ", strip=True) for td in linha.find_all("td", recursive=False)
+        ]
+        if cells:
+            rows.append(cells)
+    return rows
+
+
+def parse_row(cells, sentido):
+    """
+    Converte o texto das células de uma linha em um Shipment.
+
+    Parâmetros:
+    - cells: Lista com o texto das células da linha.
+    - sentido: Sentido da operação (importação, exportação, etc.).
+
+    Retorna:
+    - Shipment contendo os dados extraídos.
+    """
+    mercadoria = cells[8]
+    eta_date = cells[4].split()[0]
+    peso = int(cells[9].replace(",", "").replace(".", ""))
+    return Shipment("Santos", sentido, mercadoria, eta_date, peso, "Tons")
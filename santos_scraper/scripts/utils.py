@@ -1,4 +1,29 @@
 import os
+import logging
+import requests
+from core import http
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_page(url, headers):
+    """
+    Busca uma página web e retorna seu conteudo
+    """
+    try:
+        return http.fetch(url, headers)
+    except requests.RequestException as e:
+        logger.error(f"Erro ao acessar o site: {e}")
+        return None
+
+
+def parse_html(content):
+    """
+    Analisa o conteúdo HTML e retorna um objeto BeautifulSoup
+    """
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(content, "html.parser")
 
 
 def create_directories(paths):
@@ -0,0 +1,101 @@
+import json
+import threading
+import urllib.request
+from contextlib import closing
+
+import pytest
+
+import api
+from core import warehouse
+from core.records import Shipment
+
+
+def _grava(db_path, eta, peso, snapshot):
+    registro = Shipment("Santos", "export", "SOJA", eta, peso, "t")
+    with closing(warehouse.connect(db_path)) as conn:
+        warehouse.upsert_records(conn, [registro], snapshot)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "warehouse.db")
+    _grava(path, "10/05/2024", 100, "2024-05-01T08:00:00-03:00")
+    return path
+
+
+@pytest.fixture
+def cache(db_path):
+    cache = api.ResponseCache(db_path, max_entries=2, ttl=60)
+    yield cache
+    cache.close()
+
+
+def test_gravacao_de_outra_conexao_descarta_o_cache(cache, db_path):
+    body, generation = cache.get("a")
+    assert body is None
+    cache.put("a", b"[]", generation)
+    assert cache.get("a") == (b"[]", generation)
+
+    _grava(db_path, "12/05/2024", 200, "2024-05-02T08:00:00-03:00")
+
+    assert cache.get("a") == (None, generation + 1)
+    assert len(cache) == 0
+
+
+def test_resposta_calculada_antes_do_descarte_nao_e_guardada(cache, db_path):
+    _, generation = cache.get("a")
+    _grava(db_path, "12/05/2024", 200, "2024-05-02T08:00:00-03:00")
+    cache.get("b")  # Outra consulta percebe a gravação
+    cache.put("a", b"antiga", generation)
+    assert cache.get("a")[0] is None
+
+
+def test_sem_gravacao_o_cache_e_mantido(cache):
+    _, generation = cache.get("a")
+    cache.put("a", b"[]", generation)
+    for _ in range(3):
+        assert cache.get("a") == (b"[]", generation)
+
+
+def test_entrada_expirada_e_lru(db_path):
+    cache = api.ResponseCache(db_path, max_entries=2, ttl=-1)
+    try:
+        cache.put("a", b"[]", 0)
+        assert cache.get("a")[0] is None
+    finally:
+        cache.close()
+
+    cache = api.ResponseCache(db_path, max_entries=2, ttl=60)
+    try:
+        for chave in ("a", "b"):
+            cache.put(chave, chave.encode(), 0)
+        cache.get("a")  # "a" passa a ser a mais recente
+        cache.put("c", b"c", 0)
+        assert cache.get("b")[0] is None
+        assert cache.get("a")[0] == b"a"
+        assert cache.get("c")[0] == b"c"
+    finally:
+        cache.close()
+
+
+def test_servidor_recalcula_apos_nova_coleta(db_path):
+    server = api.make_server("127.0.0.1", 0, db_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/daily_volume?porto=santos"
+
+    def consulta():
+        with urllib.request.urlopen(url) as response:
+            pesos = [linha["peso"] for linha in json.loads(response.read())]
+            return response.headers["X-Cache"], pesos
+
+    try:
+        assert consulta() == ("MISS", [100])
+        assert consulta() == ("HIT", [100])
+        _grava(db_path, "12/05/2024", 200, "2024-05-02T08:00:00-03:00")
+        assert consulta() == ("MISS", [200])
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.RequestHandlerClass.cache.close()
+        warehouse.use_pool(False)
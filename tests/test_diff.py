@@ -0,0 +1,70 @@
+from contextlib import closing
+
+from core import diff, warehouse
+from core.diff import Change
+
+
+def _dia(eta, mercadoria="SOJA"):
+    return ("export", mercadoria, "t", eta)
+
+
+def test_dia_novo():
+    assert diff.diff_rows({}, {_dia("2024-05-10"): 100}) == [
+        Change(diff.DIA_NOVO, "export", "SOJA", "t", None, "2024-05-10", None, 100)
+    ]
+
+
+def test_dia_removido():
+    assert diff.diff_rows({_dia("2024-05-10"): 100}, {}) == [
+        Change(diff.DIA_REMOVIDO, "export", "SOJA", "t", "2024-05-10", None, 100, None)
+    ]
+
+
+def test_peso_revisado():
+    anteriores = {_dia("2024-05-10"): 100}
+    atuais = {_dia("2024-05-10"): 150}
+    esperada = Change(
+        diff.PESO_REVISADO, "export", "SOJA", "t", "2024-05-10", "2024-05-10", 100, 150
+    )
+    assert diff.diff_rows(anteriores, atuais) == [esperada]
+
+
+def test_dia_deslocado():
+    anteriores = {_dia("2024-05-10"): 100}
+    atuais = {_dia("2024-05-12"): 100}
+    esperada = Change(
+        diff.DIA_DESLOCADO, "export", "SOJA", "t", "2024-05-10", "2024-05-12", 100, 100
+    )
+    assert diff.diff_rows(anteriores, atuais) == [esperada]
+
+
+def test_dia_deslocado_com_outro_peso_fica_removido_e_novo():
+    anteriores = {_dia("2024-05-10"): 100}
+    atuais = {_dia("2024-05-12"): 120}
+    assert sorted(change.tipo for change in diff.diff_rows(anteriores, atuais)) == [
+        diff.DIA_NOVO,
+        diff.DIA_REMOVIDO,
+    ]
+
+
+def test_totais_sem_alteracao():
+    linhas = {_dia("2024-05-10"): 100, _dia("2024-05-11", "MILHO"): 50}
+    assert diff.diff_rows(linhas, dict(linhas)) == []
+
+
+def test_tipos_antigos_sao_migrados(tmp_path):
+    db_path = str(tmp_path / "warehouse.db")
+    with closing(warehouse.connect(db_path)) as conn:
+        conn.execute(
+            """INSERT INTO lineup_changes (porto, snapshot, snapshot_anterior, tipo,
+                sentido, mercadoria, unidade_Peso) VALUES
+                ('Santos', 's2', 's1', 'eta_alterada', 'import', 'SAL', 't')"""
+        )
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+
+    with closing(warehouse.connect(db_path)) as conn:
+        tipos = conn.execute("SELECT tipo FROM lineup_changes").fetchall()
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    assert tipos == [(diff.DIA_DESLOCADO,)]
+    assert versao == warehouse.SCHEMA_VERSION
@@ -0,0 +1,130 @@
+import pytest
+import requests
+
+from core import http
+
+
+def _resposta(status, corpo=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = corpo
+    response._content_consumed = True
+    response.headers.update(headers or {})
+    return response
+
+
+class FakeSession:
+    """Sessão que devolve as respostas na ordem e guarda os cabeçalhos enviados."""
+
+    def __init__(self, respostas):
+        self.respostas = list(respostas)
+        self.enviados = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.enviados.append(dict(headers or {}))
+        resposta = self.respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+
+@pytest.fixture
+def sessao(monkeypatch):
+    esperas = []
+    monkeypatch.setattr(http, "_limiter", http.HostLimiter(rate=0))
+    monkeypatch.setattr(http.time, "sleep", esperas.append)
+
+    def instala(respostas):
+        session = FakeSession(respostas)
+        session.esperas = esperas
+        monkeypatch.setattr(http, "get_session", lambda: session)
+        return session
+
+    return instala
+
+
+URL = "http://porto.local/lineup"
+
+
+@pytest.mark.parametrize("status", sorted(http.RETRY_STATUS))
+def test_request_repete_status_transitorio(sessao, status):
+    session = sessao([_resposta(status), _resposta(status), _resposta(200, b"ok")])
+    response = http._request(URL, {}, timeout=1, retries=3)
+    assert response.status_code == 200
+    assert len(session.enviados) == 3
+    # Backoff exponencial com jitter: cada espera fica abaixo do seu teto
+    assert len(session.esperas) == 2
+    for attempt, delay in enumerate(session.esperas):
+        assert 0 <= delay <= min(http.HTTP_BACKOFF_MAX, http.HTTP_BACKOFF * 2**attempt)
+
+
+def test_request_devolve_ultima_resposta_ao_esgotar_tentativas(sessao):
+    session = sessao([_resposta(503), _resposta(503)])
+    response = http._request(URL, {}, timeout=1, retries=1)
+    assert response.status_code == 503
+    assert len(session.enviados) == 2
+
+
+def test_request_repete_falha_de_conexao(sessao):
+    session = sessao([requests.ConnectionError("recusada"), _resposta(200, b"ok")])
+    assert http._request(URL, {}, timeout=1, retries=1).content == b"ok"
+    assert len(session.enviados) == 2
+
+
+def test_request_nao_repete_erro_do_cliente(sessao):
+    session = sessao([_resposta(404), _resposta(200)])
+    assert http._request(URL, {}, timeout=1, retries=3).status_code == 404
+    assert len(session.enviados) == 1
+    assert session.esperas == []
+
+
+def test_fetch_reaproveita_cache_em_304(sessao, tmp_path):
+    cache = http.HttpCache(str(tmp_path))
+    session = sessao([
+        _resposta(200, b"<html>v1</html>", {"ETag": '"v1"'}),
+        _resposta(304),
+    ])
+    assert http.fetch(URL, cache=cache) == b"<html>v1</html>"
+    assert http.fetch(URL, cache=cache) == b"<html>v1</html>"
+    assert "If-None-Match" not in session.enviados[0]
+    assert session.enviados[1]["If-None-Match"] == '"v1"'
+
+
+def test_fetch_nao_guarda_resposta_sem_validador(sessao, tmp_path):
+    cache = http.HttpCache(str(tmp_path))
+    session = sessao([_resposta(200, b"a"), _resposta(200, b"b")])
+    assert http.fetch(URL, cache=cache) == b"a"
+    assert http.fetch(URL, cache=cache) == b"b"
+    assert cache.get(URL) is None
+    assert session.enviados[1] == {}
+
+
+def test_fetch_304_sem_corpo_em_cache_repete_sem_condicionais(
+    sessao, tmp_path, monkeypatch
+):
+    cache = http.HttpCache(str(tmp_path))
+    session = sessao([
+        _resposta(200, b"v1", {"ETag": '"v1"'}),
+        _resposta(304),
+        _resposta(200, b"v2", {"ETag": '"v2"'}),
+    ])
+    http.fetch(URL, cache=cache)
+
+    # O corpo some do disco entre a requisição condicional e a resposta 304
+    get = cache.get
+    chamadas = []
+
+    def get_some(url):
+        chamadas.append(url)
+        return get(url) if len(chamadas) == 1 else None
+
+    monkeypatch.setattr(cache, "get", get_some)
+    assert http.fetch(URL, cache=cache) == b"v2"
+    assert "If-None-Match" in session.enviados[1]
+    assert "If-None-Match" not in session.enviados[2]
+
+
+def test_fetch_304_repetido_sem_corpo_lanca_erro(sessao):
+    sessao([_resposta(304), _resposta(304)])
+    with pytest.raises(requests.HTTPError):
+        http.fetch(URL, cache=None)
@@ -0,0 +1,26 @@
+from core import metrics
+
+
+def _series(path):
+    with open(path, encoding="utf-8") as f:
+        linhas = [line for line in f if line.startswith("lineup_stage_rows{")]
+    return [line.split(" ")[0] for line in linhas]
+
+
+def test_portos_sem_coleta_mantem_o_ultimo_valor(tmp_path):
+    # Ciclo em que só Santos roda: a série de Paranaguá continua no arquivo
+    path = str(tmp_path / "lineup.prom")
+    metrics.reset()
+    with metrics.stage("Paranagua", "parse", rows=10):
+        pass
+    metrics.write_prometheus(metrics.collected(), path)
+    metrics.reset()
+    with metrics.stage("Santos", "parse", rows=7):
+        pass
+    metrics.write_prometheus(metrics.collected(), path)
+    metrics.reset()
+
+    assert _series(path) == [
+        'lineup_stage_rows{porto="Paranagua",stage="parse",sentido=""}',
+        'lineup_stage_rows{porto="Santos",stage="parse",sentido=""}',
+    ]
@@ -0,0 +1,61 @@
+import logging
+
+import pandas as pd
+import pytest
+
+from core import normalize
+from core.records import COLUMNS, Shipment, ShipmentBatch
+
+
+def _registro(peso, unidade, eta="10/05/2024"):
+    return Shipment("Santos", "export", "SOJA", eta, peso, unidade)
+
+
+@pytest.mark.parametrize(
+    "peso, unidade, esperado",
+    [
+        (1000, "t", 1000),
+        (1000, "Tons", 1000),
+        (1000, " TONELADAS ", 1000),
+        (2500000, "kg", 2500),
+        (1499, "KG", 1),
+        (1500, "kg", 2),
+    ],
+)
+def test_converte_para_a_unidade_canonica(peso, unidade, esperado):
+    df = normalize.normalize([_registro(peso, unidade)])
+    assert df["peso"].tolist() == [esperado]
+    assert df["unidade_Peso"].tolist() == [normalize.CANONICAL_UNIT]
+
+
+def test_unidade_desconhecida_mantida_sem_conversao(caplog):
+    registros = [_registro(30, "m3"), _registro(5000, "kg")]
+    with caplog.at_level(logging.WARNING, logger=normalize.__name__):
+        df = normalize.normalize(registros)
+    assert df["peso"].tolist() == [30, 5]
+    assert df["unidade_Peso"].tolist() == ["m3", "t"]
+    assert "m3" in caplog.text
+
+
+def test_tipos_e_colunas():
+    batch = ShipmentBatch.from_records(
+        [_registro(10, "t", "31/12/2024"), _registro(20, "kg", "01/01/2025")]
+    )
+    df = normalize.normalize(batch)
+    assert list(df.columns) == COLUMNS
+    assert pd.api.types.is_datetime64_any_dtype(df["eta"])
+    assert df["peso"].dtype == "int64"
+    assert df["eta"].tolist() == [
+        pd.Timestamp("2024-12-31"),
+        pd.Timestamp("2025-01-01"),
+    ]
+
+
+def test_eta_fora_do_formato_falha():
+    with pytest.raises(ValueError):
+        normalize.normalize([_registro(10, "t", "2024-05-10")])
+
+
+def test_frame_aceita_dataframe_normalizado():
+    df = normalize.normalize([_registro(10, "t")])
+    assert normalize.frame(df) is df
@@ -0,0 +1,148 @@
+import pytest
+
+from paranagua_scraper.scripts import parsers
+from paranagua_scraper.scripts.parsers import ColumnPlan, HeaderNotRecognized
+
+# Cabeçalho da tabela de esperados de benchmarks/fixtures/paranagua.html
+HEADER = (
+    "Programação",
+    "Embarcação",
+    "IMO",
+    "Bandeira",
+    "Comp (m)",
+    "DWT",
+    "Calado (m)",
+    "Agência",
+    "Operador",
+    "DUV",
+    "Sentido",
+    "Mercadoria",
+    "ETA",
+    "ETB",
+    "ETS",
+    "Previsto",
+)
+
+
+def _pagina(thead, linhas):
+    tabela = '<table class="table table-bordered table-striped table-hover">'
+    antes = f"{tabela}<tr><td>x</td></tr></table>" * parsers.TABLE_INDEX
+    corpo = "".join(
+        "<tr>" + "".join(f"<td>{cell}</td>" for cell in linha) + "</tr>"
+        for linha in linhas
+    )
+    return (
+        f"<html><body>{antes}{tabela}<thead>{thead}</thead>"
+        f"<tbody>{corpo}</tbody></table></body></html>"
+    ).encode("utf-8")
+
+
+def test_cabecalho_da_fixture():
+    assert parsers.build_column_plan(HEADER) == ColumnPlan(11, 12, 15, 16)
+
+
+def test_cabecalho_reordenado():
+    header = ("Previsto", "ETA Estimada", "Mercadoria", "ETA", "Sentido")
+    assert parsers.build_column_plan(header) == ColumnPlan(2, 3, 0, 5)
+
+
+def test_nomes_comparados_por_inteiro():
+    # "ETA Estimada" e "Peso bruto" não podem ocupar o lugar de ETA e Previsto
+    header = ("Mercadoria", "ETA Estimada", "Peso bruto", "Previsto")
+    with pytest.raises(HeaderNotRecognized):
+        parsers.build_column_plan(header)
+
+
+def test_coluna_ausente_falha():
+    with pytest.raises(HeaderNotRecognized):
+        parsers.build_column_plan(tuple(nome for nome in HEADER if nome != "ETA"))
+
+
+@pytest.mark.parametrize("backend", sorted(parsers.BACKENDS))
+def test_cabecalho_agrupado(backend):
+    thead = (
+        '<tr><th colspan="2">Navio</th><th rowspan="2">Sentido</th>'
+        '<th colspan="3">Carga</th></tr>'
+        "<tr><th>Embarcação</th><th>IMO</th>"
+        "<th>Mercadoria</th><th>ETA</th><th>Previsto</th></tr>"
+    )
+    linha = ["NAVIO 1", "9400000", "Exp", "MILHO", "10/05/2024 06:00", "1.000 t"]
+    header, linhas = parsers.parse_expected_table(_pagina(thead, [linha]), backend)
+
+    assert header == ["Embarcação", "IMO", "Sentido", "Mercadoria", "ETA", "Previsto"]
+    assert linhas == [linha]
+    assert parsers.build_column_plan(tuple(header)) == ColumnPlan(3, 4, 5, 6)
+
+
+def _blocos(conteudo, *cortes):
+    inicio = 0
+    for corte in cortes:
+        yield conteudo[inicio:corte]
+        inicio = corte
+    yield conteudo[inicio:]
+
+
+# Células com caracteres de vários bytes em UTF-8 e com entidades HTML
+LINHAS_ACENTUADAS = [
+    ["AÇÚCAR", "10/05/2024", "1.000 t"],
+    ["Fertilizantes &amp; Adubos", "11/05/2024", "2.000 t"],
+    ["Fosfato de C&aacute;lcio &#8211; Granel", "12/05/2024", "3.000 t"],
+]
+THEAD = "<tr><th>Mercadoria</th><th>ETA</th><th>Previsto</th></tr>"
+
+
+def _linhas_da_pagina():
+    return [
+        ["AÇÚCAR", "10/05/2024", "1.000 t"],
+        ["Fertilizantes & Adubos", "11/05/2024", "2.000 t"],
+        ["Fosfato de Cálcio – Granel", "12/05/2024", "3.000 t"],
+    ]
+
+
+def _leitura_em_blocos(blocos):
+    tokenizer = parsers.TableTokenizer()
+    linhas = list(tokenizer.iter_rows(blocos))
+    return tokenizer.header, linhas
+
+
+def test_tokenizador_em_blocos_de_um_byte():
+    conteudo = _pagina(THEAD, LINHAS_ACENTUADAS)
+    blocos = (conteudo[i:i + 1] for i in range(len(conteudo)))
+    header, linhas = _leitura_em_blocos(blocos)
+    assert header == ["Mercadoria", "ETA", "Previsto"]
+    assert linhas == _linhas_da_pagina()
+
+
+def test_tokenizador_com_corte_em_qualquer_posicao():
+    # Cortes dentro de caracteres de vários bytes e no meio das entidades
+    conteudo = _pagina(THEAD, LINHAS_ACENTUADAS)
+    esperado = parsers.parse_expected_table(conteudo, "stream")
+    inicio = conteudo.index(b"<tbody>")
+    for corte in range(inicio, len(conteudo)):
+        assert _leitura_em_blocos(_blocos(conteudo, corte)) == esperado, corte
+
+
+def test_tokenizador_respeita_charset_declarado():
+    meta = '<meta http-equiv="Content-Type" content="text/html; charset=windows-1252">'
+    conteudo = _pagina(THEAD, [["AÇÚCAR", "10/05/2024", "1.000 t"]])
+    conteudo = conteudo.decode("utf-8").replace("<body>", f"<head>{meta}</head><body>")
+    conteudo = conteudo.encode("cp1252")
+    blocos = (conteudo[i:i + 7] for i in range(0, len(conteudo), 7))
+    assert _leitura_em_blocos(blocos)[1] == [["AÇÚCAR", "10/05/2024", "1.000 t"]]
+
+
+def test_tokenizador_para_de_ler_ao_fim_da_tabela():
+    # Página maior que o trecho em que o charset é procurado
+    enchimento = b"<!--" + b"x" * parsers.SNIFF_SIZE + b"-->"
+    conteudo = _pagina(THEAD, LINHAS_ACENTUADAS).replace(b"<body>", enchimento, 1)
+    lidos = []
+
+    def blocos():
+        for bloco in _blocos(conteudo, len(conteudo) - 20):
+            lidos.append(bloco)
+            yield bloco
+        yield b"<p>rodap\xc3\xa9 que n\xc3\xa3o deve ser lido</p>"
+        raise AssertionError("o tokenizador leu além da tabela")
+
+    header, linhas = _leitura_em_blocos(blocos())
+    assert linhas == _linhas_da_pagina()
@@ -0,0 +1,106 @@
+import pytest
+
+from paranagua_scraper.config.config import TABLE_INDEX
+from paranagua_scraper.scripts.parsers import (
+    ColumnPlan,
+    HeaderNotRecognized,
+    TableNotFound,
+)
+from paranagua_scraper.scripts.scraper import (
+    extract_data,
+    iter_paranagua_records,
+    parse_paranagua_data,
+)
+
+PLAN = ColumnPlan(mercadoria=11, eta=12, peso=15, largura=16)
+
+NAVIO = [
+    "20240001",
+    "MV ORIENT HARMONY",
+    "9400000",
+    "PANAMA",
+    "180",
+    "55000",
+    "11.0",
+    "AGENCIA A",
+]
+
+
+def test_linha_completa():
+    cells = [
+        *NAVIO,
+        "OPERADOR F",
+        "2024000100",
+        "Exp",
+        "SOJA EM GRAOS",
+        "10/05/2024 06:00",
+        "12/05/2024",
+        "15/05/2024",
+        "40.000 t",
+    ]
+    registro = extract_data(cells, PLAN, "export")
+    assert (registro.mercadoria, registro.eta, registro.peso) == (
+        "SOJA EM GRAOS",
+        "10/05/2024",
+        40000,
+    )
+    assert registro.unidade_Peso == "t"
+
+
+def test_linha_de_continuacao():
+    cells = [
+        "OPERADOR F",
+        "2024000150",
+        "Exp",
+        "FERTILIZANTES",
+        "11/05/2024 06:00",
+        "12/05/2024",
+        "15/05/2024",
+        "7.000 t",
+    ]
+    registro = extract_data(cells, PLAN, "export")
+    assert (registro.mercadoria, registro.eta, registro.peso) == (
+        "FERTILIZANTES",
+        "11/05/2024",
+        7000,
+    )
+
+
+def test_linha_curta_malformada_e_ignorada():
+    # Sem Operador e DUV: não corresponde a nenhum dos layouts conhecidos
+    cells = ["Exp", "MILHO", "12/05/2024 08:00", "14/05/2024", "17/05/2024", "61.000 t"]
+    assert extract_data(cells, PLAN, "export") is None
+
+
+def test_cabecalho_sem_coluna_falha_a_leitura():
+    tabela = '<table class="table table-bordered table-striped table-hover">'
+    antes = f"{tabela}<tr><td>x</td></tr></table>" * TABLE_INDEX
+    pagina = (
+        f"<html><body>{antes}{tabela}<thead><tr><th>Sentido</th><th>Mercadoria</th>"
+        "<th>Previsto</th></tr></thead><tbody><tr><td>Exp</td><td>MILHO</td>"
+        "<td>1.000 t</td></tr></tbody></table></body></html>"
+    ).encode("utf-8")
+
+    with pytest.raises(HeaderNotRecognized):
+        parse_paranagua_data(pagina, {"export": "Exp"})
+    with pytest.raises(HeaderNotRecognized):
+        list(iter_paranagua_records([pagina], {"export": "Exp"}))
+
+
+def test_leitura_em_blocos_igual_a_leitura_da_pagina_inteira():
+    with open("benchmarks/fixtures/paranagua.html", "rb") as f:
+        pagina = f.read()
+    sentidos = {"import": "Imp", "export": "Exp", "import_export": "Imp/Exp"}
+    blocos = [pagina[i : i + 100] for i in range(0, len(pagina), 100)]
+
+    registros = list(iter_paranagua_records(blocos, sentidos))
+    esperados = parse_paranagua_data(pagina, sentidos, "html.parser")
+    assert sorted(registros) == sorted(
+        registro for lote in esperados.values() for registro in lote
+    )
+    assert len(registros) == 15
+
+
+def test_pagina_sem_a_tabela_falha_a_leitura_em_blocos():
+    with pytest.raises(TableNotFound):
+        list(iter_paranagua_records([b"<html><body></body></html>"], {"export": "Exp"}))
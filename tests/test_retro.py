@@ -0,0 +1,65 @@
+from contextlib import closing
+from datetime import date
+
+import pytest
+
+from core import warehouse
+from core.normalize import normalize
+from core.records import Shipment
+from paranagua_scraper.scripts import retro
+
+
+def _registros(*etas):
+    return normalize(
+        [Shipment("Paranagua", "export", "SOJA", eta, 100, "t") for eta in etas]
+    )
+
+
+def test_janela_fica_fora_dos_snapshots_das_coletas(tmp_path):
+    with closing(warehouse.connect(str(tmp_path / "warehouse.db"))) as conn:
+        janela = (date(2024, 5, 1), date(2024, 5, 7))
+        warehouse.save_retro_window(conn, _registros("02/05/2024"), janela, "abc")
+
+        assert conn.execute("SELECT COUNT(*) FROM lineup").fetchone() == (0,)
+        assert conn.execute("SELECT COUNT(*) FROM daily_volume").fetchone() == (0,)
+        assert conn.execute("SELECT COUNT(*) FROM combined_data").fetchone() == (0,)
+        linhas = conn.execute(
+            """SELECT janela_inicio, janela_fim, eta, peso, content_hash
+                FROM retro_lineup"""
+        ).fetchall()
+        assert linhas == [("2024-05-01", "2024-05-07", "2024-05-02", 100, "abc")]
+
+
+def test_janela_substitui_as_janelas_sobrepostas(tmp_path):
+    with closing(warehouse.connect(str(tmp_path / "warehouse.db"))) as conn:
+        semana = (date(2024, 5, 1), date(2024, 5, 7))
+        warehouse.save_retro_window(conn, _registros("02/05/2024"), semana, "a")
+        dias = (date(2024, 5, 5), date(2024, 5, 6))
+        warehouse.save_retro_window(conn, _registros("05/05/2024"), dias, "b")
+
+        linhas = conn.execute("SELECT eta, content_hash FROM retro_lineup").fetchall()
+        assert linhas == [("2024-05-05", "b")]
+
+
+def test_pagina_igual_a_atual_e_rejeitada():
+    retro.check_live("c1", "r1", {"c2", "r2"})
+    with pytest.raises(ValueError):
+        retro.check_live("c1", "r1", {"c1"})
+    with pytest.raises(ValueError):
+        retro.check_live("c9", "r1", {"r1"})
+
+
+def test_url_do_relatorio_obrigatoria(monkeypatch):
+    monkeypatch.setattr(retro.ConfigRequest, "RETRO_URL_TEMPLATE", None)
+    with pytest.raises(ValueError):
+        retro.check_retro_url()
+    with pytest.raises(ValueError):
+        retro.check_retro_url("https://exemplo/relatorio?data={inicio}")
+    retro.check_retro_url("https://exemplo/relatorio?de={inicio}&ate={fim}")
+
+
+def test_etas_fora_da_janela_sao_rejeitadas():
+    janela = (date(2024, 5, 1), date(2024, 5, 7))
+    retro.check_window(_registros("02/05/2024", "06/05/2024"), janela)
+    with pytest.raises(ValueError):
+        retro.check_window(_registros("02/07/2024", "06/07/2024"), janela)
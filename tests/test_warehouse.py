@@ -0,0 +1,64 @@
+from contextlib import closing
+
+from core import warehouse
+from core.normalize import normalize
+from core.records import Shipment
+
+
+def _volume(conn):
+    return conn.execute(
+        "SELECT eta, mercadoria, peso, snapshot FROM daily_volume ORDER BY eta"
+    ).fetchall()
+
+
+def test_eta_alterada_substitui_o_dia_anterior(tmp_path):
+    # A mesma carga passa de 10/05 para 12/05: o volume não pode ser contado
+    # nos dois dias
+    with closing(warehouse.connect(str(tmp_path / "warehouse.db"))) as conn:
+        primeiro = "2024-05-01T08:00:00-03:00"
+        segundo = "2024-05-03T08:00:00-03:00"
+        registro = Shipment("Paranagua", "export", "SOJA", "10/05/2024", 100, "t")
+        warehouse.upsert_records(conn, [registro], primeiro)
+        registro = Shipment("Paranagua", "export", "SOJA", "12/05/2024", 100, "t")
+        warehouse.upsert_records(conn, [registro], segundo)
+
+        assert _volume(conn) == [("2024-05-12", "SOJA", 100, segundo)]
+
+        # O recálculo completo chega ao mesmo resultado
+        warehouse.rebuild_daily_volume(conn)
+        assert _volume(conn) == [("2024-05-12", "SOJA", 100, segundo)]
+
+
+def test_dias_anteriores_ao_snapshot_ficam_congelados(tmp_path):
+    with closing(warehouse.connect(str(tmp_path / "warehouse.db"))) as conn:
+        primeiro = "2024-05-01T08:00:00-03:00"
+        segundo = "2024-05-11T08:00:00-03:00"
+        registro = Shipment("Santos", "import", "TRIGO", "10/05/2024", 50, "t")
+        warehouse.upsert_records(conn, [registro], primeiro)
+        registro = Shipment("Santos", "import", "TRIGO", "15/05/2024", 70, "t")
+        warehouse.upsert_records(conn, [registro], segundo)
+
+        assert _volume(conn) == [
+            ("2024-05-10", "TRIGO", 50, primeiro),
+            ("2024-05-15", "TRIGO", 70, segundo),
+        ]
+
+
+def test_save_snapshot_grava_registros_e_alteracoes(tmp_path):
+    db_path = str(tmp_path / "warehouse.db")
+    primeiro = "2024-05-01T08:00:00-03:00"
+    segundo = "2024-05-02T08:00:00-03:00"
+    registro = Shipment("Santos", "import", "TRIGO", "10/05/2024", 50, "t")
+    warehouse.save_snapshot(normalize([registro]), primeiro, db_path)
+    registro = Shipment("Santos", "import", "TRIGO", "10/05/2024", 80, "t")
+    assert warehouse.save_snapshot(normalize([registro]), segundo, db_path) == 1
+
+    with closing(warehouse.connect(db_path)) as conn:
+        alteracoes = conn.execute("SELECT snapshot FROM lineup_changes").fetchall()
+    assert alteracoes == [(segundo,)]
+
+
+def test_save_snapshot_ignora_registros_vazios(tmp_path):
+    db_path = str(tmp_path / "warehouse.db")
+    vazio = normalize([])
+    assert warehouse.save_snapshot(vazio, "2024-05-01T08:00:00-03:00", db_path) == 0